@@ -3,11 +3,28 @@
 🤝 Advisor Controller
 This combines Pattern Agent, Behavior Agent, and Coach Agent.
 Each can work alone or together safely.
+
+Behavior tracking: one advisor_behavior document per signed-in user (_id =
+sha256 of the user id from the bearer token) with running counters
+(behavior_agent.HABIT_COUNTERS + total), bumped with one atomic $inc per
+authenticated /coach call; anonymous calls get tips without being recorded. Habits come from the counters, O(1) whatever the history length.
+An optional ring of the last ADVISOR_RING_SIZE feature bitmasks is kept with
+$push/$slice; idle documents expire after ADVISOR_BEHAVIOR_TTL_DAYS.
+ENV:
+  ADVISOR_RING_SIZE          = recent bitmasks kept per user (default 20, 0 = off)
+  ADVISOR_BEHAVIOR_TTL_DAYS  = days without a /coach call before the counters go (default 90)
 """
 
-from fastapi import APIRouter, HTTPException
+import hashlib, os
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from agents.new_advisor import pattern_agent, behavior_agent, coach_agent
+from auth_guard import get_current_claims, get_optional_user_id
+from repositories import advisor_behavior
 
 router = APIRouter()
 
@@ -15,9 +32,11 @@ router = APIRouter()
 class PasswordInput(BaseModel):
     password: str
 
-# In-memory temporary store for user patterns (simulate behavior tracking)
-# ⚠️ Not persistent; only for demonstration, never stores real passwords.
-USER_FEATURE_HISTORY = {}
+ADVISOR_RING_SIZE = int(os.getenv("ADVISOR_RING_SIZE", "20"))
+ADVISOR_BEHAVIOR_TTL = timedelta(days=int(os.getenv("ADVISOR_BEHAVIOR_TTL_DAYS", "90")))
+
+def _key(user_id: str) -> str:
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()
 
 # ---------- Endpoints ----------
 
@@ -26,35 +45,44 @@ def analyze_pattern(data: PasswordInput):
     """Step 1: Extract safe password features."""
     return pattern_agent.extract_features(data.password)
 
+@router.post("/pattern/batch")
+def analyze_patterns(data: pattern_agent.PasswordBatchInput):
+    """Step 1 for many passwords at once (results in input order)."""
+    return [pattern_agent.features_view(*r) for r in pattern_agent.scan_batch(data.passwords)]
+
 @router.post("/behavior")
-def analyze_behavior(username: str):
+async def analyze_behavior(claims: dict = Depends(get_current_claims)):
     """
-    Step 2: Analyze habits based on previously stored feature history.
-    Normally, you'd use a user_id from the database.
+    Step 2: Analyze the signed-in user's habits from the stored counters (one _id read).
     """
-    user_features = USER_FEATURE_HISTORY.get(username, [])
-    habits = behavior_agent.detect_habits(user_features)
-    return {"username": username, "habits": habits}
+    counts = await advisor_behavior.get(_key(claims["sub"]))
+    habits = behavior_agent.detect_habits_from_counts(counts)
+    return {"user_id": claims["sub"], "habits": habits}
 
 @router.post("/coach")
-def generate_tips(data: PasswordInput, username: str = "guest"):
+async def generate_tips(data: PasswordInput, user_id: Optional[str] = Depends(get_optional_user_id)):
     """
     Step 3: Full pipeline — Pattern + Behavior + Coach.
     Extract features → detect habits → generate Gemini tips.
     """
     # Step 1: extract features (safe)
-    features = pattern_agent.extract_features(data.password)
+    bits, length, words = pattern_agent.scan(data.password)
+    features = pattern_agent.features_view(bits, length, words)
 
-    # Store for this user
-    if username not in USER_FEATURE_HISTORY:
-        USER_FEATURE_HISTORY[username] = []
-    USER_FEATURE_HISTORY[username].append(features)
+    # Count it for this user (atomic $inc, counters come back in the same round trip);
+    # anonymous callers only get habits from this one password
+    flags = behavior_agent.bits_flags(bits, length)
+    if user_id:
+        counts = await advisor_behavior.record(_key(user_id), flags, behavior_agent.feature_bits(flags),
+                                               ADVISOR_RING_SIZE, ADVISOR_BEHAVIOR_TTL)
+    else:
+        counts = {**flags, "total": 1}
 
     # Step 2: detect habits
-    habits = behavior_agent.detect_habits(USER_FEATURE_HISTORY[username])
+    habits = behavior_agent.detect_habits_from_counts(counts)
 
-    # Step 3: coach advice (use internal Gemini logic directly)
-    tips = coach_agent.gemini_tips(features, habits)
+    # Step 3: coach advice (Gemini call is blocking: keep it off the event loop)
+    tips = await run_in_threadpool(coach_agent.gemini_tips, features, habits)
     note = "We never store or share your password — only safe patterns are analyzed."
 
     output = {"tips": tips, "note": note}
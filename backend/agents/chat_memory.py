@@ -0,0 +1,138 @@
+# backend/agents/chat_memory.py
+"""
+🧠 Chat Memory — per-conversation cache of agent results for the orchestrator.
+- Each chat gets a session id; the session expires after CHAT_SESSION_TTL_SECONDS of inactivity.
+- Guardian / Watchdog results are cached per session, keyed by HMAC(password), so
+  follow-up turns about the same password ("is it breached?", "suggest better")
+  reuse earlier results instead of calling the agents again.
+- Memory is capped globally (CHAT_MEMORY_MAX_ENTRIES results, CHAT_MEMORY_MAX_SESSIONS
+  sessions, empty ones included); the least recently used session is evicted first.
+
+SECURITY: cache keys are HMACs with a process-local key, never the raw password.
+ENV:
+  CHAT_MEMORY_KEY            = optional secret for the HMAC (ephemeral if unset)
+  CHAT_SESSION_TTL_SECONDS   = idle lifetime of a session (default 1800)
+  CHAT_MEMORY_MAX_ENTRIES    = cached results across all sessions (default 5000)
+  CHAT_MEMORY_PER_SESSION    = cached results per session (default 32)
+  CHAT_MEMORY_MAX_SESSIONS   = live sessions (default 10000)
+"""
+
+import os, hmac, hashlib, secrets, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+_KEY = os.getenv("CHAT_MEMORY_KEY", "").encode("utf-8") or os.urandom(32)
+
+SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+MAX_ENTRIES = int(os.getenv("CHAT_MEMORY_MAX_ENTRIES", "5000"))
+MAX_PER_SESSION = int(os.getenv("CHAT_MEMORY_PER_SESSION", "32"))
+MAX_SESSIONS = int(os.getenv("CHAT_MEMORY_MAX_SESSIONS", "10000"))
+
+
+def password_key(password: str) -> str:
+    """HMAC-SHA256 of the password; the only form in which it is used as a key."""
+    return hmac.new(_KEY, password.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+class _Session:
+    __slots__ = ("expires_at", "results")
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+        # (agent, password_key) -> result, most recently used last
+        self.results: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+
+class ChatMemory:
+    """
+    Sessions are kept in LRU order (most recently used last). Every touch
+    slides the session TTL; expired sessions are dropped lazily on access.
+    """
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS,
+                 max_entries: int = MAX_ENTRIES,
+                 max_per_session: int = MAX_PER_SESSION,
+                 max_sessions: int = MAX_SESSIONS):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_per_session = max_per_session
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    # ---------- sessions ----------
+    def open(self, session_id: Optional[str]) -> str:
+        """Return a live session id: the given one if still valid, else a fresh one."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if session_id and session_id in self._sessions:
+                self._touch(session_id, now)
+                return session_id
+            # clients that never send the id back would otherwise pile up empty sessions
+            while len(self._sessions) >= self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+            new_id = secrets.token_urlsafe(16)
+            self._sessions[new_id] = _Session(now + self.ttl)
+            return new_id
+
+    def _touch(self, session_id: str, now: float):
+        self._sessions[session_id].expires_at = now + self.ttl
+        self._sessions.move_to_end(session_id)
+
+    def _drop(self, session_id: str):
+        s = self._sessions.pop(session_id, None)
+        if s is not None:
+            self._size -= len(s.results)
+
+    def _expire(self, now: float):
+        # LRU order is also expiry order, since every touch slides the TTL by the same amount
+        while self._sessions:
+            sid, s = next(iter(self._sessions.items()))
+            if s.expires_at > now:
+                break
+            self._drop(sid)
+
+    # ---------- results ----------
+    def get(self, session_id: str, agent: str, pkey: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is None or s.expires_at <= now:
+                return None
+            hit = s.results.get((agent, pkey))
+            if hit is not None:
+                s.results.move_to_end((agent, pkey))
+                self._touch(session_id, now)
+            return hit
+
+    def put(self, session_id: str, agent: str, pkey: str, result: Dict[str, Any]):
+        now = time.monotonic()
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is None:
+                return
+            if (agent, pkey) not in s.results:
+                self._size += 1
+            s.results[(agent, pkey)] = result
+            s.results.move_to_end((agent, pkey))
+            self._touch(session_id, now)
+
+            while len(s.results) > self.max_per_session:
+                s.results.popitem(last=False)
+                self._size -= 1
+
+            # global cap: evict whole sessions, least recently used first
+            while self._size > self.max_entries and len(self._sessions) > 1:
+                oldest = next(iter(self._sessions))
+                if oldest == session_id:
+                    break
+                self._drop(oldest)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"sessions": len(self._sessions), "entries": self._size}
+
+
+memory = ChatMemory()
@@ -8,6 +8,8 @@ This agent observes multiple password attempts by the same user
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from . import pattern_agent as pa
+
 router = APIRouter()
 
 # ---------- Input / Output Models ----------
@@ -18,38 +20,60 @@ class BehaviorOutput(BaseModel):
     habits: list[str]
 
 # ---------- Main Logic ----------
-def detect_habits(feature_list: list[dict]) -> list[str]:
-    if not feature_list:
-        return ["no_data"]
+# Running counters per user: each password adds 0/1 to every counter and 1 to
+# "total", so habits are a few ratios instead of a rescan of the history.
+HABIT_COUNTERS = ("short", "end_num", "year", "common_word", "no_symbol")
 
-    habits = set()
+# habit -> (counter, share of passwords above which it counts as a habit)
+HABIT_RULES = {
+    "makes_passwords_too_short": ("short", 0.6),
+    "ends_with_numbers": ("end_num", 0.6),
+    "uses_years": ("year", 0.4),
+    "uses_common_words": ("common_word", 0.4),
+    "rarely_uses_symbols": ("no_symbol", 0.6),
+}
 
-    # If most passwords are short
-    short_count = sum(1 for f in feature_list if f["length"] < 8)
-    if short_count / len(feature_list) > 0.6:
-        habits.add("makes_passwords_too_short")
+def feature_flags(f: dict) -> dict:
+    """One password's features -> {counter: 0/1}."""
+    return {
+        "short": int(f["length"] < 8),
+        "end_num": int(bool(f.get("ends_with_numbers"))),
+        "year": int(bool(f.get("contains_year"))),
+        "common_word": int(bool(f.get("common_words"))),
+        "no_symbol": int(not f.get("has_symbol")),
+    }
 
-    # If often ends with numbers
-    end_num_count = sum(1 for f in feature_list if f.get("ends_with_numbers"))
-    if end_num_count / len(feature_list) > 0.6:
-        habits.add("ends_with_numbers")
+def bits_flags(bits: int, length: int) -> dict:
+    """Same as feature_flags, from pattern_agent.scan() output."""
+    return {
+        "short": int(length < 8),
+        "end_num": int(bool(bits & pa.ENDS_WITH_NUMBERS)),
+        "year": int(bool(bits & pa.CONTAINS_YEAR)),
+        "common_word": int(bool(bits & pa.HAS_COMMON_WORD)),
+        "no_symbol": int(not bits & pa.HAS_SYMBOL),
+    }
 
-    # If commonly uses years
-    year_count = sum(1 for f in feature_list if f.get("contains_year"))
-    if year_count / len(feature_list) > 0.4:
-        habits.add("uses_years")
+def feature_bits(flags: dict) -> int:
+    """Counter flags packed into an int (bit i = HABIT_COUNTERS[i])."""
+    return sum(1 << i for i, name in enumerate(HABIT_COUNTERS) if flags.get(name))
 
-    # If uses common words frequently
-    word_count = sum(1 for f in feature_list if f.get("common_words"))
-    if word_count / len(feature_list) > 0.4:
-        habits.add("uses_common_words")
+def fold_counts(feature_list: list[dict]) -> dict:
+    counts = {name: 0 for name in HABIT_COUNTERS}
+    for f in feature_list:
+        for name, v in feature_flags(f).items():
+            counts[name] += v
+    counts["total"] = len(feature_list)
+    return counts
 
-    # If lacks symbols often
-    no_symbol_count = sum(1 for f in feature_list if not f.get("has_symbol"))
-    if no_symbol_count / len(feature_list) > 0.6:
-        habits.add("rarely_uses_symbols")
+def detect_habits_from_counts(counts: dict) -> list[str]:
+    total = (counts or {}).get("total", 0)
+    if not total:
+        return ["no_data"]
+    return sorted(habit for habit, (name, share) in HABIT_RULES.items()
+                  if counts.get(name, 0) / total > share)
 
-    return sorted(list(habits))
+def detect_habits(feature_list: list[dict]) -> list[str]:
+    return detect_habits_from_counts(fold_counts(feature_list))
 
 # ---------- API Endpoint ----------
 @router.post("/analyze-behavior", response_model=BehaviorOutput)
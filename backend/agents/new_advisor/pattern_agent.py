@@ -3,18 +3,46 @@
 🕵️ Pattern Agent
 This agent identifies risky patterns in a given password safely
 without ever storing or exposing the real password.
+
+scan() packs every feature into one int (the HAS_* / CONTAINS_YEAR /
+ENDS_WITH_NUMBERS bits) plus the length and the common words found:
+character classes come from one bytes.translate over the string, the year
+and ends-with-numbers checks are precompiled regexes (a digit before one
+trailing newline still counts, as it always did). extract_features() is the
+dict view of that, unchanged for callers.
+scan_batch() does the same for a list; with NumPy installed and at least
+PATTERN_NUMPY_MIN_BATCH passwords, the ASCII ones are done as array ops over
+their concatenated bytes (others fall back to scan()); NumPy is in
+requirements.txt, and scripts/check_pattern_batch.py checks that this path
+agrees with scan().
+ENV:
+  PATTERN_NUMPY_MIN_BATCH = smallest batch that uses NumPy (default 256)
+  PATTERN_BATCH_MAX       = passwords accepted per batch request (default 1000)
 """
 
-import re
+import os, re
+from typing import List, Tuple
+
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+try:
+    import numpy as np   # optional: only the batch path uses it
+except ImportError:
+    np = None
 
 router = APIRouter()
 
+PATTERN_NUMPY_MIN_BATCH = int(os.getenv("PATTERN_NUMPY_MIN_BATCH", "256"))
+PATTERN_BATCH_MAX = int(os.getenv("PATTERN_BATCH_MAX", "1000"))
+
 # ---------- Input / Output Models ----------
 class PasswordInput(BaseModel):
     password: str
 
+class PasswordBatchInput(BaseModel):
+    passwords: list[str] = Field(..., max_length=PATTERN_BATCH_MAX)
+
 class PatternOutput(BaseModel):
     length: int
     has_upper: bool
@@ -27,23 +55,116 @@ class PatternOutput(BaseModel):
 
 # ---------- Common word list ----------
 COMMON_WORDS = {"password", "laptop", "admin", "user", "qwerty", "welcome", "test"}
+_WORDS = tuple(sorted(COMMON_WORDS))
+
+# ---------- Feature bits ----------
+HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL, CONTAINS_YEAR, ENDS_WITH_NUMBERS, HAS_COMMON_WORD = (
+    1 << i for i in range(7))
+
+_YEAR = re.compile(r"(19|20)\d{2}")
+_END_NUM = re.compile(r"\d$")
+
+def _char_bits(c: str) -> int:
+    return ((HAS_UPPER if c.isupper() else 0) | (HAS_LOWER if c.islower() else 0)
+            | (HAS_DIGIT if c.isdigit() else 0) | (HAS_SYMBOL if not c.isalnum() else 0))
+
+# ASCII byte -> its class bits, so a password's classes are set(pwd.encode().translate(_CLASS))
+_CLASS = bytes(_char_bits(chr(i)) for i in range(128)) + bytes(128)
+
+# ---------- Helper Functions ----------
+def scan(pwd: str) -> Tuple[int, int, List[str]]:
+    """Password -> (feature bits, length, common words found). Nothing is kept."""
+    bits = 0
+    if pwd.isascii():
+        for b in set(pwd.encode().translate(_CLASS)):
+            bits |= b
+    else:
+        for c in set(pwd):
+            bits |= _char_bits(c)
+    if _YEAR.search(pwd):
+        bits |= CONTAINS_YEAR
+    if _END_NUM.search(pwd):
+        bits |= ENDS_WITH_NUMBERS
+    low = pwd.lower()
+    words = [w for w in _WORDS if w in low]
+    if words:
+        bits |= HAS_COMMON_WORD
+    return bits, len(pwd), words
+
+def features_view(bits: int, length: int, words: List[str]) -> dict:
+    return {
+        "length": length,
+        "has_upper": bool(bits & HAS_UPPER),
+        "has_lower": bool(bits & HAS_LOWER),
+        "has_digit": bool(bits & HAS_DIGIT),
+        "has_symbol": bool(bits & HAS_SYMBOL),
+        "contains_year": bool(bits & CONTAINS_YEAR),
+        "ends_with_numbers": bool(bits & ENDS_WITH_NUMBERS),
+        "common_words": words,
+    }
 
-# ---------- Helper Function ----------
 def extract_features(pwd: str) -> dict:
     # Safe feature extraction (no storage, no leaks)
-    features = {
-        "length": len(pwd),
-        "has_upper": any(c.isupper() for c in pwd),
-        "has_lower": any(c.islower() for c in pwd),
-        "has_digit": any(c.isdigit() for c in pwd),
-        "has_symbol": any(not c.isalnum() for c in pwd),
-        "contains_year": bool(re.search(r"(19|20)\d{2}", pwd)),
-        "ends_with_numbers": bool(re.search(r"\d+$", pwd)),
-        "common_words": [w for w in COMMON_WORDS if w.lower() in pwd.lower()],
-    }
-    return features
+    return features_view(*scan(pwd))
+
+def scan_batch(pwds: List[str]) -> List[Tuple[int, int, List[str]]]:
+    if np is None or len(pwds) < PATTERN_NUMPY_MIN_BATCH:
+        return [scan(p) for p in pwds]
+    out: list = [None] * len(pwds)
+    ascii_idx = []
+    for i, p in enumerate(pwds):
+        if p.isascii():
+            ascii_idx.append(i)
+        else:
+            out[i] = scan(p)
+    for i, res in zip(ascii_idx, _scan_ascii_np([pwds[i] for i in ascii_idx])):
+        out[i] = res
+    return out
+
+if np is not None:
+    _CLASS_NP = np.frombuffer(_CLASS, np.uint8)
+    _DIGIT_NP = (_CLASS_NP & HAS_DIGIT).astype(bool)
+    _LOWER_NP = np.frombuffer(bytes(range(128)).lower() + bytes(range(128, 256)), np.uint8)
+    _WORDS_NP = [np.frombuffer(w.encode(), np.uint8) for w in _WORDS]
+
+def _scan_ascii_np(pwds: List[str]) -> List[Tuple[int, int, List[str]]]:
+    """scan() over ASCII passwords as array ops on their concatenated bytes."""
+    n = len(pwds)
+    if not n:
+        return []
+    enc = [p.encode() for p in pwds]
+    lens = np.fromiter(map(len, enc), np.int64, n)
+    flat = np.frombuffer(b"".join(enc), np.uint8)
+    size = flat.size
+    ends = np.cumsum(lens)
+    seg = np.repeat(np.arange(n), lens)   # byte -> password index
+    bits = np.zeros(n, np.int64)
+    nz = lens > 0
+    if size:
+        bits[nz] = np.bitwise_or.reduceat(_CLASS_NP[flat], (ends - lens)[nz])
+        last = ends[nz] - 1
+        last -= (flat[last] == ord("\n")) & (lens[nz] > 1)   # "$" also matches before a final newline
+        bits[nz] |= np.where(_DIGIT_NP[flat[last]], ENDS_WITH_NUMBERS, 0)
+    if size >= 4:
+        a, b = flat[:-3], flat[1:-2]
+        year = ((((a == ord("1")) & (b == ord("9"))) | ((a == ord("2")) & (b == ord("0"))))
+                & _DIGIT_NP[flat[2:-1]] & _DIGIT_NP[flat[3:]] & (seg[:-3] == seg[3:]))
+        bits[np.unique(seg[:-3][year])] |= CONTAINS_YEAR
+    low = _LOWER_NP[flat]
+    words: List[List[str]] = [[] for _ in range(n)]
+    for w, wa in zip(_WORDS, _WORDS_NP):
+        span = size - len(wa) + 1
+        if span <= 0:
+            continue
+        hit = seg[:span] == seg[len(wa) - 1:]   # the match stays inside one password
+        for k, ch in enumerate(wa):
+            hit &= low[k:k + span] == ch
+        for i in np.unique(seg[:span][hit]).tolist():
+            words[i].append(w)
+    bits[np.fromiter(map(bool, words), bool, n)] |= HAS_COMMON_WORD
+    return list(zip(bits.tolist(), lens.tolist(), words))
 
-# ---------- API Endpoint ----------
+# ---------- API Endpoints ----------
 @router.post("/extract-pattern", response_model=PatternOutput)
 def pattern_agent(data: PasswordInput):
     """
@@ -12,18 +12,19 @@
 SECURITY: raw password characters are NEVER sent to Gemini.
 """
 
-from fastapi import APIRouter, HTTPException, Query, Header, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Dict, Optional
 import os, re, hashlib
 import google.generativeai as genai
 from bson import ObjectId
-from datetime import datetime, timezone
 
-from database import db
+from repositories import users, mnemonics
 from . import pattern_agent
-from crypto_utils import encrypt_text, decrypt_text
-from auth_utils import decode_token  # 🆕 for /latest/me
+from crypto_utils import encrypt_raw, decrypt_raw
+from utils.blobs import as_bytes
+from auth_guard import get_current_user  # 🆕 for /latest/me
 
 router = APIRouter()
 
@@ -33,8 +34,6 @@ try:
 except Exception as e:
     print("⚠️ Gemini not configured in story_agent:", e)
 
-MN_COLL = db["mnemonics"]
-MN_COLL.create_index([("userId", 1), ("createdAt", -1)], background=True)
 
 # ---------- Models ----------
 class PreviewIn(BaseModel):
@@ -255,38 +254,23 @@ def generate_story_for_password(pwd: str) -> Dict:
     story = build_story_with_gemini(tokens)
     return {"features": features, "tokens": tokens, "story": story}
 
-def save_for_user(user_id: str, story: str):
-    nonce, ct = encrypt_text(story)
-    MN_COLL.insert_one({
-        "userId": ObjectId(user_id),
-        "nonce": nonce,
-        "ciphertext": ct,
-        "createdAt": datetime.now(timezone.utc),
-        "version": 1,
-    })
-
-def latest_story_for_user(user_id: ObjectId) -> Optional[str]:
-    doc = MN_COLL.find_one({"userId": user_id}, sort=[("createdAt", -1)])
+async def save_for_user(user_id: str, story: str):
+    nonce, ct = encrypt_raw(story)
+    await mnemonics.insert_story(ObjectId(user_id), nonce, ct)
+
+async def latest_story_for_user(user_id: ObjectId) -> Optional[str]:
+    doc = await mnemonics.latest_for_user(user_id)
     if not doc:
         return None
     try:
-        return decrypt_text(doc["nonce"], doc["ciphertext"])
+        # enc_v 2 stores bytes, older stories base64 text
+        return decrypt_raw(as_bytes(doc["nonce"]), as_bytes(doc["ciphertext"]))
     except Exception:
         return None
 
 # ---------- auth helper for /latest/me  🆕 ----------
-def _current_user_id(authorization: str = Header(default=None)) -> ObjectId:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing Bearer token")
-    token = authorization.split(" ", 1)[1]
-    claims = decode_token(token)
-    if not claims or "sub" not in claims:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    uid = ObjectId(claims["sub"])
-    exists = db.users.find_one({"_id": uid}, {"_id": 1})
-    if not exists:
-        raise HTTPException(status_code=401, detail="User not found")
-    return uid
+async def _current_user_id(current: dict = Depends(get_current_user)) -> ObjectId:
+    return ObjectId(current["id"])
 
 # ---------- API endpoints ----------
 @router.post("/preview")
@@ -295,14 +279,14 @@ def preview(data: PreviewIn):
     return {"tokens": out["tokens"], "story": out["story"]}
 
 @router.post("/save")
-def save_story(data: SaveIn):
-    oid = _resolve_user_id_from_any(data.user_id, data.username, str(data.email) if data.email else None)
-    out = generate_story_for_password(data.password)
-    save_for_user(str(oid), out["story"])
+async def save_story(data: SaveIn):
+    oid = await _resolve_user_id_from_any(data.user_id, data.username, str(data.email) if data.email else None)
+    out = await run_in_threadpool(generate_story_for_password, data.password)   # Gemini call blocks
+    await save_for_user(str(oid), out["story"])
     return {"ok": True, "story": out["story"]}
 
 @router.get("/latest", response_model=LatestOut)
-def latest(username: Optional[str] = Query(default=None),
+async def latest(username: Optional[str] = Query(default=None),
            email: Optional[EmailStr] = Query(default=None)):
     if not username and not email:
         raise HTTPException(status_code=400, detail="Provide username or email")
@@ -310,48 +294,48 @@ def latest(username: Optional[str] = Query(default=None),
         q = {"email": str(email).lower()}
     else:
         q = {"username": username.strip()}
-    user = db.users.find_one(q, {"_id": 1})
+    user = await users.find_one(q, {"_id": 1})
     if not user:
         return {"story": None}
-    story = latest_story_for_user(user["_id"])
+    story = await latest_story_for_user(user["_id"])
     return {"story": story}
 
 @router.get("/latest/me", response_model=LatestOut)  # 🆕 logged-in user's latest story
-def latest_me(user_id: ObjectId = Depends(_current_user_id)):
-    story = latest_story_for_user(user_id)
+async def latest_me(user_id: ObjectId = Depends(_current_user_id)):
+    story = await latest_story_for_user(user_id)
     return {"story": story}
 
 @router.get("/user-exists")
-def user_exists(username: Optional[str] = Query(default=None),
+async def user_exists(username: Optional[str] = Query(default=None),
                 email: Optional[EmailStr] = Query(default=None)):
     if email:
         e = str(email).lower()
-        return {"exists": db.users.count_documents({"email": e}) > 0, "by": "email"}
+        return {"exists": await users.exists({"email": e}), "by": "email"}
     if username:
         u = username.strip()
-        return {"exists": db.users.count_documents({"username": u}) > 0, "by": "username"}
+        return {"exists": await users.exists({"username": u}), "by": "username"}
     raise HTTPException(status_code=400, detail="Provide username or email")
 
 # ---------- user resolver ----------
-def _resolve_user_id_from_any(user_id: Optional[str], username: Optional[str], email: Optional[str]) -> ObjectId:
+async def _resolve_user_id_from_any(user_id: Optional[str], username: Optional[str], email: Optional[str]) -> ObjectId:
     if user_id:
         try:
             oid = ObjectId(user_id)
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid user_id")
-        user = db.users.find_one({"_id": oid}, {"_id": 1})
+        user = await users.by_id(oid, {"_id": 1})
         if not user:
             raise HTTPException(status_code=404, detail="User not found (user_id)")
         return user["_id"]
     if username:
         u = username.strip()
-        user = db.users.find_one({"username": u}, {"_id": 1})
+        user = await users.find_one({"username": u}, {"_id": 1})
         if not user:
             raise HTTPException(status_code=404, detail="User not found (username)")
         return user["_id"]
     if email:
         e = email.strip().lower()
-        user = db.users.find_one({"email": e}, {"_id": 1})
+        user = await users.find_one({"email": e}, {"_id": 1})
         if not user:
             raise HTTPException(status_code=404, detail="User not found (email)")
         return user["_id"]
@@ -4,6 +4,8 @@ from pydantic import BaseModel, Field
 import re, asyncio, httpx
 from typing import Optional, Literal, Dict, Any
 
+from agents.chat_memory import memory, password_key
+
 router = APIRouter()
 
 
@@ -20,11 +22,14 @@ class ChatIn(BaseModel):
     symbols: Optional[bool] = None
     language: Optional[str] = None  # e.g., "si", "ta", "en"
     mode: Optional[Literal["deterministic","llm","multilingual"]] = None
+    # Conversation id from a previous reply; follow-ups reuse cached agent results
+    session_id: Optional[str] = None
 
 class ChatOut(BaseModel):
     chat: str
     ui: Dict[str, Any] = {}
     warnings: list[str] = []
+    session_id: Optional[str] = None
 
 
 # Simple NLU
@@ -226,6 +231,10 @@ async def orchestrator_chat(body: ChatIn) -> ChatOut:
         gen_mode = body.mode or ("llm" if body.plan in ("premium","enterprise") else "deterministic")
 
 
+    # conversation memory (results keyed by HMAC of the password)
+    session_id = memory.open(body.session_id)
+    pkey = password_key(password) if password else None
+
     # fan out calls
     degraded = []
     guardian_res = None
@@ -235,16 +244,26 @@ async def orchestrator_chat(body: ChatIn) -> ChatOut:
     async def maybe_guardian():
         nonlocal guardian_res
         if run_analyze:
+            guardian_res = memory.get(session_id, "guardian", pkey)
+            if guardian_res is not None:
+                return
             try:
                 guardian_res = await call_guardian(password)  # expects {"score":..., ...}
+                # the guardian echoes the password back; keep it out of memory
+                memory.put(session_id, "guardian", pkey,
+                           {k: v for k, v in guardian_res.items() if k != "password"})
             except Exception:
                 degraded.append("guardian")
 
     async def maybe_watchdog():
         nonlocal watchdog_res
         if run_breach:
+            watchdog_res = memory.get(session_id, "watchdog", pkey)
+            if watchdog_res is not None:
+                return
             try:
                 watchdog_res = await call_watchdog(password)  # expects {"breached": bool, "count": int}
+                memory.put(session_id, "watchdog", pkey, watchdog_res)
             except Exception:
                 degraded.append("watchdog")
 
@@ -278,4 +297,6 @@ async def orchestrator_chat(body: ChatIn) -> ChatOut:
     # you can auto-generate suggestions for premium. (Optional enhancement)
     # Example: if guardian_res and guardian_res.get("score", 0) < 3 and body.plan != "normal": ...
 
-    return compose_reply(password, guardian_res, watchdog_res, generator_res, body.plan, degraded)
+    reply = compose_reply(password, guardian_res, watchdog_res, generator_res, body.plan, degraded)
+    reply.session_id = session_id
+    return reply
@@ -1,33 +1,177 @@
 # backend/auth_guard.py
+"""
+🔑 Unified auth dependency used by every router.
+- Decodes the Bearer JWT and resolves the user *principal*
+  (id, username, status, premium_until + profile basics).
+- Principals are cached in-process for PRINCIPAL_CACHE_TTL_SECONDS, so an
+  authenticated request skips the users lookup on a cache hit.
+- Any write that changes a principal must call invalidate_principal(user_id);
+  vault writes use set_vault_version() to advance the cached vault_version in place
+  (published only when it moved forward); reads use note_vault_version() (local only).
+- Multi-worker deployments can plug a cross-worker channel in with
+  set_invalidation_channel() (e.g. Redis pub/sub or a Mongo change stream).
+- Revoked tokens (logout / revoke-all) are rejected via the in-memory denylist.
+"""
+
+import os, threading
+from typing import Callable, Optional
+
+from bson import ObjectId
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from bson import ObjectId
-import os
 
-from database import db
+from auth_utils import decode_token, parse_premium_until
+from repositories import users
+from token_revocation import is_revoked
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX = int(os.getenv("PRINCIPAL_CACHE_MAX", "10000"))
 
-# JWT setup
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
-JWT_ALG = os.getenv("JWT_ALG", "HS256")
+# Only what the routers need; never the password hash
+_PRINCIPAL_FIELDS = {"username": 1, "email": 1, "name": 1, "phone": 1, "status": 1, "premium_until": 1,
+                     "vault_version": 1}
 
+_cache: TTLCache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+_lock = threading.Lock()
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+
+# ---------- cross-worker invalidation ----------
+class InvalidationChannel:
     """
-    Decode JWT and return current user record.
-    Allows both normal and premium users.
+    Fan-out of principal invalidations to other workers.
+    The default only covers this process; subclass and override both methods
+    to broadcast (publish) and to receive remote invalidations (subscribe).
+    """
+
+    def publish(self, user_id: str) -> None:
+        pass
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        pass
+
+
+_channel: InvalidationChannel = InvalidationChannel()
+
+
+def _evict_local(user_id: str):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def set_invalidation_channel(channel: InvalidationChannel):
+    global _channel
+    _channel = channel
+    channel.subscribe(_evict_local)
+
+
+def invalidate_principal(user_id) -> None:
+    """Drop a cached principal here and on every other worker."""
+    uid = str(user_id)
+    _evict_local(uid)
+    _channel.publish(uid)
+
+
+def note_vault_version(user_id, version: int) -> bool:
+    """
+    Advance vault_version in the cached principal on this worker only (no publish).
+    False if the cached copy already had this version or a newer one.
     """
+    uid = str(user_id)
+    with _lock:
+        hit = _cache.get(uid)
+        if hit is None:
+            return True
+        if hit.get("vault_version", 0) >= version:
+            return False
+        _cache[uid] = {**hit, "vault_version": version}
+        return True
+
+
+def set_vault_version(user_id, version: int) -> None:
+    """After a vault write: advance vault_version here and, if it moved forward, make other workers reload."""
+    if note_vault_version(user_id, version):
+        _channel.publish(str(user_id))
+
+
+# ---------- principal loading ----------
+def _to_principal(user: dict) -> dict:
+    return {
+        "id": str(user["_id"]),
+        "username": user.get("username"),
+        "status": user.get("status", "normal"),
+        "premium_until": parse_premium_until(user.get("premium_until")),
+        "name": user.get("name"),
+        "email": user.get("email"),
+        "phone": user.get("phone"),
+        "vault_version": int(user.get("vault_version", 0)),
+    }
+
+
+async def load_principal(user_id: str) -> Optional[dict]:
+    """Cached principal for a user id, or None if the user does not exist."""
+    with _lock:
+        hit = _cache.get(user_id)
+    if hit is not None:
+        return hit
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
-        user_id = payload.get("sub") or payload.get("_id") or payload.get("user_id")
-        if not user_id:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing sub")
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-    user = db["users"].find_one({"_id": ObjectId(user_id)})
+        oid = ObjectId(user_id)
+    except Exception:
+        return None
+    user = await users.by_id(oid, _PRINCIPAL_FIELDS)
     if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        return None
+    principal = _to_principal(user)
+    with _lock:
+        _cache[user_id] = principal
+    return principal
+
+
+def claims_from_token(token: Optional[str]) -> dict:
+    """Verified JWT claims with a guaranteed 'sub', or 401."""
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing Bearer token")
+    claims = decode_token(token)
+    if not claims:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    user_id = claims.get("sub") or claims.get("_id") or claims.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing sub")
+    claims["sub"] = str(user_id)
+    if is_revoked(claims):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    return claims
+
+
+def user_id_from_token(token: Optional[str]) -> str:
+    return claims_from_token(token)["sub"]
 
-    return {"_id": str(user["_id"]), "email": user.get("email"), "status": user.get("status", "normal")}
+
+# ---------- dependencies ----------
+def get_current_claims(token: Optional[str] = Depends(oauth2_scheme)) -> dict:
+    """Verified, non-revoked claims of the bearer token (no user lookup)."""
+    return claims_from_token(token)
+
+
+def get_optional_user_id(token: Optional[str] = Depends(oauth2_scheme)) -> Optional[str]:
+    """User id of a valid bearer token, or None for anonymous / invalid tokens (no user lookup)."""
+    if not token:
+        return None
+    try:
+        return user_id_from_token(token)
+    except HTTPException:
+        return None
+
+
+async def get_current_user(token: Optional[str] = Depends(oauth2_scheme)) -> dict:
+    """
+    Returns the current principal:
+      { "id", "username", "status", "premium_until", "name", "email", "phone", "vault_version" }
+    Allows both normal and premium users.
+    """
+    principal = await load_principal(user_id_from_token(token))
+    if not principal:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return principal
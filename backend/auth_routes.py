@@ -8,70 +8,44 @@
 - PUT /auth/edit-profile supports updating username (unique), name, email, phone.
 - POST /auth/upgrade and PUT /auth/upgrade-to-premium set current user to 'premium'.
 - 🆕 DELETE /auth/delete-account removes the user and their related records.
+- Current user comes from auth_guard (cached principal); profile/plan writes invalidate it.
+- Credentials are checked with a single verify; legacy hashes are classified offline by
+  scripts/migrate_password_hashes.py and only flagged accounts (needs_rehash) are rehashed.
+- Password hashing runs on the dedicated KDF pool (kdf_pool).
+- All routes are async and reach Mongo through repositories (async driver); only the
+  blocking Gemini story call still goes to the threadpool.
+- login / change-password are throttled per IP and per account before any lookup (rate_limit).
+- Login returns a short-lived access token + a refresh token; POST /auth/refresh rotates it.
+  POST /auth/device gives another client (browser extension) its own refresh family.
+- POST /auth/logout revokes the current token; POST /auth/revoke-all signs out every session.
+  change-password and delete-account revoke all existing tokens as well.
 """
 
-from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from pydantic import BaseModel, EmailStr
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, EmailStr, Field
 from bson import ObjectId
 from typing import Optional
 
-from database import db
-from auth_utils import hash_password, verify_password, create_access_token, decode_token
-from passlib.context import CryptContext
-from passlib.exc import UnknownHashError
+from repositories import users, mnemonics, vault_reports
+from auth_utils import hash_password, verify_any, create_access_token, access_claims_for, CURRENT_SCHEME
+from kdf_pool import run_kdf
+from rate_limit import check_credentials
 from pymongo.errors import DuplicateKeyError
 
+from auth_guard import get_current_user, get_current_claims, invalidate_principal
+from refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_user_refresh_tokens, revoke_refresh_token
+from token_revocation import revoke_token, revoke_all_for_user
+
 from agents.new_advisor import pattern_agent, coach_agent
 from agents.new_advisor import story_agent  # story generator/saver
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# ---------- index helper ----------
-def _ensure_unique_index(collection, field: str, name: str):
-    try:
-        existing = list(collection.list_indexes())
-        for idx in existing:
-            keys = idx.get("key", {})
-            if list(keys.keys()) == [field]:
-                if idx.get("unique", False):
-                    return
-                print(f"⚠️ Existing index on '{field}' is not unique. Consider fixing manually.")
-                return
-        collection.create_index([(field, 1)], name=name, unique=True, background=True)
-    except Exception as e:
-        msg = str(e)
-        if "IndexOptionsConflict" in msg or "already exists" in msg:
-            return
-        print(f"⚠️ ensure_unique_index('{field}') error:", e)
-
-_ensure_unique_index(db.users, "username", name="uniq_username")
-_ensure_unique_index(db.users, "email",    name="uniq_email")
-
-# ---------- helpers ----------
-def get_current_user(authorization: str = Header(default=None)):
-    """
-    Returns:
-      { "id": str(ObjectId), "username": ..., "status": ..., "name": ..., "email": ..., "phone": ... }
-    NOTE: id key is 'id'.
-    """
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing Bearer token")
-    token = authorization.split(" ", 1)[1]
-    claims = decode_token(token)
-    if not claims:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user = db.users.find_one({"_id": ObjectId(claims["sub"])})
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return {
-        "id": str(user["_id"]),
-        "username": user["username"],
-        "status": user.get("status", "normal"),
-        "name": user.get("name"),
-        "email": user.get("email"),
-        "phone": user.get("phone"),
-    }
+# what login needs from the user document (token claims + credential check)
+_LOGIN_FIELDS = {"username": 1, "name": 1, "status": 1, "premium_until": 1,
+                 "password_hash": 1, "needs_rehash": 1}
 
 # ---------- models ----------
 class RegisterInput(BaseModel):
@@ -94,155 +68,172 @@ class EditProfileInput(BaseModel):
     phone: Optional[str] = ""
     username: str  # editable & unique
 
+class RefreshInput(BaseModel):
+    refresh_token: str
+    device_id: Optional[str] = Field(None, max_length=128)   # random per client; unlocks the reuse grace window
+
+class LogoutInput(BaseModel):
+    refresh_token: Optional[str] = None
+
 # 🆕 Optional payload for delete (current password verification)
 class DeleteAccountInput(BaseModel):
     current_password: Optional[str] = None
 
 # ---------- routes ----------
 @router.post("/register")
-def register_user(data: RegisterInput):
+async def register_user(data: RegisterInput):
     if data.password != data.confirm_password:
         raise HTTPException(status_code=400, detail="Passwords do not match ❌")
 
     email_lc = str(data.email).strip().lower()
     username = data.username.strip()
 
-    if db.users.find_one({"username": username}):
+    if await users.exists({"username": username}):
         raise HTTPException(status_code=400, detail="Username already exists")
-    if db.users.find_one({"email": email_lc}):
+    if await users.exists({"email": email_lc}):
         raise HTTPException(status_code=400, detail="Email already exists")
 
     features = pattern_agent.extract_features(data.password)
     tips = coach_agent.rule_based_tips(features, habits=[])
 
-    hashed = hash_password(data.password)
+    hashed = await run_kdf(hash_password, data.password, op="hash")
     doc = {
         "name": data.name.strip(),
         "email": email_lc,
         "phone": data.phone.strip(),
         "username": username,
         "password_hash": hashed,
+        "hash_scheme": CURRENT_SCHEME,
         "status": "normal",
+        "vault_count": 0,
     }
     try:
-        res = db.users.insert_one(doc)
+        inserted_id = await users.insert(doc)
     except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Username or Email already exists")
 
-    user_id = str(res.inserted_id)
+    user_id = str(inserted_id)
 
     try:
-        out = story_agent.generate_story_for_password(data.password)
-        story_agent.save_for_user(user_id, out["story"])
+        out = await run_in_threadpool(story_agent.generate_story_for_password, data.password)
+        await story_agent.save_for_user(user_id, out["story"])
     except Exception as e:
         print("⚠️ Story generation failed on register:", e)
 
     return {"message": "User registered successfully ✅", "user_id": user_id, "password_tips": tips}
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     """
     OAuth2 'username' accepts username OR email. Email matched lowercase.
     """
     identifier = form_data.username.strip()
-    query = {"email": identifier.lower()} if "@" in identifier else {"username": identifier}
-    user = db.users.find_one(query)
+    await check_credentials("login", request, identifier)
+    user = await users.by_identifier(identifier, _LOGIN_FIELDS)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    stored_hash = user.get("password_hash", "")
-    ok = False
-    try:
-        if stored_hash:
-            ok = verify_password(form_data.password, stored_hash)
-    except UnknownHashError:
-        ok = False
-    except Exception:
-        ok = False
+    ok = await run_kdf(verify_any, form_data.password, user.get("password_hash", ""), op="verify")
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not ok and stored_hash:
+    # upgrade hashes the migration flagged (bcrypt / outdated pbkdf2 rounds)
+    if user.get("needs_rehash"):
         try:
-            legacy_ctx = CryptContext(schemes=["pbkdf2_sha256","bcrypt","bcrypt_sha256"], deprecated="auto")
-            ok = legacy_ctx.verify(form_data.password, stored_hash)
+            new_hash = await run_kdf(hash_password, form_data.password, op="hash")
+            await users.update(user["_id"], {
+                "$set": {"password_hash": new_hash, "hash_scheme": CURRENT_SCHEME},
+                "$unset": {"needs_rehash": ""},
+            })
         except Exception:
-            ok = False
+            pass  # pool busy or write failed: retry on a later login
 
-    if not ok and "password" in user:
-        ok = (form_data.password == user["password"])
+    token = create_access_token(access_claims_for(user))
+    refresh = await issue_refresh_token(user["_id"])
 
-    if not ok:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    return {"access_token": token, "refresh_token": refresh, "token_type": "bearer",
+            "status": user.get("status", "normal"), "username": user["username"], "name": user.get("name")}
 
-    # migrate to current hash if needed
-    try:
-        new_hash = hash_password(form_data.password)
-        ops = {"$set": {"password_hash": new_hash}}
-        if "password" in user:
-            ops["$unset"] = {"password": ""}
-        db.users.update_one({"_id": user["_id"]}, ops)
-    except Exception:
-        pass
+@router.post("/refresh")
+async def refresh(body: RefreshInput):
+    """
+    Rotate a refresh token: returns a new access token (with current plan claims)
+    and the next refresh token of the same family.
+    """
+    rotated = await rotate_refresh_token(body.refresh_token, body.device_id)
+    if not rotated:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    uid, next_refresh = rotated
 
-    token = create_access_token({
-        "sub": str(user["_id"]),
-        "username": user["username"],
-        "status": user.get("status", "normal"),
-    })
+    user = await users.by_id(uid, {"username": 1, "status": 1, "premium_until": 1, "name": 1})
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
 
-    return {"access_token": token, "token_type": "bearer", "status": user.get("status", "normal"),
-            "username": user["username"], "name": user.get("name")}
+    token = create_access_token(access_claims_for(user))
+    return {"access_token": token, "refresh_token": next_refresh, "token_type": "bearer",
+            "status": user.get("status", "normal"), "username": user["username"], "name": user.get("name")}
+
+@router.post("/device")
+async def device_tokens(current = Depends(get_current_user)):
+    """
+    Access + refresh token for another client of the same account (e.g. the browser
+    extension). A new refresh family, so it never races the caller's own rotation.
+    """
+    token = create_access_token(access_claims_for({"_id": ObjectId(current["id"]), **current}))
+    refresh = await issue_refresh_token(current["id"])
+    return {"access_token": token, "refresh_token": refresh, "token_type": "bearer"}
+
+@router.post("/logout")
+async def logout(body: LogoutInput = LogoutInput(), claims = Depends(get_current_claims)):
+    """Revoke the presented access token (and the refresh token's family, if given)."""
+    await revoke_token(claims)
+    if body and body.refresh_token:
+        await revoke_refresh_token(body.refresh_token)
+    return {"ok": True}
+
+@router.post("/revoke-all")
+async def revoke_all(claims = Depends(get_current_claims)):
+    """Sign out everywhere: all access tokens issued so far + all refresh tokens."""
+    await revoke_all_for_user(claims["sub"])
+    await revoke_user_refresh_tokens(claims["sub"])
+    return {"ok": True}
 
 @router.get("/me")
-def me(current = Depends(get_current_user)):
+async def me(current = Depends(get_current_user)):
     return {"ok": True, "user": current}
 
 @router.put("/change-password")
-def change_password(body: ChangePasswordInput, current = Depends(get_current_user)):
-    user = db.users.find_one({"_id": ObjectId(current["id"])})
+async def change_password(body: ChangePasswordInput, request: Request, claims = Depends(get_current_claims)):
+    await check_credentials("change_password", request, claims["sub"])
+    user = await users.by_id(ObjectId(claims["sub"]), _LOGIN_FIELDS)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    stored_hash = user.get("password_hash", "")
-    ok = False
-    try:
-        if stored_hash:
-            ok = verify_password(body.current_password, stored_hash)
-    except UnknownHashError:
-        ok = False
-    except Exception:
-        ok = False
-
-    if not ok and stored_hash:
-        try:
-            legacy_ctx = CryptContext(schemes=["pbkdf2_sha256","bcrypt","bcrypt_sha256"], deprecated="auto")
-            ok = legacy_ctx.verify(body.current_password, stored_hash)
-        except Exception:
-            ok = False
-
-    if not ok and "password" in user:
-        ok = (body.current_password == user["password"])
-
+    ok = await run_kdf(verify_any, body.current_password, user.get("password_hash", ""), op="verify")
     if not ok:
         raise HTTPException(status_code=401, detail="Current password is incorrect")
 
     if body.new_password != body.confirm_password:
         raise HTTPException(status_code=400, detail="New passwords do not match ❌")
 
-    try:
-        if stored_hash and verify_password(body.new_password, stored_hash):
-            raise HTTPException(status_code=400, detail="New password must be different from the current password")
-    except Exception:
-        pass
+    if body.new_password == body.current_password:
+        raise HTTPException(status_code=400, detail="New password must be different from the current password")
+
+    new_hash = await run_kdf(hash_password, body.new_password, op="hash")
+    await users.update(user["_id"], {
+        "$set": {"password_hash": new_hash, "hash_scheme": CURRENT_SCHEME},
+        "$unset": {"needs_rehash": ""},
+    })
 
-    new_hash = hash_password(body.new_password)
-    update_ops = {"$set": {"password_hash": new_hash}}
-    if "password" in user:
-        update_ops["$unset"] = {"password": ""}
-    db.users.update_one({"_id": user["_id"]}, update_ops)
+    # sign out every other session; this one continues on fresh tokens
+    cutoff = await revoke_all_for_user(user["_id"])
+    await revoke_user_refresh_tokens(user["_id"])
+    token = create_access_token(access_claims_for(user), issued_after_ms=cutoff)
+    refresh = await issue_refresh_token(user["_id"])
 
     try:
-        out = story_agent.generate_story_for_password(body.new_password)
-        story_agent.save_for_user(current["id"], out["story"])
+        out = await run_in_threadpool(story_agent.generate_story_for_password, body.new_password)
+        await story_agent.save_for_user(claims["sub"], out["story"])
     except Exception as e:
         print("⚠️ Story generation failed on change-password:", e)
 
@@ -250,14 +241,12 @@ def change_password(body: ChangePasswordInput, current = Depends(get_current_use
     tips = coach_agent.rule_based_tips(features, habits=[])
 
     return {"message": "Password updated successfully ✅", "features": features, "tips": tips,
-            "note": "We analyzed only safe patterns — never your real password."}
+            "note": "We analyzed only safe patterns — never your real password.",
+            "access_token": token, "refresh_token": refresh}
 
 @router.put("/edit-profile")
-def edit_profile(body: EditProfileInput, current = Depends(get_current_user)):
+async def edit_profile(body: EditProfileInput, current = Depends(get_current_user)):
     uid = ObjectId(current["id"])
-    user = db.users.find_one({"_id": uid})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
     name = body.name.strip()
     email_lc = str(body.email).strip().lower()
@@ -267,20 +256,23 @@ def edit_profile(body: EditProfileInput, current = Depends(get_current_user)):
     if not username:
         raise HTTPException(status_code=400, detail="Username cannot be empty")
 
-    if email_lc != (user.get("email") or "").lower():
-        if db.users.find_one({"email": email_lc, "_id": {"$ne": uid}}):
+    if email_lc != (current.get("email") or "").lower():
+        if await users.exists({"email": email_lc, "_id": {"$ne": uid}}):
             raise HTTPException(status_code=400, detail="Email already in use")
 
-    if username != user.get("username"):
-        if db.users.find_one({"username": username, "_id": {"$ne": uid}}):
+    if username != current.get("username"):
+        if await users.exists({"username": username, "_id": {"$ne": uid}}):
             raise HTTPException(status_code=400, detail="Username already in use")
 
-    db.users.update_one(
-        {"_id": uid},
-        {"$set": {"name": name, "email": email_lc, "phone": phone, "username": username}}
+    updated = await users.update_and_get(
+        uid,
+        {"$set": {"name": name, "email": email_lc, "phone": phone, "username": username}},
+        projection={"password_hash": 0},
     )
+    invalidate_principal(uid)
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    updated = db.users.find_one({"_id": uid}, {"password_hash": 0})
     return {
         "ok": True,
         "user": {
@@ -295,58 +287,63 @@ def edit_profile(body: EditProfileInput, current = Depends(get_current_user)):
     }
 
 # ---------- PREMIUM UPGRADE ----------
-def _upgrade_user_to_premium(current):
+async def _upgrade_user_to_premium(current):
     uid = ObjectId(current["id"])
-    res = db.users.update_one({"_id": uid}, {"$set": {"status": "premium"}})
-    if res.matched_count == 0:
+    user = await users.update_and_get(
+        uid,
+        {"$set": {"status": "premium"}},
+        projection={"username": 1, "status": 1, "premium_until": 1},
+    )
+    invalidate_principal(uid)
+    if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user = db.users.find_one({"_id": uid})
-    token = create_access_token({
-        "sub": str(user["_id"]),
-        "username": user["username"],
-        "status": user.get("status", "premium"),
-    })
+    token = create_access_token(access_claims_for(user))
     return {"ok": True, "status": user.get("status", "premium"), "access_token": token}
 
 @router.post("/upgrade")
-def upgrade_post(current = Depends(get_current_user)):
-    return _upgrade_user_to_premium(current)
+async def upgrade_post(current = Depends(get_current_user)):
+    return await _upgrade_user_to_premium(current)
 
 @router.put("/upgrade-to-premium")
-def upgrade_put_alias(current = Depends(get_current_user)):
-    return _upgrade_user_to_premium(current)
+async def upgrade_put_alias(current = Depends(get_current_user)):
+    return await _upgrade_user_to_premium(current)
 
 # ---------- 🆕 DELETE ACCOUNT ----------
 @router.delete("/delete-account")
-def delete_account(body: DeleteAccountInput = DeleteAccountInput(), current = Depends(get_current_user)):
+async def delete_account(body: DeleteAccountInput = DeleteAccountInput(), current = Depends(get_current_user)):
     """
     Deletes the current user's account and related data.
     - If current_password is provided, verify it before deleting.
     - Removes user record and story mnemonics. (Extend here if you have more user-linked collections.)
     """
     uid = ObjectId(current["id"])
-    user = db.users.find_one({"_id": uid})
+    user = await users.by_id(uid, {"password_hash": 1})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Optional current password verification (recommended if your UI asks for it)
     if body and body.current_password:
-        stored_hash = user.get("password_hash", "")
-        ok = False
-        try:
-            if stored_hash:
-                ok = verify_password(body.current_password, stored_hash)
-        except Exception:
-            ok = False
-        if not ok and "password" in user:
-            ok = (body.current_password == user["password"])
+        ok = await run_kdf(verify_any, body.current_password, user.get("password_hash", ""), op="verify")
         if not ok:
             raise HTTPException(status_code=401, detail="Current password is incorrect")
 
+    await _delete_user_records(uid)
+    return {"ok": True, "message": "Account deleted permanently"}
+
+async def _delete_user_records(uid: ObjectId):
     # Delete related records (mnemonics etc.)
     try:
-        db["mnemonics"].delete_many({"userId": uid})
+        await mnemonics.delete_for_user(uid)
+    except Exception:
+        pass
+    try:
+        await vault_reports.delete(uid)
+    except Exception:
+        pass
+    try:
+        await revoke_user_refresh_tokens(uid)
+        await revoke_all_for_user(uid)
     except Exception:
         pass
 
@@ -355,6 +352,5 @@ def delete_account(body: DeleteAccountInput = DeleteAccountInput(), current = De
     # try: db["sessions"].delete_many({"userId": uid}) except: pass
 
     # Finally, delete user
-    db.users.delete_one({"_id": uid})
-
-    return {"ok": True, "message": "Account deleted permanently"}
+    await users.delete(uid)
+    invalidate_principal(uid)
@@ -1,17 +1,28 @@
 # backend/auth_utils.py
 from datetime import datetime, timedelta, timezone
-import os
+import os, hashlib, secrets, threading, time
+from typing import Optional
+from cachetools import TLRUCache
 from jose import jwt, JWTError
 from passlib.context import CryptContext
+from passlib.hash import pbkdf2_sha256
 from dotenv import load_dotenv
 
 load_dotenv()
 
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
 JWT_ALGO = os.getenv("JWT_ALGO", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+# Short-lived: plan claims are trusted without a DB hit until the next refresh
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "5"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+VERIFIED_TOKEN_CACHE_MAX = int(os.getenv("VERIFIED_TOKEN_CACHE_MAX", "20000"))
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+CURRENT_SCHEME = "pbkdf2_sha256"
+# min_rounds makes needs_update() flag hashes made with fewer rounds than today's default
+pwd_context = CryptContext(schemes=[CURRENT_SCHEME], deprecated="auto",
+                           pbkdf2_sha256__min_rounds=pbkdf2_sha256.default_rounds)
+# Older accounts may still carry bcrypt hashes; built once, not per login attempt
+legacy_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt", "bcrypt_sha256"], deprecated="auto")
 
 # -------- Password Hashing --------
 def hash_password(plain: str) -> str:
@@ -20,16 +31,88 @@ def hash_password(plain: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+def verify_any(plain: str, hashed: str) -> bool:
+    """
+    One KDF run: the hash prefix picks the context that owns it (current or
+    legacy bcrypt). Whether to rehash afterwards is decided offline by
+    scripts/migrate_password_hashes.py, which flags accounts with needs_rehash.
+    """
+    if not hashed:
+        return False
+    ctx = pwd_context if pwd_context.identify(hashed, required=False) else legacy_context
+    try:
+        return ctx.verify(plain, hashed)
+    except Exception:
+        return False
+
+def classify_hash(hashed: str | None) -> str:
+    """Scheme label used by the migration: current / stale pbkdf2, bcrypt variants, unknown, missing."""
+    if not hashed:
+        return "missing"
+    if pwd_context.identify(hashed, required=False):
+        return "pbkdf2_sha256_stale" if pwd_context.needs_update(hashed) else CURRENT_SCHEME
+    return legacy_context.identify(hashed, required=False) or "unknown"
+
 # -------- JWT --------
-def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
+def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES,
+                        issued_after_ms: Optional[int] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=expires_minutes)
+    # jti/iat let a single token or everything issued up to a cutoff be revoked;
+    # iat is whole seconds, so the cutoff compares iat_ms (milliseconds).
+    # issued_after_ms: a revoke-all cutoff this token must survive (same millisecond included)
+    iat_ms = int(now.timestamp() * 1000)
+    if issued_after_ms is not None:
+        iat_ms = max(iat_ms, issued_after_ms + 1)
+    to_encode.update({"exp": expire, "iat": now, "iat_ms": iat_ms, "jti": secrets.token_hex(8)})
     token = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGO)
     return token
 
+def parse_premium_until(value) -> datetime | None:
+    """premium_until may be stored as datetime or ISO string; return aware UTC datetime or None."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except Exception:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def access_claims_for(user: dict) -> dict:
+    """Claims carried by an access token: identity + plan ('status') + plan expiry ('pu', epoch seconds)."""
+    premium_until = parse_premium_until(user.get("premium_until"))
+    return {
+        "sub": str(user["_id"]),
+        "username": user.get("username"),
+        "status": user.get("status", "normal"),
+        "pu": int(premium_until.timestamp()) if premium_until else None,
+    }
+
+# -------- Verified-token cache --------
+# token digest -> verified claims; each entry lives until the token's own exp,
+# so repeat requests with the same bearer skip parsing + HMAC verification.
+_verified = TLRUCache(
+    maxsize=VERIFIED_TOKEN_CACHE_MAX,
+    ttu=lambda _key, claims, _now: claims.get("exp", 0),
+    timer=time.time,
+)
+_verified_lock = threading.Lock()
+
 def decode_token(token: str) -> dict | None:
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    with _verified_lock:
+        hit = _verified.get(key)
+    if hit is not None:
+        return dict(hit)
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
     except JWTError:
         return None
+    if isinstance(claims.get("exp"), (int, float)):
+        with _verified_lock:
+            _verified[key] = claims
+    return dict(claims)
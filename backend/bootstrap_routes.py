@@ -0,0 +1,89 @@
+# backend/bootstrap_routes.py
+"""
+🚀 GET /api/bootstrap: what a page needs on load, in one request.
+- One auth resolution (get_current_user, principal cache), then the selected
+  sections run concurrently with asyncio.gather.
+- ?fields=me,plan,vault,story,report picks the sections (default: all);
+  unknown names are a 400.
+  - me / plan come straight from the principal (no Mongo).
+  - vault (first list page) and report go through the vault routes'
+    version cache, keyed like their GETs (the principal's vault_version, or
+    one _id read with VAULT_FRESH_VERSION=1); story is one indexed read.
+- A section that fails comes back as null and is named in "errors", so one
+  slow collection does not fail the whole page.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from bson import ObjectId
+
+import metrics
+import vault_routes
+from auth_guard import get_current_user
+from agents.new_advisor.story_agent import latest_story_for_user
+
+router = APIRouter()
+
+
+def _plan(user: dict) -> dict:
+    until = user.get("premium_until")
+    if isinstance(until, datetime) and until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    status = (user.get("status") or "normal").lower()
+    return {
+        "status": status,
+        "premium": status == "premium" and (until is None or until > datetime.now(timezone.utc)),
+        "premium_until": until,
+    }
+
+
+async def _value(v):
+    return v
+
+def _loaders(user: dict, vault_limit: int) -> dict:
+    """Section name -> zero-argument coroutine function."""
+    return {
+        "me": lambda: _value(user),
+        "plan": lambda: _value(_plan(user)),
+        "vault": lambda: vault_routes.read_cached(user, ("list", vault_limit, None),
+                                                  lambda: vault_routes.list_page(user, vault_limit)),
+        "story": lambda: _story(user),
+        "report": lambda: vault_routes.read_cached(user, ("report",), lambda: vault_routes.report_for(user)),
+    }
+
+async def _story(user: dict) -> dict:
+    return {"story": await latest_story_for_user(ObjectId(user["id"]))}
+
+
+SECTIONS = ("me", "plan", "vault", "story", "report")
+
+
+@router.get("/api/bootstrap", summary="Profile, plan, first vault page, story and report in one call")
+async def bootstrap(
+    user=Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="comma-separated: " + ",".join(SECTIONS)),
+    vault_limit: int = Query(50, ge=1, le=200),
+):
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(SECTIONS)
+    unknown = [n for n in names if n not in SECTIONS]
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+    names = list(dict.fromkeys(names))
+
+    if "vault" in names or "report" in names:
+        user = await vault_routes.fresh_vault_version(user)
+    loaders = _loaders(user, vault_limit)
+    results = await asyncio.gather(*(loaders[n]() for n in names), return_exceptions=True)
+    out: dict = {"errors": []}
+    for name, res in zip(names, results):
+        if isinstance(res, Exception):
+            print(f"⚠️ bootstrap section {name} failed:", res)
+            metrics.inc("bootstrap_section_failed_total", section=name)
+            out[name] = None
+            out["errors"].append(name)
+        else:
+            out[name] = res
+    return out
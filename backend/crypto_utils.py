@@ -22,17 +22,21 @@ else:
         print("❌ STORY_SECRET_KEY invalid:", e)
         key = os.urandom(32)
 
-def encrypt_text(plaintext: str) -> Tuple[str, str]:
+def encrypt_raw(plaintext: str) -> Tuple[bytes, bytes]:
+    """(nonce, ciphertext) as bytes, stored as BSON Binary."""
     aes = AESGCM(key)
     nonce = secrets.token_bytes(12)
-    ct = aes.encrypt(nonce, plaintext.encode("utf-8"), None)
+    return nonce, aes.encrypt(nonce, plaintext.encode("utf-8"), None)
+
+def decrypt_raw(nonce: bytes, ct: bytes) -> str:
+    aes = AESGCM(key)
+    return aes.decrypt(nonce, ct, None).decode("utf-8")
+
+def encrypt_text(plaintext: str) -> Tuple[str, str]:
+    nonce, ct = encrypt_raw(plaintext)
     import base64 as b64
     return b64.b64encode(nonce).decode(), b64.b64encode(ct).decode()
 
 def decrypt_text(nonce_b64: str, ciphertext_b64: str) -> str:
-    aes = AESGCM(key)
     import base64 as b64
-    nonce = b64.b64decode(nonce_b64)
-    ct = b64.b64decode(ciphertext_b64)
-    pt = aes.decrypt(nonce, ct, None)
-    return pt.decode("utf-8")
+    return decrypt_raw(b64.b64decode(nonce_b64), b64.b64decode(ciphertext_b64))
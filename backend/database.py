@@ -1,20 +1,51 @@
-
 # backend/database.py
+"""
+MongoDB clients.
+- adb: native async database (PyMongo AsyncMongoClient) used by the routers,
+  usually through the repository classes in repositories.py.
+- db:  synchronous facade, kept for scripts/ and background threads.
+- Command latency / pool wait metrics and the slow-query log come from the
+  listeners in mongo_monitoring.py.
+- Connections are lazy: importing this module never talks to Mongo, so workers
+  boot even while the cluster is unreachable. /readyz reports reachability (ping).
+ENV:
+  MONGODB_URI
+  MONGO_SERVER_SELECTION_MS = server selection timeout for queries (default 30000)
+  MONGO_PING_TIMEOUT_SECONDS = readiness probe budget (default 2)
+"""
 import os, certifi
 from dotenv import load_dotenv
-from pymongo import MongoClient
+import pymongo
+from pymongo import AsyncMongoClient, MongoClient
+
+import mongo_monitoring
 
 load_dotenv()
-URI = os.getenv("MONGODB_URI")  
+URI = os.getenv("MONGODB_URI")
+DB_NAME = "password_safety_ai"
+PING_TIMEOUT_SECONDS = float(os.getenv("MONGO_PING_TIMEOUT_SECONDS", "2"))
 
-client = MongoClient(
-    URI,
+_client_opts = dict(
     tls=True,
     tlsCAFile=certifi.where(),
-    serverSelectionTimeoutMS=30000,
+    serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_MS", "30000")),
+    connect=False,
+    event_listeners=mongo_monitoring.listeners(),
 )
-db = client["password_safety_ai"]
-client.admin.command("ping")
-print("✅ MongoDB connected")
+
+client = MongoClient(URI, **_client_opts)
+db = client[DB_NAME]
+
+async_client = AsyncMongoClient(URI, **_client_opts)
+adb = async_client[DB_NAME]
 
 
+async def ping() -> bool:
+    """True if the cluster answers a ping within PING_TIMEOUT_SECONDS."""
+    try:
+        with pymongo.timeout(PING_TIMEOUT_SECONDS):
+            await async_client.admin.command("ping")
+        return True
+    except Exception as e:
+        print("⚠️ MongoDB ping failed:", e)
+        return False
@@ -0,0 +1,106 @@
+# backend/indexes.py
+"""
+🗂️ Every MongoDB index the app relies on, declared in one place.
+- ensure_indexes() creates them; it runs from the app lifespan (once per worker
+  start, ENSURE_INDEXES_ON_STARTUP) or from scripts/create_indexes.py per deploy.
+- The declarations are hashed and the hash stored in schema_meta; when it is
+  unchanged the whole step is a single find_one, so restarts stay cheap.
+- Add new indexes here, never with create_index at module import.
+"""
+
+import hashlib, json
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+META_ID = "indexes"
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="uniq_username", unique=True),
+        IndexModel([("email", ASCENDING)], name="uniq_email", unique=True),
+    ],
+    "vault_entries": [
+        # newest-first keyset pagination on (createdAt, _id)
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel(
+            [("userId", ASCENDING), ("domain", ASCENDING), ("login", ASCENDING)],
+            name="uniq_user_domain_login",
+            unique=True,
+            partialFilterExpression={"domain": {"$exists": True, "$type": "string"}},
+        ),
+        # /suggest: exact domain + subdomains as one range on the reversed labels
+        IndexModel([("userId", ASCENDING), ("rdomain", ASCENDING)]),
+        # /suggest: every entry of the same registrable domain (eTLD+1)
+        IndexModel([("userId", ASCENDING), ("site", ASCENDING)]),
+        # /changes: upserts after a sequence
+        IndexModel([("userId", ASCENDING), ("seq", ASCENDING)]),
+    ],
+    "vault_tombstones": [
+        IndexModel([("userId", ASCENDING), ("seq", ASCENDING)]),
+        IndexModel([("expiresAt", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "mnemonics": [
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING)]),
+    ],
+    "refresh_tokens": [
+        IndexModel([("expiresAt", ASCENDING)], expireAfterSeconds=0),
+        IndexModel([("family", ASCENDING)]),
+        IndexModel([("userId", ASCENDING)]),
+    ],
+    "revoked_tokens": [
+        IndexModel([("expiresAt", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "advisor_behavior": [
+        IndexModel([("expiresAt", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "rate_limits": [
+        IndexModel([("expiresAt", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+
+def declaration_hash() -> str:
+    spec = {coll: [m.document for m in models] for coll, models in sorted(INDEXES.items())}
+    blob = json.dumps(spec, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def ensure_indexes(db, force: bool = False) -> bool:
+    """
+    Create any declared index that is missing. Returns True when the schema is
+    current. Conflicts (an index with the same keys but other options, or
+    duplicates blocking a unique index) are reported and leave the stored hash
+    untouched, so the next run tries again.
+    """
+    version = declaration_hash()
+    meta = db.schema_meta.find_one({"_id": META_ID}, {"version": 1})
+    if not force and meta and meta.get("version") == version:
+        return True
+
+    ok = True
+    for coll, models in INDEXES.items():
+        for model in models:
+            name = model.document["name"]
+            try:
+                db[coll].create_indexes([model])
+            except OperationFailure as e:
+                ok = False
+                if e.code == 11000:
+                    print(f"❗ {coll}.{name}: duplicates block this unique index; "
+                          f"run `python -m scripts.create_indexes` to list them.")
+                elif e.code in (85, 86):   # IndexOptionsConflict / IndexKeySpecsConflict
+                    print(f"⚠️ {coll}.{name}: an index on these keys exists with other options; fix manually.")
+                else:
+                    print(f"⚠️ {coll}.{name}: create failed:", e)
+
+    if ok:
+        db.schema_meta.update_one(
+            {"_id": META_ID},
+            {"$set": {"version": version, "updatedAt": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        print(f"✅ MongoDB indexes up to date ({version})")
+    return ok
@@ -0,0 +1,57 @@
+# backend/kdf_pool.py
+"""
+🧮 Dedicated worker pool for password hashing (pbkdf2 / bcrypt).
+- KDF work runs on its own small executor instead of the shared AnyIO
+  threadpool, so a login burst cannot starve vault / story routes.
+- Admission control: at most KDF_WORKERS running + KDF_QUEUE_MAX waiting.
+  Anything beyond that is rejected immediately with 503 + Retry-After.
+- Metrics: kdf_inflight / kdf_queue_depth gauges, kdf_wait_seconds and
+  kdf_duration_seconds histograms, kdf_rejected_total counter.
+"""
+
+import asyncio, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+import metrics
+
+KDF_WORKERS = int(os.getenv("KDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+KDF_QUEUE_MAX = int(os.getenv("KDF_QUEUE_MAX", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=KDF_WORKERS, thread_name_prefix="kdf")
+_lock = threading.Lock()
+_inflight = 0   # admitted jobs: running + waiting
+
+
+def _publish_depth():
+    metrics.set_gauge("kdf_inflight", _inflight)
+    metrics.set_gauge("kdf_queue_depth", max(0, _inflight - KDF_WORKERS))
+
+
+def _timed(fn, args, op, enqueued):
+    start = time.perf_counter()
+    metrics.observe("kdf_wait_seconds", start - enqueued, op=op)
+    try:
+        return fn(*args)
+    finally:
+        metrics.observe("kdf_duration_seconds", time.perf_counter() - start, op=op)
+
+
+async def run_kdf(fn, *args, op: str = "kdf"):
+    """Run a hashing function on the KDF pool, or raise 503 if the pool is saturated."""
+    global _inflight
+    with _lock:
+        if _inflight >= KDF_WORKERS + KDF_QUEUE_MAX:
+            metrics.inc("kdf_rejected_total", op=op)
+            raise HTTPException(status_code=503, detail="Server busy, please retry shortly",
+                                headers={"Retry-After": "1"})
+        _inflight += 1
+        _publish_depth()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, _timed, fn, args, op, time.perf_counter())
+    finally:
+        with _lock:
+            _inflight -= 1
+            _publish_depth()
@@ -1,16 +1,23 @@
 # backend/main.py
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from agents import guardian, watchdog, generator, advisor, orchestrator
 
 from auth_routes import router as auth_router
 from vault_routes import router as vault_router
+from bootstrap_routes import router as bootstrap_router
+from metrics import router as metrics_router
 from agents.new_advisor import story_agent   # 🆕 mount /story
 
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
-from database import db
+from database import db, async_client, ping
+from indexes import ensure_indexes
 from premium_guard import require_premium_user
 
 load_dotenv()
@@ -20,7 +27,26 @@ if not API_KEY:
 genai.configure(api_key=API_KEY)
 print("✅ Gemini configured in main.py")
 
-app = FastAPI()
+# Indexes are declared in indexes.py; the versioned check makes this a single read
+# when nothing changed. Set to 0 when a deploy step runs scripts/create_indexes.py.
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+
+async def _ensure_indexes_background():
+    try:
+        await run_in_threadpool(ensure_indexes, db)
+    except Exception as e:
+        print("⚠️ Index check skipped (MongoDB unreachable?):", e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # runs in the background so a slow / unreachable cluster never delays boot
+    task = asyncio.create_task(_ensure_indexes_background()) if ENSURE_INDEXES_ON_STARTUP else None
+    yield
+    if task:
+        task.cancel()
+    await async_client.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # 🆕 CORS relaxed for dev to avoid “waiting” issues
 app.add_middleware(
@@ -35,6 +61,13 @@ app.add_middleware(
 def root():
     return {"message": "Password Safety Backend is running 🚀"}
 
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 200 once MongoDB answers, 503 otherwise (liveness is /)."""
+    if await ping():
+        return {"ok": True}
+    return JSONResponse(status_code=503, content={"ok": False, "mongo": "unreachable"})
+
 # Existing routers
 app.include_router(guardian.router,     prefix="/guardian")
 app.include_router(watchdog.router,     prefix="/watchdog")
@@ -48,7 +81,11 @@ app.include_router(story_agent.router,  prefix="/story", tags=["story"])
 # Auth + Vault
 app.include_router(auth_router)
 app.include_router(vault_router, prefix="/api/vault", tags=["vault"])
+app.include_router(bootstrap_router, tags=["bootstrap"])   # one call for page-load data
+
+# Per-worker metrics snapshot (needs X-Metrics-Token = METRICS_TOKEN; off when unset)
+app.include_router(metrics_router, tags=["metrics"])
 
 @app.get("/api/premium-test")
-def premium_check(user=Depends(require_premium_user)):
+async def premium_check(user=Depends(require_premium_user)):
     return {"message": "✅ You are a premium user"}
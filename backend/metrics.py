@@ -0,0 +1,87 @@
+# backend/metrics.py
+"""
+📈 Minimal in-process metrics registry (per worker).
+- counters, gauges and fixed-bucket histograms, optionally labelled
+- GET /metrics returns a JSON snapshot, only to callers sending the shared
+  secret in X-Metrics-Token; without METRICS_TOKEN set it is a 404
+No external dependency; swap for prometheus_client if the deployment scrapes.
+ENV:
+  METRICS_TOKEN = shared secret for GET /metrics (unset = endpoint disabled)
+"""
+
+import hmac, os, threading
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+router = APIRouter()
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# seconds; covers sub-ms cache hits up to multi-second KDF / Mongo stalls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, tuple], float] = {}
+_gauges: Dict[Tuple[str, tuple], float] = {}
+_histograms: Dict[Tuple[str, tuple], dict] = {}
+
+
+def _key(name: str, labels: dict) -> Tuple[str, tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, buckets: tuple = DEFAULT_BUCKETS, **labels):
+    k = _key(name, labels)
+    with _lock:
+        h = _histograms.get(k)
+        if h is None:
+            h = _histograms[k] = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+        h["counts"][bisect_left(h["buckets"], value)] += 1
+        h["sum"] += value
+        h["count"] += 1
+
+
+def _render(items: dict, fn):
+    out: Dict[str, list] = {}
+    for (name, labels), v in items.items():
+        out.setdefault(name, []).append({"labels": dict(labels), **fn(v)})
+    return out
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "counters": _render(_counters, lambda v: {"value": v}),
+            "gauges": _render(_gauges, lambda v: {"value": v}),
+            "histograms": _render(_histograms, lambda h: {
+                "buckets": list(h["buckets"]) + ["+Inf"],
+                "counts": list(h["counts"]),
+                "sum": h["sum"],
+                "count": h["count"],
+            }),
+        }
+
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    if not METRICS_TOKEN:
+        raise HTTPException(404, "Not Found")
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(401, "Invalid metrics token")
+
+
+@router.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def metrics():
+    return snapshot()
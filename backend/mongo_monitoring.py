@@ -0,0 +1,118 @@
+# backend/mongo_monitoring.py
+"""
+🔭 PyMongo event listeners feeding the metrics registry (served at /metrics).
+- mongo_command_seconds{collection,command}   latency histogram per command
+- mongo_returned_docs{collection,command}     documents per reply (find / getMore / aggregate / count)
+- mongo_command_failed_total{collection,command}
+- mongo_pool_checkout_seconds                 wait for a pooled connection
+- mongo_pool_checkout_failed_total{reason}
+- Slow-query log: commands slower than MONGO_SLOW_MS are printed with a sampling
+  rate of MONGO_SLOW_SAMPLE, as a query *shape* — every literal value is replaced
+  by "?", so no user data (domains, logins, ciphertext) reaches the logs.
+Registered on both clients in database.py.
+"""
+
+import json, os, random, threading
+from typing import Any, Dict, Tuple
+
+from pymongo import monitoring
+
+import metrics
+
+SLOW_MS = float(os.getenv("MONGO_SLOW_MS", "100"))
+SLOW_SAMPLE = float(os.getenv("MONGO_SLOW_SAMPLE", "0.1"))
+
+DOC_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+# the parts of a command that describe how it hits the indexes
+_SHAPE_FIELDS = ("filter", "sort", "projection", "query", "pipeline", "hint", "limit")
+
+
+def redact(value: Any) -> Any:
+    """Keep field names and operators, replace every literal with '?'."""
+    if isinstance(value, dict):
+        return {k: redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(value[0])] if value else []
+    return "?"
+
+
+def query_shape(command_name: str, command: dict) -> dict:
+    shape = {k: redact(command[k]) for k in _SHAPE_FIELDS if k in command}
+    if command_name in ("update", "delete"):
+        stmts = command.get("updates") or command.get("deletes") or []
+        if stmts:
+            shape["q"] = redact(stmts[0].get("q", {}))
+    return shape
+
+
+def _returned(command_name: str, reply: dict):
+    cur = reply.get("cursor")
+    if isinstance(cur, dict):
+        batch = cur.get("firstBatch", cur.get("nextBatch"))
+        if batch is not None:
+            return len(batch)
+    if command_name == "count":
+        return reply.get("n")
+    return None
+
+
+class CommandMetrics(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[Tuple, Tuple[str, dict]] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return event.connection_id, event.request_id
+
+    def started(self, event):
+        coll = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            coll = event.command.get("collection")
+        with self._lock:
+            self._started[self._key(event)] = (coll if isinstance(coll, str) else "-", event.command)
+
+    def _pop(self, event):
+        with self._lock:
+            return self._started.pop(self._key(event), ("-", {}))
+
+    def succeeded(self, event):
+        coll, command = self._pop(event)
+        seconds = event.duration_micros / 1e6
+        labels = {"collection": coll, "command": event.command_name}
+        metrics.observe("mongo_command_seconds", seconds, **labels)
+        n = _returned(event.command_name, event.reply)
+        if n is not None:
+            metrics.observe("mongo_returned_docs", n, buckets=DOC_BUCKETS, **labels)
+        if seconds * 1000 >= SLOW_MS and random.random() < SLOW_SAMPLE:
+            print(f"🐢 slow mongo {event.command_name} {coll} {seconds * 1000:.0f}ms "
+                  f"shape={json.dumps(query_shape(event.command_name, command), default=str)}")
+
+    def failed(self, event):
+        coll, _ = self._pop(event)
+        metrics.inc("mongo_command_failed_total", collection=coll, command=event.command_name)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def connection_checked_out(self, event):
+        metrics.observe("mongo_pool_checkout_seconds", event.duration)
+
+    def connection_check_out_failed(self, event):
+        metrics.observe("mongo_pool_checkout_seconds", event.duration)
+        metrics.inc("mongo_pool_checkout_failed_total", reason=str(event.reason))
+
+    # unused pool events
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+def listeners() -> list:
+    return [CommandMetrics(), PoolMetrics()]
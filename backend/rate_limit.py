@@ -0,0 +1,133 @@
+# backend/rate_limit.py
+"""
+🚦 Token-bucket throttling for credential endpoints.
+- In-process buckets keyed by "<scope>:<ip|id>:<value>", spread over sharded
+  dicts (one lock per shard), refilled lazily on access, LRU-bounded per shard.
+- Optional shared backend (RATE_LIMIT_BACKEND=mongo) so a limit holds across
+  workers: one atomic pipeline update per check (async driver), expired by a TTL index.
+- Checks run before any user lookup or hash verification; rejected calls get
+  429 + Retry-After. Metrics: rate_limit_checked_total / rate_limit_shed_total.
+ENV:
+  LOGIN_RATE_PER_IP        = "burst/per_seconds" (default "20/60")
+  LOGIN_RATE_PER_ACCOUNT   = "burst/per_seconds" (default "5/60")
+  TRUST_PROXY              = "1" to take the client IP from X-Forwarded-For
+"""
+
+import os, threading, time, zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+from pymongo import ReturnDocument
+
+import metrics
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+TRUST_PROXY = os.getenv("TRUST_PROXY", "0").lower() in ("1", "true", "yes")
+SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+MAX_KEYS_PER_SHARD = int(os.getenv("RATE_LIMIT_MAX_KEYS_PER_SHARD", "4096"))
+
+
+def _parse_rate(spec: str) -> Tuple[float, float]:
+    """'5/60' -> (burst=5, refill=5/60 tokens per second)."""
+    burst, per = spec.split("/", 1)
+    return float(burst), float(burst) / float(per)
+
+
+LOGIN_PER_IP = _parse_rate(os.getenv("LOGIN_RATE_PER_IP", "20/60"))
+LOGIN_PER_ACCOUNT = _parse_rate(os.getenv("LOGIN_RATE_PER_ACCOUNT", "5/60"))
+
+
+# ---------- in-process buckets ----------
+class TokenBucketLimiter:
+    def __init__(self, shards: int = SHARDS, max_keys_per_shard: int = MAX_KEYS_PER_SHARD):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self._max = max_keys_per_shard
+
+    def take(self, key: str, burst: float, rate: float) -> Tuple[bool, float]:
+        """Consume one token. Returns (allowed, seconds until the next token)."""
+        lock, buckets = self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, ts = buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - ts) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            buckets[key] = (tokens, now)   # re-inserted as most recently used
+            if len(buckets) > self._max:
+                buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+# ---------- shared backend ----------
+class MongoBucketBackend:
+    """Same token bucket, evaluated atomically in Mongo (one round trip per check)."""
+
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def take(self, key: str, burst: float, rate: float) -> Tuple[bool, float]:
+        now = datetime.now(timezone.utc)
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, 1000]}
+        doc = await self.coll.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": {"$min": [burst, {"$add": [
+                    {"$ifNull": ["$tokens", burst]}, {"$multiply": [elapsed, rate]}]}]}}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "ts": now,
+                    "expiresAt": now + timedelta(seconds=burst / rate),
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (1 - doc["tokens"]) / rate
+
+
+_local = TokenBucketLimiter()
+_shared: Optional[MongoBucketBackend] = None
+if RATE_LIMIT_BACKEND == "mongo":
+    from database import adb
+    _shared = MongoBucketBackend(adb["rate_limits"])
+
+
+# ---------- helpers ----------
+def client_ip(request: Request) -> str:
+    if TRUST_PROXY:
+        fwd = request.headers.get("x-forwarded-for")
+        if fwd:
+            return fwd.split(",", 1)[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce(scope: str, kind: str, value: str, limit: Tuple[float, float]):
+    """
+    Raise 429 if the bucket for (scope, kind, value) is empty. The local bucket
+    sheds floods cheaply; the shared backend (if any) makes the limit global.
+    """
+    burst, rate = limit
+    key = f"{scope}:{kind}:{value}"
+    metrics.inc("rate_limit_checked_total", scope=scope, kind=kind)
+    allowed, retry = _local.take(key, burst, rate)
+    if allowed and _shared is not None:
+        try:
+            allowed, retry = await _shared.take(key, burst, rate)
+        except Exception as e:
+            print("⚠️ shared rate limit unavailable, using local only:", e)
+    if not allowed:
+        metrics.inc("rate_limit_shed_total", scope=scope, kind=kind)
+        raise HTTPException(status_code=429, detail="Too many attempts, slow down",
+                            headers={"Retry-After": str(max(1, int(retry + 0.999)))})
+
+
+async def check_credentials(scope: str, request: Request, identifier: str):
+    """Per-IP and per-account limits for a credential check."""
+    await enforce(scope, "ip", client_ip(request), LOGIN_PER_IP)
+    await enforce(scope, "id", identifier.strip().lower(), LOGIN_PER_ACCOUNT)
@@ -0,0 +1,105 @@
+# backend/refresh_tokens.py
+"""
+🔄 Refresh tokens with rotation.
+- A refresh token is an opaque random string; only its SHA-256 is stored.
+- Tokens issued from one login form a *family*. Every refresh consumes the
+  presented token and issues the next one in the same family.
+- Presenting an already-used token means it leaked: the whole family is revoked.
+  Exception: within REFRESH_REUSE_GRACE_SECONDS of its use (two tabs or a woken
+  timer racing on the same token, a lost response) the successor already issued
+  is returned again, kept encrypted on the used document (crypto_utils) for that
+  purpose. Only to the same device: clients send a random device_id they keep
+  next to the token, its hash is stored with the rotation (usedBy), and a replay
+  without it is treated as reuse.
+- Every client gets its own family: a login, or POST /auth/device from a live
+  session (browser extension), so clients never consume each other's tokens.
+- Expired documents are removed by a TTL index on expiresAt.
+ENV:
+  REFRESH_REUSE_GRACE_SECONDS = window in which a used token returns its successor (default 30)
+"""
+
+import hashlib, os, secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from auth_utils import REFRESH_TOKEN_EXPIRE_DAYS
+from crypto_utils import decrypt_raw, encrypt_raw
+from database import adb
+
+RT_COLL = adb["refresh_tokens"]
+REUSE_GRACE = timedelta(seconds=int(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "30")))
+
+
+def _digest(raw: str) -> str:
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def issue_refresh_token(user_id, family: Optional[str] = None, raw: Optional[str] = None) -> str:
+    """Store and return a new refresh token (a new family unless one is given)."""
+    raw = raw or secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await RT_COLL.insert_one({
+        "_id": _digest(raw),
+        "family": family or secrets.token_hex(16),
+        "userId": ObjectId(str(user_id)),
+        "createdAt": now,
+        "expiresAt": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        "usedAt": None,
+        "revoked": False,
+    })
+    return raw
+
+
+async def rotate_refresh_token(raw: str, device_id: Optional[str] = None) -> Optional[Tuple[ObjectId, str]]:
+    """
+    Consume a refresh token and return (user_id, next_token), or None if it is
+    unknown, expired, revoked or already used (reuse revokes the family, except
+    within the grace window from the device that rotated it, which gets the same
+    next_token again).
+    """
+    now = datetime.now(timezone.utc)
+    h = _digest(raw)
+    nxt = secrets.token_urlsafe(32)
+    nonce, ct = encrypt_raw(nxt)
+    doc = await RT_COLL.find_one_and_update(
+        {"_id": h, "usedAt": None, "revoked": False, "expiresAt": {"$gt": now}},
+        {"$set": {"usedAt": now, "usedBy": _digest(device_id) if device_id else None,
+                  "next": _digest(nxt), "nextNonce": nonce, "nextCt": ct}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if doc:
+        return doc["userId"], await issue_refresh_token(doc["userId"], family=doc["family"], raw=nxt)
+
+    stale = await RT_COLL.find_one({"_id": h})
+    if not stale or not stale.get("usedAt") or stale.get("revoked"):
+        return None
+    used_at = stale["usedAt"]
+    if used_at.tzinfo is None:
+        used_at = used_at.replace(tzinfo=timezone.utc)
+    same_device = bool(device_id) and stale.get("usedBy") == _digest(device_id)
+    if now - used_at > REUSE_GRACE or "nextCt" not in stale or not same_device:
+        await revoke_family(stale["family"])
+        return None
+    # lost a race with another tab of this device: hand out the same successor, unless it has moved on already
+    succ = await RT_COLL.find_one({"_id": stale["next"]}, {"usedAt": 1, "revoked": 1})
+    if succ and (succ.get("usedAt") or succ.get("revoked")):
+        return None
+    return stale["userId"], decrypt_raw(stale["nextNonce"], stale["nextCt"])
+
+
+async def revoke_refresh_token(raw: str):
+    """Revoke the family of a presented refresh token (logout)."""
+    doc = await RT_COLL.find_one({"_id": _digest(raw)}, {"family": 1})
+    if doc:
+        await revoke_family(doc["family"])
+
+
+async def revoke_family(family: str):
+    await RT_COLL.update_many({"family": family}, {"$set": {"revoked": True}})
+
+
+async def revoke_user_refresh_tokens(user_id):
+    await RT_COLL.update_many({"userId": ObjectId(str(user_id))}, {"$set": {"revoked": True}})
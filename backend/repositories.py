@@ -0,0 +1,319 @@
+# backend/repositories.py
+"""
+🗄️ Async data-access layer (PyMongo AsyncMongoClient).
+One repository per collection; routers talk to these instead of raw collections,
+so every DB round trip is awaited and no threadpool thread is held while waiting.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from database import adb
+from utils.blobs import ENC_V
+
+VAULT_PENDING_TIMEOUT_SECONDS = int(os.getenv("VAULT_PENDING_TIMEOUT_SECONDS", "60"))
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class UsersRepo:
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def by_id(self, uid: ObjectId, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.coll.find_one({"_id": uid}, projection)
+
+    async def by_identifier(self, identifier: str, projection: Optional[dict] = None) -> Optional[dict]:
+        """Username OR email (email matched lowercase)."""
+        q = {"email": identifier.lower()} if "@" in identifier else {"username": identifier}
+        return await self.coll.find_one(q, projection)
+
+    async def find_one(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.coll.find_one(query, projection)
+
+    async def exists(self, query: dict) -> bool:
+        return await self.coll.find_one(query, {"_id": 1}) is not None
+
+    async def insert(self, doc: dict) -> ObjectId:
+        res = await self.coll.insert_one(doc)
+        return res.inserted_id
+
+    async def update(self, uid: ObjectId, ops: dict) -> int:
+        res = await self.coll.update_one({"_id": uid}, ops)
+        return res.matched_count
+
+    async def update_and_get(self, uid: ObjectId, ops: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.coll.find_one_and_update(
+            {"_id": uid}, ops, projection=projection, return_document=ReturnDocument.AFTER
+        )
+
+    async def delete(self, uid: ObjectId) -> int:
+        res = await self.coll.delete_one({"_id": uid})
+        return res.deleted_count
+
+    async def reserve_vault_seqs(self, uid: ObjectId, n: int = 1, slots: int = 0,
+                                 max_entries: Optional[int] = None) -> Optional[int]:
+        """
+        Take n change sequences (and `slots` entry slots) in one atomic update.
+        Returns the new vault_version (the block is version-n+1 .. version), or
+        None when max_entries would be exceeded or vault_count is not set yet
+        (init_vault_count, then retry).
+        The block's first seq stays in vault_pending until finish_vault_seqs(), so
+        /changes never moves a reader past a write that has not committed yet;
+        marks older than VAULT_PENDING_TIMEOUT_SECONDS (abandoned writes) are
+        dropped by the next reservation.
+        """
+        q: Dict[str, Any] = {"_id": uid}
+        if slots:
+            q["vault_count"] = {"$lte": max_entries - slots} if max_entries is not None else {"$exists": True}
+        version = {"$ifNull": ["$vault_version", 0]}
+        live = {"$filter": {
+            "input": {"$ifNull": ["$vault_pending", []]},
+            "cond": {"$gt": ["$$this.at", {"$subtract": ["$$NOW", VAULT_PENDING_TIMEOUT_SECONDS * 1000]}]},
+        }}
+        fields: Dict[str, Any] = {
+            "vault_version": {"$add": [version, n]},
+            "vault_pending": {"$concatArrays": [live, [{"s": {"$add": [version, 1]}, "at": "$$NOW"}]]},
+        }
+        if slots:
+            fields["vault_count"] = {"$add": ["$vault_count", slots]}
+        doc = await self.coll.find_one_and_update(
+            q, [{"$set": fields}],
+            projection={"vault_version": 1}, return_document=ReturnDocument.AFTER,
+        )
+        return int(doc["vault_version"]) if doc else None
+
+    async def finish_vault_seqs(self, uid: ObjectId, firsts: List[int], release: int = 0) -> None:
+        """Clear the pending marks of finished reservations (by first seq); give back `release` slots."""
+        pull = {"$pull": {"vault_pending": {"s": {"$in": firsts}}}}
+        if release:
+            res = await self.coll.update_one({"_id": uid, "vault_count": {"$exists": True}},
+                                             {**pull, "$inc": {"vault_count": -release}})
+            if res.matched_count:
+                return
+            # counter not initialised yet: the lazy init will count the entries
+        await self.coll.update_one({"_id": uid}, pull)
+
+    async def committed_vault_seq(self, uid: ObjectId) -> Tuple[int, int]:
+        """(vault_version, highest seq at or below which every reserved write has finished)."""
+        doc = await self.coll.find_one({"_id": uid}, {"vault_version": 1, "vault_pending": 1}) or {}
+        version = int(doc.get("vault_version", 0))
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=VAULT_PENDING_TIMEOUT_SECONDS)
+        live = [p["s"] for p in doc.get("vault_pending") or []
+                if p.get("at") and _utc(p["at"]) > cutoff]
+        return version, (min(live) - 1 if live else version)
+
+    async def init_vault_count(self, uid: ObjectId, count: int) -> None:
+        """Seed vault_count for accounts created before it existed (no-op once set)."""
+        await self.coll.update_one({"_id": uid, "vault_count": {"$exists": False}},
+                                   {"$set": {"vault_count": count}})
+
+
+class VaultEntriesRepo:
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def count_for_user(self, user_id: ObjectId) -> int:
+        return await self.coll.count_documents({"userId": user_id})
+
+    async def find_duplicate(self, user_id: ObjectId, domain: str, login: str,
+                             exclude_id: Optional[ObjectId] = None) -> Optional[dict]:
+        q: Dict[str, Any] = {"userId": user_id, "domain": domain, "login": login}
+        if exclude_id is not None:
+            q["_id"] = {"$ne": exclude_id}
+        return await self.coll.find_one(q, {"_id": 1})
+
+    async def insert(self, doc: dict) -> ObjectId:
+        res = await self.coll.insert_one(doc)
+        return res.inserted_id
+
+    async def get_owned(self, entry_id: ObjectId, user_id: ObjectId,
+                        projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.coll.find_one({"_id": entry_id, "userId": user_id}, projection)
+
+    async def update_owned(self, entry_id: ObjectId, user_id: ObjectId, fields: dict,
+                           projection: Optional[dict] = None, unset: Optional[List[str]] = None) -> Optional[dict]:
+        """$set (and $unset) on an owned entry; returns it as it was *before* the update, None if not found."""
+        ops: Dict[str, Any] = {"$set": fields}
+        if unset:
+            ops["$unset"] = {k: "" for k in unset}
+        return await self.coll.find_one_and_update(
+            {"_id": entry_id, "userId": user_id}, ops,
+            projection=projection or {"_id": 1}, return_document=ReturnDocument.BEFORE,
+        )
+
+    async def delete_owned(self, entry_id: ObjectId, user_id: ObjectId,
+                           projection: Optional[dict] = None) -> Optional[dict]:
+        """Delete an owned entry; returns the deleted document, None if not found."""
+        return await self.coll.find_one_and_delete({"_id": entry_id, "userId": user_id},
+                                                   projection=projection or {"_id": 1})
+
+    async def find(self, query: dict, sort: Optional[list] = None,
+                   projection: Optional[dict] = None, limit: int = 0) -> List[dict]:
+        cur = self.coll.find(query, projection)
+        if sort:
+            cur = cur.sort(sort)
+        if limit:
+            cur = cur.limit(limit)
+        return await cur.to_list(None)
+
+    async def delete_for_user(self, user_id: ObjectId) -> int:
+        res = await self.coll.delete_many({"userId": user_id})
+        return res.deleted_count
+
+    async def insert_many_unordered(self, docs: List[dict]) -> Dict[str, Any]:
+        """
+        One unordered bulk insert. Unique-index violations (uniq_user_domain_login)
+        come back as duplicate positions instead of failing the batch.
+        """
+        try:
+            res = await self.coll.insert_many(docs, ordered=False)
+            return {"inserted": len(res.inserted_ids), "duplicates": [], "errors": []}
+        except BulkWriteError as e:
+            details = e.details or {}
+            dups, errors = [], []
+            for err in details.get("writeErrors", []):
+                (dups if err.get("code") == 11000 else errors).append((err["index"], err.get("errmsg", "")))
+            return {"inserted": details.get("nInserted", 0), "duplicates": dups, "errors": errors}
+
+    def iter_for_user(self, user_id: ObjectId, projection: Optional[dict] = None, batch_size: int = 500):
+        """Async cursor over a user's entries, oldest first (streaming export)."""
+        return self.coll.find({"userId": user_id}, projection) \
+                        .sort([("createdAt", 1), ("_id", 1)]).batch_size(batch_size)
+
+    async def distinct_domains(self, user_id: ObjectId) -> List[str]:
+        return [d for d in await self.coll.distinct("domain", {"userId": user_id}) if d]
+
+    async def distinct_sites(self, user_id: ObjectId) -> List[str]:
+        return [s for s in await self.coll.distinct("site", {"userId": user_id}) if s]
+
+
+class VaultTombstonesRepo:
+    """Deleted vault entries, kept until expiresAt (TTL) so other devices can sync the delete."""
+
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def insert(self, user_id: ObjectId, entry_id: ObjectId, seq: int, ttl: timedelta):
+        now = datetime.now(timezone.utc)
+        await self.coll.insert_one({
+            "userId": user_id,
+            "entryId": entry_id,
+            "seq": seq,
+            "deletedAt": now,
+            "expiresAt": now + ttl,
+        })
+
+    async def discard(self, user_id: ObjectId, entry_id: ObjectId, seq: int):
+        await self.coll.delete_one({"userId": user_id, "entryId": entry_id, "seq": seq})
+
+    async def since(self, user_id: ObjectId, seq: int, limit: int, upto: Optional[int] = None) -> List[dict]:
+        rng: Dict[str, int] = {"$gt": seq}
+        if upto is not None:
+            rng["$lte"] = upto
+        cur = self.coll.find({"userId": user_id, "seq": rng},
+                             {"entryId": 1, "seq": 1, "deletedAt": 1}).sort("seq", 1).limit(limit)
+        return await cur.to_list(None)
+
+
+class VaultReportsRepo:
+    """Per-user vault report (_id = userId), kept current with $inc deltas (vault_report.py)."""
+
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def apply(self, user_id: ObjectId, inc: Dict[str, int]) -> bool:
+        """$inc a current report; False when the user has none or it is stale (mark_stale)."""
+        if not inc:
+            return True
+        res = await self.coll.update_one(
+            {"_id": user_id, "stale": {"$ne": True}},
+            {"$inc": inc, "$set": {"updatedAt": datetime.now(timezone.utc)}},
+        )
+        return res.matched_count > 0
+
+    async def mark_stale(self, user_id: ObjectId) -> ObjectId:
+        """Flag the report for a rebuild (creating a stub if missing); returns the new staleToken."""
+        token = ObjectId()
+        await self.coll.update_one(
+            {"_id": user_id},
+            {"$set": {"stale": True, "staleToken": token, "updatedAt": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        return token
+
+    async def replace_stale(self, user_id: ObjectId, token: ObjectId, doc: Dict[str, Any]) -> bool:
+        """Store a rebuilt report unless a write marked it stale again meanwhile (token moved)."""
+        res = await self.coll.replace_one(
+            {"_id": user_id, "staleToken": token},
+            {**doc, "updatedAt": datetime.now(timezone.utc)},
+        )
+        return res.matched_count > 0
+
+    async def get(self, user_id: ObjectId) -> Optional[dict]:
+        return await self.coll.find_one({"_id": user_id})
+
+    async def delete(self, user_id: ObjectId) -> int:
+        res = await self.coll.delete_one({"_id": user_id})
+        return res.deleted_count
+
+
+class AdvisorBehaviorRepo:
+    """Advisor habit counters per user key (_id), see agents/advisor.py; expires after expiresAt (TTL)."""
+
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def record(self, key: str, inc: Dict[str, int], bits: int, ring: int,
+                     ttl: timedelta) -> dict:
+        """$inc the counters (+ total), push bits onto the last-`ring` list; returns the counters after."""
+        ops: Dict[str, Any] = {
+            "$inc": {**inc, "total": 1},
+            "$set": {"expiresAt": datetime.now(timezone.utc) + ttl},
+        }
+        if ring > 0:
+            ops["$push"] = {"recent": {"$each": [bits], "$slice": -ring}}
+        return await self.coll.find_one_and_update(
+            {"_id": key}, ops, projection={"recent": 0, "expiresAt": 0},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+
+    async def get(self, key: str) -> Optional[dict]:
+        return await self.coll.find_one({"_id": key})
+
+
+class MnemonicsRepo:
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def insert_story(self, user_id: ObjectId, nonce: bytes, ciphertext: bytes, version: int = 1):
+        await self.coll.insert_one({
+            "userId": user_id,
+            "nonce": nonce,
+            "ciphertext": ciphertext,
+            "createdAt": datetime.now(timezone.utc),
+            "version": version,
+            "enc_v": ENC_V,
+        })
+
+    async def latest_for_user(self, user_id: ObjectId) -> Optional[dict]:
+        return await self.coll.find_one({"userId": user_id}, sort=[("createdAt", -1)])
+
+    async def delete_for_user(self, user_id: ObjectId) -> int:
+        res = await self.coll.delete_many({"userId": user_id})
+        return res.deleted_count
+
+
+users = UsersRepo(adb["users"])
+vault_entries = VaultEntriesRepo(adb["vault_entries"])
+vault_tombstones = VaultTombstonesRepo(adb["vault_tombstones"])
+vault_reports = VaultReportsRepo(adb["vault_reports"])
+advisor_behavior = AdvisorBehaviorRepo(adb["advisor_behavior"])
+mnemonics = MnemonicsRepo(adb["mnemonics"])
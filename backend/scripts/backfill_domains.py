@@ -1,44 +1,68 @@
 # backend/scripts/backfill_domains.py
+"""
+Backfill the derived vault keys: lowercase login, domain (from url), and the
+rdomain / site keys used by /suggest. Idempotent; runs through
+scripts/migration.py (resumable, parallel, throttled). After a Public Suffix
+List refresh run it with --restart so every site is recomputed.
+
+Usage (from backend/):
+  python -m scripts.backfill_domains [--batch-size 500] [--workers 4] [--rate 0] [--dry-run] [--restart]
+"""
+
+import argparse
 from datetime import datetime, timezone
-from database import db
-from utils.domain import normalize_domain
+from typing import Optional
+
 from pymongo import UpdateOne
 
-def main():
-    ops = []
-
-    for doc in db.vault_entries.find({}):
-        changed = False
-        set_fields = {}
-
-        # 1) lowercase login
-        login = doc.get("login")
-        if isinstance(login, str):
-            lu = login.strip().lower()
-            if lu != login:
-                set_fields["login"] = lu
-                changed = True
-
-        # 2) add domain from url if missing
-        url = doc.get("url")
-        has_domain = bool(doc.get("domain"))
-        if (not has_domain) and url:
-            d = normalize_domain(url)
-            if d:
-                set_fields["domain"] = d
-                changed = True
-
-        if changed:
-            set_fields["updatedAt"] = datetime.now(timezone.utc)
-            ops.append(
-                UpdateOne({"_id": doc["_id"]}, {"$set": set_fields})
-            )
-
-    if ops:
-        res = db.vault_entries.bulk_write(ops, ordered=False)
-        print(f"Updated {res.modified_count} documents.")
-    else:
-        print("No changes necessary.")
+from database import db
+from scripts import migration
+from utils.domain import normalize_domain, reverse_domain, site_for
+
+NAME = "backfill_domains_v3"
+PROJECTION = {"login": 1, "url": 1, "domain": 1, "rdomain": 1, "site": 1}
+
+
+def plan_update(doc: dict) -> Optional[UpdateOne]:
+    set_fields = {}
+
+    # 1) lowercase login
+    login = doc.get("login")
+    if isinstance(login, str):
+        lu = login.strip().lower()
+        if lu != login:
+            set_fields["login"] = lu
+
+    # 2) add domain from url if missing
+    url = doc.get("url")
+    domain = doc.get("domain")
+    if (not domain) and url:
+        d = normalize_domain(url)
+        if d:
+            set_fields["domain"] = domain = d
+
+    # 3) reversed-label key used by /suggest
+    rd = reverse_domain(domain) or None
+    if doc.get("rdomain") != rd:
+        set_fields["rdomain"] = rd
+
+    # 4) registrable domain (eTLD+1) used by /suggest
+    site = site_for(domain) if domain else None
+    if doc.get("site") != site:
+        set_fields["site"] = site
+
+    if not set_fields:
+        return None
+    set_fields["updatedAt"] = datetime.now(timezone.utc)
+    return UpdateOne({"_id": doc["_id"]}, {"$set": set_fields})
+
+
+def main(**opts):
+    totals = migration.backfill(NAME, db.vault_entries, plan_update, projection=PROJECTION, **opts)
+    print(f"Updated {totals['changed']} of {totals['seen']} documents." if totals["seen"] else "No changes necessary.")
+
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    migration.add_arguments(ap)
+    main(**migration.options(ap.parse_args()))
@@ -0,0 +1,41 @@
+# backend/scripts/backfill_vault_seq.py
+"""
+Give vault entries written before the change feed a change sequence (seq), so
+GET /api/vault/changes?since=0 returns the whole vault.
+Per user: reserve n sequences with one $inc on users.vault_version, then
+number the unsequenced entries oldest-first.
+
+Usage (from backend/):
+  python -m scripts.backfill_vault_seq
+"""
+
+from pymongo import ReturnDocument, UpdateOne
+
+from database import db
+
+def main():
+    user_ids = db.vault_entries.distinct("userId", {"seq": {"$exists": False}})
+    total = 0
+    for uid in user_ids:
+        ids = [d["_id"] for d in db.vault_entries.find(
+            {"userId": uid, "seq": {"$exists": False}}, {"_id": 1}).sort([("createdAt", 1), ("_id", 1)])]
+        if not ids:
+            continue
+        user = db.users.find_one_and_update(
+            {"_id": uid}, {"$inc": {"vault_version": len(ids)}},
+            projection={"vault_version": 1}, return_document=ReturnDocument.AFTER,
+        )
+        if not user:
+            print(f"⚠️ skipping {len(ids)} entries of missing user {uid}")
+            continue
+        first = user["vault_version"] - len(ids) + 1
+        db.vault_entries.bulk_write(
+            [UpdateOne({"_id": _id, "seq": {"$exists": False}}, {"$set": {"seq": first + i}})
+             for i, _id in enumerate(ids)],
+            ordered=False,
+        )
+        total += len(ids)
+    print(f"✅ Sequenced {total} entries across {len(user_ids)} users.")
+
+if __name__ == "__main__":
+    main()
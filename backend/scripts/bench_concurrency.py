@@ -0,0 +1,83 @@
+# backend/scripts/bench_concurrency.py
+"""
+Load benchmark for the DB-bound routes (vault list, /auth/me, story latest).
+Fires N concurrent clients at a running server and reports throughput and
+latency percentiles per concurrency level, so the sync-vs-async routers can be
+compared on the same deployment (run once on each build).
+
+Usage (server already running, user already registered):
+  python -m scripts.bench_concurrency --base http://127.0.0.1:8000 \
+      --username alice --password '...' [--levels 10,50,200] [--seconds 10]
+"""
+
+import argparse, asyncio, statistics, time
+
+import httpx
+
+PATHS = ["/api/vault/", "/auth/me", "/story/latest/me"]
+
+
+async def _login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    r = await client.post("/auth/login", data={"username": username, "password": password})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def _worker(client, headers, deadline, latencies, errors):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            r = await client.get(path, headers=headers)
+            if r.status_code != 200:
+                errors.append(r.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(base: str, token: str, concurrency: int, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        headers = {"Authorization": f"Bearer {token}"}
+        latencies, errors = [], []
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*[_worker(client, headers, deadline, latencies, errors)
+                               for _ in range(concurrency)])
+    lat = sorted(latencies)
+    pct = lambda p: lat[min(len(lat) - 1, int(p * len(lat)))] * 1000 if lat else 0.0
+    return {
+        "concurrency": concurrency,
+        "rps": len(lat) / seconds,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.fmean(lat) * 1000 if lat else 0.0,
+        "errors": len(errors),
+    }
+
+
+async def main(base: str, username: str, password: str, levels, seconds: float):
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        token = await _login(client, username, password)
+    print(f"{'conc':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for n in levels:
+        r = await run_level(base, token, n, seconds)
+        print(f"{r['concurrency']:>6} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base", default="http://127.0.0.1:8000")
+    ap.add_argument("--username", required=True)
+    ap.add_argument("--password", required=True)
+    ap.add_argument("--levels", default="10,50,200", help="comma-separated concurrency levels")
+    ap.add_argument("--seconds", type=float, default=10.0, help="duration per level")
+    args = ap.parse_args()
+    asyncio.run(main(args.base, args.username, args.password,
+                     [int(x) for x in args.levels.split(",")], args.seconds))
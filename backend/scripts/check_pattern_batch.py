@@ -0,0 +1,57 @@
+# backend/scripts/check_pattern_batch.py
+"""
+Parity check for the NumPy batch path of the pattern agent: scan_batch() must
+return exactly what scan() returns for each password. Runs random passwords
+(ASCII, non-ASCII, years, common words, trailing digits / newlines) plus fixed
+edge cases through both and prints the first mismatches. Exits 1 on any
+mismatch, 2 if NumPy is not installed. Nothing touches the database.
+
+Usage (from backend/):
+  python -m scripts.check_pattern_batch [--count 20000] [--seed 0]
+"""
+
+import argparse, random, string, sys
+
+from agents.new_advisor import pattern_agent as pa
+
+EDGE = ["", "1", "\n", "1\n", "a\n", "12\n\n", "pass\n1", "2019", "x1999", "19", "199",
+        "PASSWORD", "QwErTy2020!", "laptop", "lap top", "٣", "abc٣", "ß2020", "test\x00123"]
+
+_ALPHABET = string.ascii_letters + string.digits + string.punctuation + " \n\t"
+_PIECES = sorted(pa.COMMON_WORDS) + ["1999", "2024", "19", "20", "\n", "é", "٣", "🔒"]
+
+
+def _random_password(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 6)):
+        if rng.random() < 0.3:
+            w = rng.choice(_PIECES)
+            parts.append(w.upper() if rng.random() < 0.3 else w)
+        else:
+            parts.append("".join(rng.choices(_ALPHABET, k=rng.randint(0, 8))))
+    return "".join(parts)
+
+
+def main(count: int = 20000, seed: int = 0) -> int:
+    if pa.np is None:
+        print("❌ NumPy is not installed; scan_batch() only uses scan()")
+        return 2
+    rng = random.Random(seed)
+    pwds = EDGE + [_random_password(rng) for _ in range(count)]
+
+    pa.PATTERN_NUMPY_MIN_BATCH = 0   # always take the NumPy path here
+    got = pa.scan_batch(pwds)
+    bad = [(p, g, pa.scan(p)) for p, g in zip(pwds, got) if g != pa.scan(p)]
+
+    for p, g, want in bad[:10]:
+        print(f"❌ {p!r}: batch={g} scan={want}")
+    print(f"{'❌' if bad else '✅'} {len(pwds) - len(bad)}/{len(pwds)} passwords match")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--count", type=int, default=20000, help="random passwords on top of the edge cases")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    sys.exit(main(args.count, args.seed))
@@ -1,20 +1,45 @@
-from pymongo import ASCENDING
+# backend/scripts/create_indexes.py
+"""
+Create / update every index declared in indexes.py (run once per deployment).
+Scans for vault duplicates first, since they would block uniq_user_domain_login.
+The scan streams entries in userId order (the userId-prefixed vault index), one
+user's keys in memory at a time, over parallel userId ranges (scripts/migration.py).
+
+Usage (from backend/):
+  python -m scripts.create_indexes [--force] [--workers 4] [--rate 0]
+"""
+
+import argparse
+
 from database import db
+from indexes import ensure_indexes
+from scripts import migration
 
-def find_dupes():
-    pipeline = [
-        {"$match": {"domain": {"$exists": True, "$type": "string"}}},
-        {"$group": {
-            "_id": {"userId": "$userId", "domain": "$domain", "login": "$login"},
-            "ids": {"$push": "$_id"},
-            "count": {"$sum": 1},
-        }},
-        {"$match": {"count": {"$gt": 1}}}
+def _collect_dupes(batch, state):
+    # a range's entries arrive grouped by user, so only the current user's keys are kept
+    for d in batch:
+        if d["userId"] != state.get("userId"):
+            state["userId"], state["seen"] = d["userId"], {}
+        key = (d["domain"], d.get("login"))
+        first = state["seen"].setdefault(key, d["_id"])
+        if first != d["_id"]:
+            state.setdefault("dupes", {}).setdefault((d["userId"],) + key, [first]).append(d["_id"])
+
+def find_dupes(workers: int = 4, rate: float = 0):
+    states = migration.scan(
+        db.vault_entries, _collect_dupes,
+        query={"domain": {"$exists": True, "$type": "string"}},
+        projection={"userId": 1, "domain": 1, "login": 1},
+        key="userId", workers=workers, rate=rate,
+    )
+    return [
+        {"_id": {"userId": uid, "domain": domain, "login": login}, "ids": ids, "count": len(ids)}
+        for state in states
+        for (uid, domain, login), ids in state.get("dupes", {}).items()
     ]
-    return list(db.vault_entries.aggregate(pipeline))
 
-def main():
-    dupes = find_dupes()
+def main(force: bool = False, workers: int = 4, rate: float = 0):
+    dupes = find_dupes(workers, rate)
     if dupes:
         print("❗ Found duplicates. Resolve these before creating the unique index:")
         for d in dupes[:25]:
@@ -22,15 +47,14 @@ def main():
         print("\nTip: delete/merge those docs, then re-run this script.")
         return
 
-    print("✅ No duplicates detected. Creating unique index...")
-    db.vault_entries.create_index(
-        [("userId", ASCENDING), ("domain", ASCENDING), ("login", ASCENDING)],
-        unique=True,
-        name="uniq_user_domain_login",
-        partialFilterExpression={"domain": {"$exists": True, "$type": "string"}},
-        background=True,
-    )
-    print("✅ Unique index created: uniq_user_domain_login")
+    print("✅ No duplicates detected. Creating indexes...")
+    if not ensure_indexes(db, force=force):
+        print("❗ Some indexes could not be created; see messages above.")
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--force", action="store_true", help="re-check every index even if the stored version matches")
+    ap.add_argument("--workers", type=int, default=4, help="parallel userId ranges for the duplicate scan")
+    ap.add_argument("--rate", type=float, default=0, help="max entries/second for the scan (0 = unthrottled)")
+    args = ap.parse_args()
+    main(args.force, args.workers, args.rate)
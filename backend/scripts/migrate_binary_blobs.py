@@ -0,0 +1,54 @@
+# backend/scripts/migrate_binary_blobs.py
+"""
+Rewrite base64-string blobs as BSON Binary (enc_v 2, see utils/blobs.py).
+
+- vault_entries: salt / iv / ciphertext;  mnemonics: nonce / ciphertext.
+- Runs through scripts/migration.py per collection over documents without
+  enc_v 2: batched unordered bulk updates, parallel _id ranges, checkpoints
+  in migration_checkpoints (resumable), optional throttle.
+- The app reads both forms, so this can run while it is serving.
+- Run `compact` (or an initial sync) afterwards to give the space back to the OS.
+
+Usage (from backend/):
+  python -m scripts.migrate_binary_blobs [--collections vault_entries,mnemonics]
+      [--batch-size 500] [--workers 4] [--rate 0] [--dry-run] [--restart]
+"""
+
+import argparse
+from functools import partial
+
+from pymongo import UpdateOne
+
+from database import db
+from scripts import migration
+from utils.blobs import ENC_V, to_stored
+
+NAME = "binary_blobs_v2"
+FIELDS = {
+    "vault_entries": ("salt", "iv", "ciphertext"),
+    "mnemonics": ("nonce", "ciphertext"),
+}
+
+
+def plan_update(fields, doc: dict) -> UpdateOne:
+    set_fields = {"enc_v": ENC_V}
+    for f in fields:
+        v = doc.get(f)
+        if isinstance(v, str):
+            set_fields[f] = to_stored(v)
+    return UpdateOne({"_id": doc["_id"], "enc_v": {"$ne": ENC_V}}, {"$set": set_fields})
+
+
+def main(collections, **opts):
+    for coll in collections:
+        fields = FIELDS[coll]
+        migration.backfill(f"{NAME}:{coll}", db[coll], partial(plan_update, fields),
+                           query={"enc_v": {"$ne": ENC_V}}, projection={f: 1 for f in fields}, **opts)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--collections", default=",".join(FIELDS))
+    migration.add_arguments(ap)
+    args = ap.parse_args()
+    main([c for c in args.collections.split(",") if c], **migration.options(args))
@@ -0,0 +1,83 @@
+# backend/scripts/migrate_password_hashes.py
+"""
+Classify every account's password hash offline so login needs a single verify.
+
+- Sets users.hash_scheme: pbkdf2_sha256 | pbkdf2_sha256_stale | bcrypt | bcrypt_sha256 | plaintext | unknown
+- Plaintext legacy passwords are hashed right here and the plaintext field removed.
+- Hashes that can only be upgraded with the real password (bcrypt, outdated
+  pbkdf2 rounds) get needs_rehash=True; login rehashes only those accounts.
+- Runs through scripts/migration.py (parallel _id ranges, throttled,
+  checkpointed in migration_checkpoints), so an interrupted run resumes
+  where it stopped.
+
+Usage (from backend/):
+  python -m scripts.migrate_password_hashes [--batch-size 500] [--workers 4] [--rate 0] [--dry-run] [--restart]
+"""
+
+import argparse, threading
+from collections import Counter
+
+from pymongo import UpdateOne
+
+from database import db
+from auth_utils import classify_hash, hash_password, CURRENT_SCHEME
+from scripts import migration
+
+NAME = "password_hashes_v1"
+PROJECTION = {"password_hash": 1, "password": 1, "hash_scheme": 1, "needs_rehash": 1}
+REHASH_AT_LOGIN = {"pbkdf2_sha256_stale", "bcrypt", "bcrypt_sha256"}
+
+
+def plan_update(doc: dict):
+    """Return an UpdateOne for this account, or None if it is already in the target state."""
+    scheme = classify_hash(doc.get("password_hash"))
+    plaintext = doc.get("password")
+    set_fields, unset_fields = {}, {}
+
+    if scheme in ("missing", "unknown") and isinstance(plaintext, str) and plaintext:
+        set_fields["password_hash"] = hash_password(plaintext)
+        scheme = "plaintext"
+    if plaintext is not None and scheme != "unknown":
+        unset_fields["password"] = ""
+
+    needs_rehash = scheme in REHASH_AT_LOGIN
+    if doc.get("hash_scheme") != scheme:
+        set_fields["hash_scheme"] = scheme
+    if needs_rehash and not doc.get("needs_rehash"):
+        set_fields["needs_rehash"] = True
+    if not needs_rehash and "needs_rehash" in doc:
+        unset_fields["needs_rehash"] = ""
+
+    if not set_fields and not unset_fields:
+        return None, scheme
+    ops = {}
+    if set_fields:
+        ops["$set"] = set_fields
+    if unset_fields:
+        ops["$unset"] = unset_fields
+    return UpdateOne({"_id": doc["_id"]}, ops), scheme
+
+
+def main(**opts):
+    schemes: Counter = Counter()   # this run only
+    lock = threading.Lock()
+
+    def plan(doc: dict):
+        op, scheme = plan_update(doc)
+        with lock:
+            schemes[scheme] += 1
+        return op
+
+    migration.backfill(NAME, db.users, plan, projection=PROJECTION, **opts)
+    print(f"Schemes seen this run: {dict(schemes)}")
+    if opts.get("dry_run"):
+        return
+    print(f"Accounts rehashed at next login: {db.users.count_documents({'needs_rehash': True})}")
+    if db.users.count_documents({"hash_scheme": "unknown"}):
+        print("❗ Some accounts have an unrecognised hash and cannot log in; inspect hash_scheme='unknown'.")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    migration.add_arguments(ap)
+    main(**migration.options(ap.parse_args()))
@@ -0,0 +1,176 @@
+# backend/scripts/migration.py
+"""
+🧰 Shared machinery for maintenance scripts that walk a whole collection.
+- Projected cursor in key order, cut into batches; each batch becomes one
+  unordered bulk_write, so memory stays at one batch per worker.
+- The key space is split into --workers ranges (ObjectId keys by their
+  timestamp) that run in parallel threads.
+- backfill() checkpoints the last _id of every range in migration_checkpoints
+  after each batch: an interrupted run resumes per range, a finished one is
+  skipped until --restart.
+- --rate caps documents per second over all workers (0 = unthrottled).
+- --dry-run plans and counts every write without writing (or checkpointing).
+- scan() walks the same ranges read-only (no checkpoint).
+"""
+
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from database import db
+
+
+def add_arguments(ap, batch_size: int = 500, workers: int = 4):
+    ap.add_argument("--batch-size", type=int, default=batch_size)
+    ap.add_argument("--workers", type=int, default=workers, help="parallel key ranges")
+    ap.add_argument("--rate", type=float, default=0, help="max documents/second over all workers (0 = unthrottled)")
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+
+
+def options(args) -> Dict[str, Any]:
+    return {"batch_size": args.batch_size, "workers": args.workers, "rate": args.rate,
+            "dry_run": args.dry_run, "restart": args.restart}
+
+
+def split_ranges(coll, query: dict, key: str, parts: int) -> List[Tuple[Any, Any]]:
+    """[lo, hi) bounds of `key` covering every matching document (None = open end)."""
+    first = coll.find_one(query, {key: 1}, sort=[(key, 1)])
+    last = coll.find_one(query, {key: 1}, sort=[(key, -1)])
+    if not first or not last:
+        return []
+    lo, hi = first.get(key), last.get(key)
+    if parts <= 1 or not isinstance(lo, ObjectId) or not isinstance(hi, ObjectId):
+        return [(None, None)]
+    t0 = lo.generation_time.timestamp()
+    step = (hi.generation_time.timestamp() + 1 - t0) / parts
+    cuts = [ObjectId.from_datetime(datetime.fromtimestamp(t0 + step * i, timezone.utc)) for i in range(1, parts)]
+    bounds = [None] + cuts + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class _Throttle:
+    """Shared pacing: each batch books its slot on one timeline."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self, n: int):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + n / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+def _batches(coll, query: dict, projection: Optional[dict], key: str, lo, hi, after,
+             batch_size: int, sort: Optional[list] = None):
+    q = dict(query)
+    cond: Dict[str, Any] = {}
+    if lo is not None:
+        cond["$gte"] = lo
+    if hi is not None:
+        cond["$lt"] = hi
+    if after is not None:
+        cond["$gt"] = after
+    if cond:
+        q[key] = cond
+    if projection is not None:
+        projection = {**projection, key: 1}
+    cursor = coll.find(q, projection).sort(sort or [(key, 1)]).batch_size(batch_size)
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def backfill(name: str, coll, plan: Callable[[dict], Any], *, query: Optional[dict] = None,
+             projection: Optional[dict] = None, batch_size: int = 500, workers: int = 4,
+             rate: float = 0, dry_run: bool = False, restart: bool = False) -> Dict[str, int]:
+    """
+    Run plan(doc) -> write op (UpdateOne, ...) or None over every document
+    matching query, in _id ranges. Returns this run's {"seen", "changed"}.
+    """
+    query = query or {}
+    ckpts = db.migration_checkpoints
+    ckpt = None if restart else ckpts.find_one({"_id": name})
+    if ckpt and ckpt.get("done"):
+        print(f"✅ {name} already finished ({ckpt.get('totals')}); use --restart to run it again.")
+        return {"seen": 0, "changed": 0}
+
+    if ckpt and ckpt.get("ranges"):
+        ranges = ckpt["ranges"]
+        print(f"… resuming {name} over {len(ranges)} ranges")
+    else:
+        ranges = [{"lo": lo, "hi": hi, "lastId": None, "done": False}
+                  for lo, hi in split_ranges(coll, query, "_id", workers)]
+        if not dry_run:
+            ckpts.replace_one({"_id": name}, {
+                "ranges": ranges, "totals": {"seen": 0, "changed": 0}, "done": False,
+                "startedAt": datetime.now(timezone.utc),
+            }, upsert=True)
+
+    totals = {"seen": 0, "changed": 0}
+    lock = threading.Lock()
+    throttle = _Throttle(rate)
+
+    def run_range(i: int, r: dict):
+        if r.get("done"):
+            return
+        for batch in _batches(coll, query, projection, "_id", r["lo"], r["hi"], r.get("lastId"), batch_size):
+            throttle.wait(len(batch))
+            ops = [op for op in map(plan, batch) if op is not None]
+            if ops and not dry_run:
+                coll.bulk_write(ops, ordered=False)
+            if not dry_run:
+                ckpts.update_one({"_id": name}, {
+                    "$set": {f"ranges.{i}.lastId": batch[-1]["_id"], "updatedAt": datetime.now(timezone.utc)},
+                    "$inc": {"totals.seen": len(batch), "totals.changed": len(ops)},
+                })
+            with lock:
+                totals["seen"] += len(batch)
+                totals["changed"] += len(ops)
+                print(f"… {name} range {i} up to {batch[-1]['_id']}: {totals}")
+        if not dry_run:
+            ckpts.update_one({"_id": name}, {"$set": {f"ranges.{i}.done": True}})
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(run_range, range(len(ranges)), ranges))   # re-raises a worker's error
+
+    if not dry_run:
+        ckpts.update_one({"_id": name}, {"$set": {"done": True, "updatedAt": datetime.now(timezone.utc)}})
+    print(("Dry run " if dry_run else "✅ ") + f"{name}: {totals}")
+    return totals
+
+
+def scan(coll, visit: Callable[[List[dict], dict], None], *, query: Optional[dict] = None,
+         projection: Optional[dict] = None, key: str = "_id", sort: Optional[list] = None,
+         batch_size: int = 1000, workers: int = 4, rate: float = 0) -> List[dict]:
+    """
+    Read-only walk: visit(batch, state) per batch, with one state dict per
+    range (its batches arrive in key order). Returns the states.
+    """
+    query = query or {}
+    throttle = _Throttle(rate)
+
+    def run_range(bounds) -> dict:
+        state: dict = {}
+        for batch in _batches(coll, query, projection, key, bounds[0], bounds[1], None, batch_size, sort):
+            throttle.wait(len(batch))
+            visit(batch, state)
+        return state
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(run_range, split_ranges(coll, query, key, workers)))
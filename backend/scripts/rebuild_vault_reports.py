@@ -0,0 +1,63 @@
+# backend/scripts/rebuild_vault_reports.py
+"""
+Recompute every vault_reports document from vault_entries (repairs drift in
+the incrementally maintained reports; older vaults also get theirs built on
+first use).
+Streams entries in userId order over parallel userId ranges
+(scripts/migration.py) and replaces one report per user; reports of users
+that no longer have entries are removed. Writes racing with the rebuild can
+be lost for that user; run it at a quiet time or re-run it.
+
+Usage (from backend/):
+  python -m scripts.rebuild_vault_reports [--workers 4] [--rate 0] [--dry-run]
+"""
+
+import argparse, threading
+from datetime import datetime, timezone
+
+from database import db
+from scripts import migration
+import vault_report
+
+
+def main(workers: int = 4, rate: float = 0, dry_run: bool = False):
+    started = datetime.now(timezone.utc)
+    written = [0]
+    lock = threading.Lock()
+
+    def save(user_id, deltas):
+        doc = vault_report.fold(vault_report.combine(deltas))
+        doc["updatedAt"] = doc["rebuiltAt"] = datetime.now(timezone.utc)
+        if not dry_run:
+            db.vault_reports.replace_one({"_id": user_id}, doc, upsert=True)
+        with lock:
+            written[0] += 1
+
+    def visit(batch, state):
+        for d in batch:
+            if d["userId"] != state.get("userId"):
+                if state.get("deltas"):
+                    save(state["userId"], state["deltas"])
+                state["userId"], state["deltas"] = d["userId"], []
+            state["deltas"].append(vault_report.delta(d))
+
+    states = migration.scan(db.vault_entries, visit, projection={"userId": 1, **vault_report.REPORT_FIELDS},
+                            key="userId", workers=workers, rate=rate)
+    for state in states:   # each range's last user
+        if state.get("deltas"):
+            save(state["userId"], state["deltas"])
+
+    stale = 0
+    if not dry_run:
+        # neither rebuilt nor written to since the start: that user has no entries left
+        stale = db.vault_reports.delete_many({"updatedAt": {"$lt": started}}).deleted_count
+    print(("Dry run: " if dry_run else "✅ ") + f"{written[0]} reports rebuilt, {stale} stale removed.")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4, help="parallel userId ranges")
+    ap.add_argument("--rate", type=float, default=0, help="max entries/second (0 = unthrottled)")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+    main(args.workers, args.rate, args.dry_run)
@@ -0,0 +1,70 @@
+# backend/tests/conftest.py
+"""
+Shared test setup.
+- backend/ goes on sys.path, so tests import modules the way the app does.
+- `acoll` hands out in-memory collections (mongomock) behind the async
+  driver's call shape, for the repositories / modules that take a collection.
+  Pipeline updates ($set stages) are not supported there; tests seed such
+  fields directly.
+Run from backend/:  python -m pytest -q tests
+"""
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mongomock
+import pytest
+
+
+class AsyncCursor:
+    def __init__(self, cur):
+        self.cur = cur
+
+    def sort(self, *args, **kwargs):
+        self.cur = self.cur.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self.cur = self.cur.limit(n)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    async def to_list(self, length=None):
+        docs = list(self.cur)
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.cur:
+                yield doc
+        return gen()
+
+
+class AsyncCollection:
+    """The subset of AsyncCollection the code under test calls, over a mongomock collection."""
+
+    def __init__(self, coll):
+        self.sync = coll
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self.sync.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        fn = getattr(self.sync, name)
+
+        async def call(*args, **kwargs):
+            return fn(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def mongo():
+    return mongomock.MongoClient()["password_safety_ai"]
+
+
+@pytest.fixture
+def acoll(mongo):
+    return lambda name: AsyncCollection(mongo[name])
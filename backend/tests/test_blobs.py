@@ -0,0 +1,52 @@
+# backend/tests/test_blobs.py
+import base64, os
+
+import pytest
+
+from utils.blobs import as_bytes, to_b64, to_stored
+
+
+@pytest.mark.parametrize("raw", [b"", b"\x00", os.urandom(12), os.urandom(16), os.urandom(1000)])
+def test_base64_round_trips_through_bytes(raw):
+    text = base64.b64encode(raw).decode()
+    stored = to_stored(text)
+    assert stored == raw and isinstance(stored, bytes)
+    assert to_b64(stored) == text
+
+
+@pytest.mark.parametrize("text", [
+    "not base64!",
+    "QUJD\n",       # embedded newline: would not come back identical
+    "QUI",          # missing padding
+    "QUI=\n",
+    "QUJ=",         # non-canonical padding bits
+])
+def test_anything_that_would_not_round_trip_stays_text(text):
+    assert to_stored(text) == text
+    assert to_b64(to_stored(text)) == text
+
+
+def test_none_and_bytes_pass_through():
+    assert to_stored(None) is None
+    assert to_b64(None) is None
+    assert to_stored(b"ab") == b"ab"
+
+
+def test_readers_accept_both_generations():
+    raw = os.urandom(32)
+    legacy = base64.b64encode(raw).decode()   # documents from before enc_v 2
+    assert as_bytes(legacy) == as_bytes(raw) == raw
+    assert to_b64(legacy) == to_b64(raw) == legacy
+    assert as_bytes(bytearray(raw)) == raw
+
+
+def test_vault_entry_stores_bytes_and_serves_the_same_base64():
+    from bson import ObjectId
+    import vault_routes
+
+    enc = {k: base64.b64encode(os.urandom(n)).decode() for k, n in (("salt", 16), ("iv", 12), ("ciphertext", 48))}
+    doc = vault_routes._build_doc(ObjectId(), vault_routes.VaultIn(label="x", **enc), seq=1)
+    assert all(isinstance(doc[k], bytes) for k in enc)
+    assert doc["enc_v"] == 2
+    out = vault_routes._serialize({**doc, "_id": ObjectId()})
+    assert {k: out[k] for k in enc} == enc
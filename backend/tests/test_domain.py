@@ -0,0 +1,72 @@
+# backend/tests/test_domain.py
+import pytest
+
+from utils.domain import normalize_domain, reverse_domain, site_for
+from utils.psl import registrable_domain
+
+
+@pytest.mark.parametrize("raw, domain", [
+    ("https://www.Example.COM:8443/login?x=1", "example.com"),
+    ("accounts.google.com", "accounts.google.com"),
+    ("xn--bcher-kva.de", "bücher.de"),
+    ("", ""),
+])
+def test_normalize_domain(raw, domain):
+    assert normalize_domain(raw) == domain
+
+
+@pytest.mark.parametrize("domain, reversed_", [
+    ("accounts.google.com", "com.google.accounts"),
+    ("google.com", "com.google"),
+    ("localhost", "localhost"),
+    ("", ""),
+])
+def test_reverse_domain(domain, reversed_):
+    assert reverse_domain(domain) == reversed_
+
+
+def test_reverse_domain_is_its_own_inverse():
+    assert reverse_domain(reverse_domain("a.b.example.co.uk")) == "a.b.example.co.uk"
+
+
+@pytest.mark.parametrize("host, under", [
+    ("accounts.google.com", True),
+    ("a.b.google.com", True),
+    ("google.com", True),
+    ("notgoogle.com", False),
+    ("google.com.evil.io", False),
+])
+def test_subdomains_share_the_reversed_prefix(host, under):
+    # the index range /suggest queries: rdomain == base, or base + "." <= rdomain < base + "/"
+    base, rd = reverse_domain("google.com"), reverse_domain(host)
+    assert (rd == base or base + "." <= rd < base + "/") is under
+
+
+@pytest.mark.parametrize("host, site", [
+    ("login.example.co.uk", "example.co.uk"),     # multi-label ICANN suffix
+    ("example.co.uk", "example.co.uk"),
+    ("https://www.Example.COM:8443/x", "example.com"),
+    ("user1.github.io", "user1.github.io"),       # private section: users stay separate
+    ("a.b.kawasaki.jp", "a.b.kawasaki.jp"),       # wildcard rule *.kawasaki.jp
+    ("city.kawasaki.jp", "city.kawasaki.jp"),     # exception rule !city.kawasaki.jp
+    ("x.www.ck", "www.ck"),                       # exception !www.ck under *.ck
+    ("foo.unknowntld", "foo.unknowntld"),         # implicit "*" rule
+    ("xn--bcher-kva.de", "bücher.de"),
+])
+def test_site_for(host, site):
+    assert site_for(host) == site
+
+
+@pytest.mark.parametrize("host", ["co.uk", "github.io", "localhost", "192.168.1.10", "[::1]", ""])
+def test_no_site_for_suffixes_ips_and_single_labels(host):
+    assert site_for(host) == ""
+
+
+def test_subdomains_and_their_parent_share_a_site():
+    assert site_for("login.example.co.uk") == site_for("example.co.uk") == site_for("a.b.example.co.uk")
+    assert site_for("user1.github.io") != site_for("user2.github.io")
+
+
+def test_registrable_domain_ignores_a_trailing_dot():
+    # site_for lowercases first; registrable_domain takes normalized hosts
+    assert registrable_domain("login.example.co.uk.") == "example.co.uk"
@@ -0,0 +1,90 @@
+# backend/tests/test_rate_limit.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import rate_limit as rl
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(rl, "time", SimpleNamespace(monotonic=c.monotonic))
+    return c
+
+
+def test_parse_rate():
+    assert rl._parse_rate("5/60") == (5.0, 5 / 60)
+
+
+def test_burst_then_refuse_with_retry_after(clock):
+    lim = rl.TokenBucketLimiter(shards=4)
+    assert [lim.take("k", 3, 1.0)[0] for _ in range(3)] == [True] * 3
+    allowed, retry = lim.take("k", 3, 1.0)
+    assert not allowed and retry == pytest.approx(1.0)
+
+
+def test_refill_is_proportional_to_elapsed_time(clock):
+    lim = rl.TokenBucketLimiter()
+    for _ in range(2):
+        lim.take("k", 2, 0.5)          # empty: one token every 2s
+    clock.now += 1.0
+    allowed, retry = lim.take("k", 2, 0.5)
+    assert not allowed and retry == pytest.approx(1.0)
+    clock.now += 1.0
+    assert lim.take("k", 2, 0.5)[0]
+    assert not lim.take("k", 2, 0.5)[0]
+
+
+def test_refill_never_exceeds_the_burst(clock):
+    lim = rl.TokenBucketLimiter()
+    lim.take("k", 2, 1.0)
+    clock.now += 3600
+    assert [lim.take("k", 2, 1.0)[0] for _ in range(3)] == [True, True, False]
+
+
+def test_refused_calls_do_not_consume(clock):
+    lim = rl.TokenBucketLimiter()
+    lim.take("k", 1, 1.0)
+    for _ in range(5):
+        assert not lim.take("k", 1, 1.0)[0]
+    clock.now += 1.0
+    assert lim.take("k", 1, 1.0)[0]
+
+
+def test_keys_are_independent(clock):
+    lim = rl.TokenBucketLimiter()
+    assert lim.take("a", 1, 0.1)[0]
+    assert not lim.take("a", 1, 0.1)[0]
+    assert lim.take("b", 1, 0.1)[0]
+
+
+def test_each_shard_keeps_only_its_most_recent_keys(clock):
+    lim = rl.TokenBucketLimiter(shards=1, max_keys_per_shard=2)
+    lim.take("a", 1, 0.1)
+    lim.take("b", 1, 0.1)
+    lim.take("a", 1, 0.1)               # a is now most recent
+    lim.take("c", 1, 0.1)               # evicts b
+    buckets = lim._shards[0][1]
+    assert list(buckets) == ["a", "c"]
+    assert lim.take("b", 1, 0.1)[0]     # forgotten key starts with a full bucket
+
+
+def test_enforce_raises_429_with_retry_after(clock, monkeypatch):
+    monkeypatch.setattr(rl, "_local", rl.TokenBucketLimiter())
+    monkeypatch.setattr(rl, "_shared", None)
+    asyncio.run(rl.enforce("login", "ip", "1.2.3.4", (1, 0.25)))
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(rl.enforce("login", "ip", "1.2.3.4", (1, 0.25)))
+    assert e.value.status_code == 429
+    assert e.value.headers["Retry-After"] == "4"
@@ -0,0 +1,111 @@
+# backend/tests/test_refresh_tokens.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+import refresh_tokens as rt
+
+
+@pytest.fixture
+def tokens(monkeypatch, acoll):
+    coll = acoll("refresh_tokens")
+    monkeypatch.setattr(rt, "RT_COLL", coll)
+    return coll.sync
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def age_rotations(tokens, seconds):
+    past = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+    tokens.update_many({"usedAt": {"$ne": None}}, {"$set": {"usedAt": past}})
+
+
+def test_rotation_consumes_the_token_and_stays_in_the_family(tokens):
+    uid = ObjectId()
+    t0 = run(rt.issue_refresh_token(uid))
+    got_uid, t1 = run(rt.rotate_refresh_token(t0, "dev"))
+    assert got_uid == uid and t1 != t0
+    fam = {d["family"] for d in tokens.find()}
+    assert len(fam) == 1
+    assert tokens.find_one({"_id": rt._digest(t0)})["usedAt"] is not None
+    assert run(rt.rotate_refresh_token(t1, "dev"))[0] == uid
+
+
+def test_only_hashes_are_stored(tokens):
+    raw = run(rt.issue_refresh_token(ObjectId()))
+    assert tokens.find_one({"_id": raw}) is None
+    assert tokens.find_one({"_id": rt._digest(raw)}) is not None
+
+
+def test_unknown_token_is_rejected(tokens):
+    assert run(rt.rotate_refresh_token("nope", "dev")) is None
+
+
+def test_same_device_within_grace_gets_the_same_successor(tokens):
+    t0 = run(rt.issue_refresh_token(ObjectId()))
+    a = run(rt.rotate_refresh_token(t0, "dev"))
+    b = run(rt.rotate_refresh_token(t0, "dev"))
+    assert a == b
+    assert tokens.count_documents({"revoked": True}) == 0
+
+
+def test_grace_refuses_once_the_successor_moved_on_without_revoking(tokens):
+    t0 = run(rt.issue_refresh_token(ObjectId()))
+    _, t1 = run(rt.rotate_refresh_token(t0, "dev"))
+    _, t2 = run(rt.rotate_refresh_token(t1, "dev"))
+    assert run(rt.rotate_refresh_token(t0, "dev")) is None
+    assert run(rt.rotate_refresh_token(t2, "dev")) is not None   # family still alive
+
+
+@pytest.mark.parametrize("device", [None, "thief"])
+def test_reuse_from_another_device_revokes_the_family(tokens, device):
+    t0 = run(rt.issue_refresh_token(ObjectId()))
+    _, t1 = run(rt.rotate_refresh_token(t0, "dev"))
+    assert run(rt.rotate_refresh_token(t0, device)) is None
+    assert tokens.count_documents({"revoked": False}) == 0
+    assert run(rt.rotate_refresh_token(t1, "dev")) is None
+
+
+def test_rotation_without_device_id_has_no_grace(tokens):
+    t0 = run(rt.issue_refresh_token(ObjectId()))
+    run(rt.rotate_refresh_token(t0))
+    assert run(rt.rotate_refresh_token(t0)) is None
+    assert tokens.count_documents({"revoked": False}) == 0
+
+
+def test_reuse_after_the_grace_window_revokes_the_family(tokens):
+    t0 = run(rt.issue_refresh_token(ObjectId()))
+    run(rt.rotate_refresh_token(t0, "dev"))
+    age_rotations(tokens, rt.REUSE_GRACE.total_seconds() + 5)
+    assert run(rt.rotate_refresh_token(t0, "dev")) is None
+    assert tokens.count_documents({"revoked": False}) == 0
+
+
+def test_expired_token_is_rejected(tokens):
+    t0 = run(rt.issue_refresh_token(ObjectId()))
+    tokens.update_many({}, {"$set": {"expiresAt": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+    assert run(rt.rotate_refresh_token(t0, "dev")) is None
+
+
+def test_families_are_independent(tokens):
+    uid = ObjectId()
+    web = run(rt.issue_refresh_token(uid))
+    ext = run(rt.issue_refresh_token(uid))
+    run(rt.rotate_refresh_token(web, "dev"))
+    run(rt.rotate_refresh_token(web, "thief"))   # web family revoked
+    assert run(rt.rotate_refresh_token(ext, "ext")) is not None
+
+
+def test_logout_and_revoke_all(tokens):
+    uid = ObjectId()
+    a = run(rt.issue_refresh_token(uid))
+    b = run(rt.issue_refresh_token(uid))
+    run(rt.revoke_refresh_token(a))
+    assert run(rt.rotate_refresh_token(a, "dev")) is None
+    assert run(rt.rotate_refresh_token(b, "dev")) is not None
+    run(rt.revoke_user_refresh_tokens(uid))
+    assert tokens.count_documents({"revoked": False}) == 0
@@ -0,0 +1,86 @@
+# backend/tests/test_token_revocation.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+import token_revocation as tr
+from auth_utils import create_access_token, decode_token
+
+
+@pytest.fixture(autouse=True)
+def denylist(monkeypatch, acoll):
+    # fresh in-memory state, writes to an in-memory collection, no background sync
+    monkeypatch.setattr(tr, "_jtis", {})
+    monkeypatch.setattr(tr, "_cutoffs", {})
+    monkeypatch.setattr(tr, "_maybe_sync", lambda: None)
+    monkeypatch.setattr(tr, "RV_ACOLL", acoll("revoked_tokens"))
+
+
+def claims_for(uid: str) -> dict:
+    return decode_token(create_access_token({"sub": uid}))
+
+
+def test_revoked_jti_is_rejected_and_others_are_not():
+    uid = str(ObjectId())
+    a, b = claims_for(uid), claims_for(uid)
+    asyncio.run(tr.revoke_token(a))
+    assert tr.is_revoked(a)
+    assert not tr.is_revoked(b)
+
+
+def test_token_without_jti_cannot_be_revoked_singly():
+    asyncio.run(tr.revoke_token({"sub": "x"}))
+    assert tr._jtis == {}
+
+
+def test_revoke_all_rejects_tokens_minted_before_it():
+    uid = str(ObjectId())
+    before = claims_for(uid)
+    other = claims_for(str(ObjectId()))
+    asyncio.run(tr.revoke_all_for_user(uid))
+    assert tr.is_revoked(before)
+    assert not tr.is_revoked(other)
+
+
+def test_revoke_all_catches_a_token_from_the_same_millisecond():
+    uid = str(ObjectId())
+    stolen = claims_for(uid)
+    cutoff = asyncio.run(tr.revoke_all_for_user(uid))
+    stolen["iat_ms"] = cutoff   # minted in the very millisecond of the revoke-all
+    assert tr.is_revoked(stolen)
+
+
+def test_replacement_tokens_minted_after_the_cutoff_survive():
+    uid = str(ObjectId())
+    cutoff = asyncio.run(tr.revoke_all_for_user(uid))
+    fresh = decode_token(create_access_token({"sub": uid}, issued_after_ms=cutoff))   # as change-password does
+    assert fresh["iat_ms"] > cutoff
+    assert not tr.is_revoked(fresh)
+
+
+def test_cutoff_is_compared_in_milliseconds():
+    uid = str(ObjectId())
+    tr._remember({"userId": ObjectId(uid), "beforeMs": 1_700_000_000_500,
+                  "expiresAt": datetime.now(timezone.utc) + timedelta(minutes=5)})
+    assert tr.is_revoked({"sub": uid, "iat": 1_700_000_000, "iat_ms": 1_700_000_000_500})
+    assert not tr.is_revoked({"sub": uid, "iat": 1_700_000_000, "iat_ms": 1_700_000_000_501})
+    # no iat_ms: counts as minted at the start of its iat second
+    assert tr.is_revoked({"sub": uid, "iat": 1_700_000_000})
+
+
+def test_cutoff_documents_in_seconds_are_still_read():
+    uid = str(ObjectId())
+    tr._remember({"userId": ObjectId(uid), "before": 1_700_000_000,
+                  "expiresAt": datetime.now(timezone.utc) + timedelta(minutes=5)})
+    assert tr.is_revoked({"sub": uid, "iat_ms": 1_700_000_000_000})
+    assert not tr.is_revoked({"sub": uid, "iat_ms": 1_700_000_000_001})
+
+
+def test_a_later_cutoff_wins_an_earlier_one_does_not():
+    uid = str(ObjectId())
+    exp = datetime.now(timezone.utc) + timedelta(minutes=5)
+    tr._remember({"userId": ObjectId(uid), "beforeMs": 2000, "expiresAt": exp})
+    tr._remember({"userId": ObjectId(uid), "beforeMs": 1000, "expiresAt": exp})
+    assert tr._cutoffs[uid][0] == 2000
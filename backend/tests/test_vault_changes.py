@@ -0,0 +1,116 @@
+# backend/tests/test_vault_changes.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import vault_routes
+from repositories import UsersRepo, VaultEntriesRepo, VaultTombstonesRepo, VAULT_PENDING_TIMEOUT_SECONDS
+
+
+@pytest.fixture
+def vault(monkeypatch, acoll):
+    """GET /changes for one user over in-memory collections."""
+    cols = {n: acoll(n) for n in ("users", "vault_entries", "vault_tombstones")}
+    monkeypatch.setattr(vault_routes, "users", UsersRepo(cols["users"]))
+    monkeypatch.setattr(vault_routes, "vault_entries", VaultEntriesRepo(cols["vault_entries"]))
+    monkeypatch.setattr(vault_routes, "vault_tombstones", VaultTombstonesRepo(cols["vault_tombstones"]))
+    uid = ObjectId()
+    cols["users"].sync.insert_one({"_id": uid, "vault_version": 0, "vault_pending": []})
+
+    app = FastAPI()
+    app.include_router(vault_routes.router, prefix="/api/vault")
+    app.dependency_overrides[vault_routes.get_vault_user] = lambda: {"id": str(uid), "vault_version": 0}
+    client = TestClient(app)
+
+    class Vault:
+        def upsert(self, seq):
+            cols["vault_entries"].sync.insert_one({"_id": ObjectId(), "userId": uid, "label": f"s{seq}", "seq": seq})
+
+        def delete(self, seq):
+            cols["vault_tombstones"].sync.insert_one({"userId": uid, "entryId": ObjectId(), "seq": seq,
+                                                      "deletedAt": datetime.now(timezone.utc)})
+
+        def state(self, version, pending=(), pending_age=0):
+            at = datetime.now(timezone.utc) - timedelta(seconds=pending_age)
+            cols["users"].sync.update_one({"_id": uid}, {"$set": {
+                "vault_version": version, "vault_pending": [{"s": s, "at": at} for s in pending]}})
+
+        def changes(self, since=0, limit=100):
+            r = client.get("/api/vault/changes", params={"since": since, "limit": limit})
+            assert r.status_code == 200, r.text
+            body = r.json()
+            seqs = sorted([("u", u["seq"]) for u in body["upserts"]] + [("d", d["seq"]) for d in body["deletes"]],
+                          key=lambda x: x[1])
+            return seqs, body, r.headers
+
+    return Vault()
+
+
+def test_upserts_and_deletes_come_back_merged_in_seq_order(vault):
+    for s in (1, 3, 4):
+        vault.upsert(s)
+    for s in (2, 5):
+        vault.delete(s)
+    vault.state(5)
+    seqs, body, _ = vault.changes()
+    assert seqs == [("u", 1), ("d", 2), ("u", 3), ("u", 4), ("d", 5)]
+    assert body["next_since"] == 5 and body["has_more"] is False
+
+
+def test_pages_split_across_both_collections_without_gaps(vault):
+    for s in (1, 2, 5, 6):
+        vault.upsert(s)
+    for s in (3, 4, 7):
+        vault.delete(s)
+    vault.state(7)
+    seen, since = [], 0
+    while True:
+        seqs, body, _ = vault.changes(since, limit=2)
+        seen += seqs
+        since = body["next_since"]
+        if not body["has_more"]:
+            break
+    assert [s for _, s in seen] == list(range(1, 8))
+
+
+def test_in_flight_write_bounds_the_feed(vault):
+    # seq 2 reserved but not committed; 3 already landed
+    vault.upsert(1)
+    vault.upsert(3)
+    vault.state(3, pending=[2])
+    seqs, body, headers = vault.changes()
+    assert seqs == [("u", 1)]
+    assert body["next_since"] == 1
+    assert headers["cache-control"] == "no-store"   # partial view is never cached
+
+    vault.upsert(2)
+    vault.state(3)
+    seqs, body, headers = vault.changes(since=body["next_since"])
+    assert seqs == [("u", 2), ("u", 3)]
+    assert "etag" in headers
+
+
+def test_lowest_pending_seq_wins(vault):
+    for s in (1, 2, 4):
+        vault.upsert(s)
+    vault.state(5, pending=[5, 3])
+    seqs, _, _ = vault.changes()
+    assert [s for _, s in seqs] == [1, 2]
+
+
+def test_abandoned_reservations_stop_blocking_after_the_timeout(vault):
+    vault.upsert(1)
+    vault.upsert(3)
+    vault.state(3, pending=[2], pending_age=VAULT_PENDING_TIMEOUT_SECONDS + 5)
+    seqs, _, _ = vault.changes()
+    assert [s for _, s in seqs] == [1, 3]
+
+
+def test_nothing_new_keeps_next_since(vault):
+    vault.upsert(1)
+    vault.state(1)
+    _, body, _ = vault.changes(since=1)
+    assert body["upserts"] == [] and body["deletes"] == [] and body["next_since"] == 1
@@ -0,0 +1,98 @@
+# backend/tests/test_vault_pagination.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+import vault_routes
+from repositories import VaultEntriesRepo
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def entries(monkeypatch, acoll):
+    coll = acoll("vault_entries")
+    monkeypatch.setattr(vault_routes, "vault_entries", VaultEntriesRepo(coll))
+    return coll.sync
+
+
+def seed(entries, user_id, created):
+    """One entry per createdAt (ms precision, as Mongo stores it); returns their ids."""
+    ids = []
+    for i, ts in enumerate(created):
+        oid = ObjectId()
+        entries.insert_one({"_id": oid, "userId": user_id, "label": f"e{i}", "domain": f"e{i}.com",
+                            "createdAt": ts})
+        ids.append(oid)
+    return ids
+
+
+def walk(user_id, limit):
+    user = {"id": str(user_id)}
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(vault_routes.list_page(user, limit, cursor))
+        pages.append([e["id"] for e in page["entries"]])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_cursor_round_trip():
+    oid = ObjectId()
+    ts = T0 + timedelta(milliseconds=123)
+    assert vault_routes._decode_cursor(vault_routes._encode_cursor({"createdAt": ts, "_id": oid})) == (ts, oid)
+
+
+def test_cursor_accepts_naive_utc_datetimes():
+    oid = ObjectId()
+    cur = vault_routes._encode_cursor({"createdAt": T0.replace(tzinfo=None), "_id": oid})
+    assert vault_routes._decode_cursor(cur) == (T0, oid)
+
+
+@pytest.mark.parametrize("bad", ["", "!!!", "bm90LWEtY3Vyc29y", "MTIzOm5vdC1hbi1pZA"])
+def test_malformed_cursor_is_a_400(bad):
+    with pytest.raises(HTTPException) as e:
+        vault_routes._decode_cursor(bad)
+    assert e.value.status_code == 400
+
+
+def test_pages_cover_every_entry_once_newest_first(entries):
+    uid = ObjectId()
+    ids = seed(entries, uid, [T0 + timedelta(seconds=i) for i in range(7)])
+    pages = walk(uid, 3)
+    assert [len(p) for p in pages] == [3, 3, 1]
+    assert sum(pages, []) == [str(i) for i in reversed(ids)]
+
+
+def test_exact_multiple_of_the_page_size_ends_without_an_empty_page(entries):
+    uid = ObjectId()
+    seed(entries, uid, [T0 + timedelta(seconds=i) for i in range(4)])
+    assert [len(p) for p in walk(uid, 2)] == [2, 2]
+
+
+def test_ties_on_created_at_are_broken_by_id(entries):
+    uid = ObjectId()
+    ids = seed(entries, uid, [T0] * 5)
+    flat = sum(walk(uid, 2), [])
+    assert flat == [str(i) for i in sorted(ids, reverse=True)]
+
+
+def test_other_users_entries_never_show(entries):
+    uid = ObjectId()
+    seed(entries, ObjectId(), [T0] * 3)
+    mine = seed(entries, uid, [T0 + timedelta(seconds=1)])
+    assert walk(uid, 10) == [[str(mine[0])]]
+
+
+def test_entries_added_during_the_walk_do_not_shift_later_pages(entries):
+    uid = ObjectId()
+    ids = seed(entries, uid, [T0 + timedelta(seconds=i) for i in range(4)])
+    user = {"id": str(uid)}
+    first = asyncio.run(vault_routes.list_page(user, 2))
+    seed(entries, uid, [T0 + timedelta(seconds=10)])   # newer than everything
+    second = asyncio.run(vault_routes.list_page(user, 2, first["next_cursor"]))
+    assert [e["id"] for e in second["entries"]] == [str(ids[1]), str(ids[0])]
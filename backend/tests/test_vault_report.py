@@ -0,0 +1,140 @@
+# backend/tests/test_vault_report.py
+import asyncio
+from urllib.parse import unquote
+
+import pytest
+from bson import ObjectId
+
+import vault_report as vr
+import vault_routes
+from repositories import VaultEntriesRepo, VaultReportsRepo
+
+
+@pytest.mark.parametrize("raw, key", [
+    ("example.com", "example%2Ecom"),
+    ("a$b", "a%24b"),
+    ("100%.io", "100%25%2Eio"),
+    ("%2E", "%252E"),          # already looks escaped: must not collide with "."
+    ("plain", "plain"),
+])
+def test_report_key_escapes_and_round_trips(raw, key):
+    assert vr.report_key(raw) == key
+    assert "." not in key and "$" not in key
+    assert unquote(key) == raw
+
+
+def test_delta_adds_and_removes_one_entry():
+    e = {"domain": "x.com", "strength": 3, "fingerprint": "fp.1", "breached": True}
+    add = {"total": 1, "domains.x%2Ecom": 1, "strength.3": 1, "fingerprints.fp%2E1": 1, "breached": 1}
+    assert vr.delta(e) == add
+    assert vr.delta(e, -1) == {k: -v for k, v in add.items()}
+
+
+def test_delta_counts_missing_strength_as_unknown_and_skips_empty_fields():
+    assert vr.delta({"domain": "", "strength": None}) == {"total": 1, "strength.unknown": 1}
+    assert vr.delta({"strength": 0}) == {"total": 1, "strength.0": 1}
+
+
+def test_combine_sums_and_drops_zeros():
+    assert vr.combine([{"total": 1, "strength.2": 1}, {"total": -1, "strength.4": 1}]) == {"strength.2": 1, "strength.4": 1}
+    assert vr.combine([]) == {}
+
+
+def test_diff_moves_counts_between_buckets():
+    before = {"domain": "a.com", "strength": 1, "fingerprint": "f"}
+    assert vr.diff(before, {"strength": 4, "label": "ignored"}) == {"strength.1": -1, "strength.4": 1}
+    assert vr.diff(before, {"label": "only"}) == {}
+
+
+def test_diff_with_unset_fields_removes_their_counts():
+    # a new ciphertext unsets whatever describes the old secret (updates carry None)
+    before = {"domain": "a.com", "strength": 2, "fingerprint": "f", "breached": True}
+    assert vr.diff(before, {"strength": None, "fingerprint": None, "breached": None}) == {
+        "strength.2": -1, "strength.unknown": 1, "fingerprints.f": -1, "breached": -1}
+
+
+def test_build_and_render():
+    entries = [
+        {"domain": "a.com", "strength": 0, "fingerprint": "f1"},
+        {"domain": "a.com", "strength": 4, "fingerprint": "f1"},
+        {"domain": "b.com", "strength": 1, "fingerprint": "f1", "breached": True},
+        {"domain": "c.com", "fingerprint": "f2"},
+    ]
+    doc = vr.build(entries)
+    assert doc["total"] == 4 and doc["domains"]["a%2Ecom"] == 2
+    out = vr.render(doc)
+    assert out["total"] == 4 and out["breached"] == 1
+    assert out["weak"] == 2                                    # scores 0 and 1
+    assert out["strength"] == {"0": 1, "4": 1, "1": 1, "unknown": 1}
+    assert out["domains"][0] == {"domain": "a.com", "count": 2}
+    assert out["multi_account_domains"] == 1
+    assert out["reuse_groups"] == [{"fingerprint": "f1", "count": 3}]
+    assert out["reused_entries"] == 3
+
+
+def test_render_skips_counts_that_dropped_to_zero():
+    doc = vr.fold(vr.combine([vr.delta({"domain": "a.com", "fingerprint": "f"}),
+                              vr.delta({"domain": "b.com", "fingerprint": "f"})]))
+    doc["domains"]["b%2Ecom"] = 0      # what $inc leaves after a delete
+    doc["fingerprints"]["f"] = 1
+    out = vr.render(doc)
+    assert [d["domain"] for d in out["domains"]] == ["a.com"]
+    assert out["reuse_groups"] == []
+
+
+def test_render_of_nothing():
+    assert vr.render(None)["total"] == 0
+
+
+@pytest.fixture
+def reports(monkeypatch, acoll):
+    cols = {n: acoll(n) for n in ("vault_entries", "vault_reports")}
+    repo = VaultReportsRepo(cols["vault_reports"])
+    monkeypatch.setattr(vault_routes, "vault_entries", VaultEntriesRepo(cols["vault_entries"]))
+    monkeypatch.setattr(vault_routes, "vault_reports", repo)
+    cols["entries"] = cols["vault_entries"].sync
+    cols["repo"] = repo
+    return cols
+
+
+def test_missing_report_is_built_on_read_and_then_kept_current(reports):
+    uid = ObjectId()
+    reports["entries"].insert_one({"userId": uid, "domain": "a.com", "strength": 3})
+    assert asyncio.run(vault_routes.report_for({"id": str(uid)}))["total"] == 1
+    assert not reports["vault_reports"].sync.find_one({"_id": uid}).get("stale")
+
+    asyncio.run(vault_routes._apply_report(uid, vr.delta({"domain": "b.com", "strength": 1})))
+    out = asyncio.run(vault_routes.report_for({"id": str(uid)}))
+    assert out["total"] == 2 and out["weak"] == 1
+
+
+def test_failed_delta_marks_the_report_stale_instead_of_failing(reports, monkeypatch):
+    uid = ObjectId()
+    reports["vault_reports"].sync.insert_one({"_id": uid, "total": 5})
+    reports["entries"].insert_one({"userId": uid, "domain": "a.com"})
+
+    async def boom(*a, **k):
+        raise RuntimeError("write conflict")
+    monkeypatch.setattr(reports["repo"], "apply", boom)
+    asyncio.run(vault_routes._apply_report(uid, {"total": 1}))      # must not raise
+    assert reports["vault_reports"].sync.find_one({"_id": uid})["stale"] is True
+
+    monkeypatch.delattr(reports["repo"], "apply")      # back to the real $inc
+    assert asyncio.run(vault_routes.report_for({"id": str(uid)}))["total"] == 1   # rebuilt from entries
+
+
+def test_delta_on_a_missing_report_leaves_it_for_the_rebuild(reports):
+    uid = ObjectId()
+    asyncio.run(vault_routes._apply_report(uid, {"total": 1}))
+    doc = reports["vault_reports"].sync.find_one({"_id": uid})
+    assert doc["stale"] is True and "total" not in doc
+
+
+def test_write_during_rebuild_keeps_the_report_stale(reports):
+    uid = ObjectId()
+    repo = reports["repo"]
+    token = asyncio.run(repo.mark_stale(uid))
+    asyncio.run(repo.mark_stale(uid))                  # a write lands mid-rebuild
+    assert asyncio.run(repo.replace_stale(uid, token, {"total": 0})) is False
+    assert asyncio.run(repo.apply(uid, {"total": 1})) is False   # stale reports take no deltas
+    assert reports["vault_reports"].sync.find_one({"_id": uid})["stale"] is True
@@ -0,0 +1,93 @@
+# backend/tests/test_vault_search.py
+import pytest
+from cachetools import LRUCache
+
+import vault_search as vs
+
+
+def entry(label, login="", domain=""):
+    return {"label": label, "login": login, "domain": domain}
+
+
+DOCS = [
+    entry("GitHub work", "john.doe@mail.com", "github.com"),
+    entry("Git server", "admin", "git.example.org"),
+    entry("Gmail", "john_doe", "mail.google.com"),
+    entry("Bank", "jd", "bank.example.org"),
+]
+
+
+def labels(docs):
+    return [d["label"] for d in docs]
+
+
+@pytest.fixture
+def index():
+    return vs.SearchIndex(DOCS)
+
+
+def test_terms_split_on_anything_but_letters_and_digits():
+    assert vs.terms("john.doe@Mail.com") == ["john", "doe", "mail", "com"]
+    assert vs.terms("a_b--c  d2") == ["a", "b", "c", "d2"]
+    assert vs.terms("") == vs.terms(None) == []
+
+
+def test_prefix_matches_any_field(index):
+    assert labels(index.search("gi", 10)) == ["Git server", "GitHub work"]
+    assert labels(index.search("MAI", 10)) == ["GitHub work", "Gmail"]
+    assert labels(index.search("org", 10)) == ["Git server", "Bank"]
+
+
+def test_exact_token_ranks_before_longer_completions(index):
+    assert labels(index.search("git", 10))[0] == "Git server"
+
+
+def test_every_term_must_match_a_prefix(index):
+    assert labels(index.search("john mail", 10)) == ["GitHub work", "Gmail"]
+    assert labels(index.search("john git", 10)) == ["GitHub work"]
+    assert labels(index.search("do jo", 10)) == ["GitHub work", "Gmail"]
+    assert index.search("john bank", 10) == []
+
+
+def test_a_document_matching_several_tokens_comes_back_once(index):
+    # "g" covers git, github, gmail, google: GitHub work holds two of them
+    assert sorted(labels(index.search("g", 10))) == ["Git server", "GitHub work", "Gmail"]
+
+
+def test_k_limits_the_results(index):
+    assert len(index.search("g", 2)) == 2
+    assert len(index.search("g", 10)) == 3
+
+
+@pytest.mark.parametrize("q", ["", "  ", "@.-", "zzz"])
+def test_nothing_to_match(index, q):
+    assert index.search(q, 10) == []
+
+
+def test_no_substring_matches(index):
+    assert index.search("hub", 10) == []
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(vs, "_users", LRUCache(maxsize=100, getsizeof=lambda hit: hit[1].size))
+
+
+def test_get_returns_the_index_only_for_its_version(cache, index):
+    vs.put("u", 3, index)
+    assert vs.get("u", 3) is index
+    assert vs.get("u", 4) is None
+    assert vs.get("other", 3) is None
+
+
+def test_put_never_goes_back_to_an_older_version(cache, index):
+    newer = vs.SearchIndex(DOCS[:1])
+    vs.put("u", 5, newer)
+    vs.put("u", 4, index)          # a slow rebuild finishing late
+    assert vs.get("u", 5) is newer
+
+
+def test_index_larger_than_the_budget_is_not_kept(monkeypatch):
+    monkeypatch.setattr(vs, "_users", LRUCache(maxsize=2, getsizeof=lambda hit: hit[1].size))
+    vs.put("u", 1, vs.SearchIndex(DOCS))
+    assert vs.get("u", 1) is None
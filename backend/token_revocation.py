@@ -0,0 +1,124 @@
+# backend/token_revocation.py
+"""
+🚫 Access-token revocation (denylist).
+- Single tokens are revoked by jti; "revoke all" stores a per-user cutoff in
+  milliseconds (beforeMs; tokens whose iat_ms is at or before it are rejected),
+  so a token minted in the same second, or millisecond, as the revoke-all does
+  not slip through. Tokens minted to replace the revoked ones (change-password)
+  pass the cutoff to create_access_token(issued_after_ms=...). Tokens without
+  iat_ms count as issued at the start of their iat second.
+- The hot path is a set / dict lookup in memory. Every worker pulls new
+  revocations from Mongo in a background thread every REVOCATION_SYNC_SECONDS.
+- Access tokens are short-lived, so entries only need to outlive them:
+  Mongo drops them with a TTL index and the in-memory copies are pruned on sync.
+  Because the set stays this small, a Bloom filter is not needed.
+"""
+
+import os, threading, time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Set, Tuple
+
+from bson import ObjectId
+
+from auth_utils import ACCESS_TOKEN_EXPIRE_MINUTES
+from database import adb, db
+
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+
+RV_COLL = db["revoked_tokens"]         # sync: read by the background sync thread
+RV_ACOLL = adb["revoked_tokens"]       # async: written by the routes
+
+_lock = threading.Lock()
+_jtis: Dict[str, float] = {}          # jti -> expires (epoch)
+_cutoffs: Dict[str, Tuple[int, float]] = {}   # user id -> (cutoff epoch ms, expires)
+_last_seen = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+_next_sync = 0.0
+_syncing = False
+
+
+def _remember(doc: dict):
+    exp = doc["expiresAt"].replace(tzinfo=timezone.utc).timestamp()
+    if doc.get("jti"):
+        _jtis[doc["jti"]] = exp
+    elif doc.get("userId"):
+        uid = str(doc["userId"])
+        cutoff = int(doc["beforeMs"]) if "beforeMs" in doc else int(doc["before"]) * 1000
+        prev = _cutoffs.get(uid)
+        if not prev or prev[0] < cutoff:
+            _cutoffs[uid] = (cutoff, exp)
+
+
+def _sync():
+    global _last_seen, _syncing
+    try:
+        # re-read a small overlap: ObjectIds from other workers are only roughly ordered
+        since = ObjectId.from_datetime(_last_seen.generation_time - timedelta(seconds=10))
+        docs = list(RV_COLL.find({"_id": {"$gt": since}}).sort("_id", 1))
+        now = time.time()
+        with _lock:
+            for d in docs:
+                _remember(d)
+            for jti in [j for j, exp in _jtis.items() if exp <= now]:
+                del _jtis[jti]
+            for uid in [u for u, (_, exp) in _cutoffs.items() if exp <= now]:
+                del _cutoffs[uid]
+        if docs:
+            _last_seen = docs[-1]["_id"]
+    except Exception as e:
+        print("⚠️ revocation sync failed:", e)
+    finally:
+        _syncing = False
+
+
+def _maybe_sync():
+    global _next_sync, _syncing
+    now = time.monotonic()
+    if now < _next_sync or _syncing:
+        return
+    _next_sync = now + REVOCATION_SYNC_SECONDS
+    _syncing = True
+    threading.Thread(target=_sync, daemon=True).start()
+
+
+def is_revoked(claims: dict) -> bool:
+    """O(1) check against the in-memory denylist; never waits on Mongo."""
+    _maybe_sync()
+    jti = claims.get("jti")
+    if jti and jti in _jtis:
+        return True
+    cut = _cutoffs.get(str(claims.get("sub")))
+    if not cut:
+        return False
+    issued_ms = claims.get("iat_ms")
+    if issued_ms is None:
+        issued_ms = int(claims.get("iat", 0)) * 1000
+    return int(issued_ms) <= cut[0]
+
+
+async def _store(doc: dict):
+    doc["createdAt"] = datetime.now(timezone.utc)
+    await RV_ACOLL.insert_one(doc)
+    with _lock:
+        _remember(doc)
+
+
+async def revoke_token(claims: dict):
+    """Revoke one access token until it would have expired anyway."""
+    if not claims.get("jti"):
+        return
+    await _store({
+        "jti": claims["jti"],
+        "expiresAt": datetime.fromtimestamp(claims.get("exp", time.time()), timezone.utc),
+    })
+
+
+async def revoke_all_for_user(user_id) -> int:
+    """Revoke every access token issued to the user up to now; returns the cutoff (epoch ms)."""
+    now = datetime.now(timezone.utc)
+    cutoff = int(now.timestamp() * 1000)
+    await _store({
+        "userId": ObjectId(str(user_id)),
+        "beforeMs": cutoff,
+        "expiresAt": now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    })
+    return cutoff
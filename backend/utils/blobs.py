@@ -0,0 +1,40 @@
+# backend/utils/blobs.py
+"""
+📦 Encrypted blobs (vault salt / iv / ciphertext, mnemonic nonce / ciphertext) at rest.
+- Stored as BSON Binary (Python bytes): a quarter smaller than the base64 text
+  in storage, cache and on the wire to Mongo. Documents written this way carry
+  enc_v = ENC_V.
+- The API keeps base64 at the edge: to_stored() on the way in, to_b64() out.
+- Older documents (no enc_v) still hold base64 strings; every reader accepts
+  both until scripts/migrate_binary_blobs.py has run.
+"""
+
+import base64, binascii
+from typing import Optional, Union
+
+ENC_V = 2   # 1 (or missing) = base64 strings
+
+Blob = Union[str, bytes]
+
+
+def to_stored(value: Optional[str]) -> Optional[Blob]:
+    """Base64 text -> bytes. Anything that would not round-trip exactly stays text."""
+    if not isinstance(value, str):
+        return value
+    try:
+        raw = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return value
+    return raw if base64.b64encode(raw).decode("ascii") == value else value
+
+
+def to_b64(value: Optional[Blob]) -> Optional[str]:
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    return value
+
+
+def as_bytes(value: Blob) -> bytes:
+    if isinstance(value, str):
+        return base64.b64decode(value)
+    return bytes(value)
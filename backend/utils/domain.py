@@ -1,7 +1,10 @@
 # backend/utils/domain.py
+from functools import lru_cache
 from urllib.parse import urlparse
 import idna
 
+from utils.psl import registrable_domain
+
 COMMON_PREFIXES = ("www.",)
 
 def _strip_common_prefix(host: str) -> str:
@@ -10,19 +13,37 @@ def _strip_common_prefix(host: str) -> str:
             return host[len(p):]
     return host
 
+@lru_cache(maxsize=8192)
 def normalize_domain(url_or_host: str) -> str:
     """
-    Best-effort domain normalizer (no PSL yet).
+    Best-effort domain normalizer.
     - Accepts full URLs or bare hosts
     - Lowercases, strips scheme/port, strips 'www.'
     - IDN-safe
+    - Memoized: the extension asks about the same few hosts over and over
     """
     if not url_or_host:
         return ""
     parsed = urlparse(url_or_host if "://" in url_or_host else f"//{url_or_host}", scheme="http")
     host = (parsed.hostname or "").strip().lower()
-    try:
-        host = idna.decode(idna.encode(host))
-    except Exception:
-        pass
+    if not host.isascii() or "xn--" in host:   # plain ASCII hosts come back unchanged anyway
+        try:
+            host = idna.decode(idna.encode(host))
+        except Exception:
+            pass
     return _strip_common_prefix(host)
+
+def reverse_domain(domain: str) -> str:
+    """
+    'accounts.google.com' -> 'com.google.accounts'.
+    Subdomains of a domain then share its reversed key as a prefix, so
+    "everything under google.com" is an index range instead of a suffix regex.
+    """
+    if not domain:
+        return ""
+    return ".".join(reversed(domain.split(".")))
+
+@lru_cache(maxsize=8192)
+def site_for(url_or_host: str) -> str:
+    """Registrable domain (eTLD+1) via the Public Suffix List: 'login.example.co.uk' -> 'example.co.uk'."""
+    return registrable_domain(normalize_domain(url_or_host))
@@ -0,0 +1,78 @@
+# backend/utils/psl.py
+"""
+🌐 Public Suffix List → registrable domain (eTLD+1).
+- The list is bundled (utils/public_suffix_list.dat, MPL-2.0, refresh from
+  https://publicsuffix.org/list/public_suffix_list.dat) and compiled once at
+  import into a label trie walked right-to-left: one dict lookup per label.
+- Both ICANN and private sections are used, so user1.github.io and
+  user2.github.io stay separate sites.
+- Rules follow the PSL algorithm: longest match wins, "*" wildcards,
+  "!" exceptions override, and the implicit default rule is "*".
+"""
+
+import ipaddress, os
+from typing import Dict
+
+PSL_PATH = os.path.join(os.path.dirname(__file__), "public_suffix_list.dat")
+
+_END = ""          # node key: a rule ends here
+_WILD = "*"        # node key: wildcard child
+_EXC = "!"         # prefix for exception children ("!www" under "ck")
+
+
+def _compile(path: str) -> Dict:
+    root: Dict = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            rule = line.strip()
+            if not rule or rule.startswith("//"):
+                continue
+            rule = rule.split()[0].lower()
+            exception = rule.startswith("!")
+            labels = rule.lstrip("!").split(".")[::-1]
+            if exception:
+                # store "!www.ck" as an exception marker on the "ck" node
+                labels[-1] = _EXC + labels[-1]
+            node = root
+            for label in labels:
+                node = node.setdefault(label, {})
+            node[_END] = True
+    return root
+
+
+_TRIE = _compile(PSL_PATH)
+
+
+def public_suffix_length(labels_rev: list) -> int:
+    """Number of trailing labels that form the public suffix (labels given right-to-left)."""
+    node, length = _TRIE, 1   # default rule "*"
+    for i, label in enumerate(labels_rev):
+        if _EXC + label in node:
+            return i          # exception: the suffix is the rule minus its leftmost label
+        if _WILD in node:
+            length = max(length, i + 1)
+        node = node.get(label)
+        if node is None:
+            break
+        if _END in node:
+            length = max(length, i + 1)
+    return length
+
+
+def registrable_domain(host: str) -> str:
+    """
+    'login.example.co.uk' -> 'example.co.uk'. Returns "" for IP addresses,
+    bare public suffixes and empty hosts (there is no site to group by).
+    """
+    if not host:
+        return ""
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return ""
+    except ValueError:
+        pass
+    labels = host.strip(".").split(".")
+    n = public_suffix_length(labels[::-1])
+    if len(labels) <= n:
+        return ""
+    return ".".join(labels[-(n + 1):])
@@ -0,0 +1,53 @@
+# backend/vault_cache.py
+"""
+🗃️ Per-user read-through cache of vault read results (list / suggest / by-domain / entry).
+- Keyed by the user's vault_version (users.vault_version, bumped with $inc by
+  every vault write and carried in the cached principal). A version change
+  drops the user's whole bucket, so stale results are never served.
+- Bounded two ways: LRU over users, LRU over keys within a user.
+- Per worker. Another worker's write changes the key here once its invalidation
+  reaches this worker (auth_guard channel), or within PRINCIPAL_CACHE_TTL_SECONDS
+  without one; VAULT_FRESH_VERSION=1 reads the version per GET instead.
+ENV:
+  VAULT_CACHE_USERS     = users kept (default 2000)
+  VAULT_CACHE_PER_USER  = results kept per user (default 64)
+"""
+
+import os, threading
+from typing import Any, Hashable, Optional
+
+from cachetools import LRUCache
+
+import metrics
+
+VAULT_CACHE_USERS = int(os.getenv("VAULT_CACHE_USERS", "2000"))
+VAULT_CACHE_PER_USER = int(os.getenv("VAULT_CACHE_PER_USER", "64"))
+
+_lock = threading.Lock()
+_users: LRUCache = LRUCache(maxsize=VAULT_CACHE_USERS)   # user id -> (version, LRUCache)
+
+
+def get(user_id: str, version: int, key: Hashable) -> Optional[Any]:
+    with _lock:
+        bucket = _users.get(user_id)
+        if bucket is None or bucket[0] != version:
+            metrics.inc("vault_cache_misses_total")
+            return None
+        value = bucket[1].get(key)
+    metrics.inc("vault_cache_hits_total" if value is not None else "vault_cache_misses_total")
+    return value
+
+
+def put(user_id: str, version: int, key: Hashable, value: Any) -> None:
+    with _lock:
+        bucket = _users.get(user_id)
+        if bucket is None or bucket[0] < version:
+            bucket = _users[user_id] = (version, LRUCache(maxsize=VAULT_CACHE_PER_USER))
+        elif bucket[0] > version:
+            return   # computed under an older version; a newer one is already cached
+        bucket[1][key] = value
+
+
+def drop(user_id: str) -> None:
+    with _lock:
+        _users.pop(user_id, None)
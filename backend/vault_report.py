@@ -0,0 +1,99 @@
+# backend/vault_report.py
+"""
+📊 Materialized per-user vault report (collection vault_reports, _id = userId).
+- Document: total, breached, strength.<0-4|unknown>, domains.<domain>,
+  fingerprints.<fp>. Every vault write applies a signed $inc delta
+  (delta / diff), so reading the report is one _id fetch regardless of vault size.
+- strength (zxcvbn-style score 0-4), fingerprint (a keyed hash of the secret,
+  computed by the client; equal fingerprints = reused password) and breached
+  come from the client; the server never sees the secret. A PUT with a new
+  ciphertext clears whichever of them it does not resend (they described the
+  old secret).
+- Map keys are escaped for Mongo field names (report_key). Counts that drop to
+  0 stay in the document until the next rebuild; render() skips them.
+- A user without a report (vaults older than this), or whose report a write
+  could not update (stale: True), gets it rebuilt from their entries on the
+  next read (build); a write landing during that rebuild re-marks it and the
+  rebuilt copy is not stored.
+- scripts/rebuild_vault_reports.py recomputes every report (drift repair).
+"""
+
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import unquote
+
+REPORT_FIELDS = {"domain": 1, "strength": 1, "fingerprint": 1, "breached": 1}
+WEAK_MAX_SCORE = 1
+
+
+def report_key(value: str) -> str:
+    """'a.b$c' -> 'a%2Eb%24c' (no '.' or '$' in field names); unquote() reverses it."""
+    return value.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def delta(entry: Dict[str, Any], sign: int = 1) -> Dict[str, int]:
+    """$inc for adding (sign=1) or removing (sign=-1) one entry."""
+    inc = {"total": sign}
+    if entry.get("domain"):
+        inc["domains." + report_key(entry["domain"])] = sign
+    score = entry.get("strength")
+    inc["strength." + (str(score) if score is not None else "unknown")] = sign
+    if entry.get("fingerprint"):
+        inc["fingerprints." + report_key(entry["fingerprint"])] = sign
+    if entry.get("breached"):
+        inc["breached"] = sign
+    return inc
+
+
+def combine(deltas: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for d in deltas:
+        for k, v in d.items():
+            out[k] = out.get(k, 0) + v
+    return {k: v for k, v in out.items() if v}
+
+
+def diff(before: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, int]:
+    """$inc for an update: remove the old entry, add the updated one."""
+    after = {**before, **{k: v for k, v in updates.items() if k in REPORT_FIELDS}}
+    return combine([delta(before, -1), delta(after, 1)])
+
+
+def fold(inc: Dict[str, int]) -> Dict[str, Any]:
+    """Flat $inc keys ('domains.x': 1) -> the nested report document."""
+    doc: Dict[str, Any] = {}
+    for key, n in inc.items():
+        head, _, rest = key.partition(".")
+        if rest:
+            doc.setdefault(head, {})[rest] = n
+        else:
+            doc[head] = n
+    return doc
+
+
+def build(entries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Report document for a whole vault (entries projected on REPORT_FIELDS)."""
+    return fold(combine(delta(e) for e in entries))
+
+
+def _counts(m: Optional[dict]) -> Dict[str, int]:
+    return {unquote(k): v for k, v in (m or {}).items() if v > 0}
+
+
+def render(doc: Optional[dict]) -> Dict[str, Any]:
+    doc = doc or {}
+    domains = _counts(doc.get("domains"))
+    strength = _counts(doc.get("strength"))
+    reuse = sorted(((fp, n) for fp, n in _counts(doc.get("fingerprints")).items() if n > 1),
+                   key=lambda x: -x[1])
+    return {
+        "total": max(0, doc.get("total", 0)),
+        "breached": max(0, doc.get("breached", 0)),
+        "weak": sum(n for s, n in strength.items() if s.isdigit() and int(s) <= WEAK_MAX_SCORE),
+        "strength": strength,
+        "domains": [{"domain": d, "count": n}
+                    for d, n in sorted(domains.items(), key=lambda x: (-x[1], x[0]))],
+        "multi_account_domains": sum(1 for n in domains.values() if n > 1),
+        "reuse_groups": [{"fingerprint": fp, "count": n} for fp, n in reuse],
+        "reused_entries": sum(n for _, n in reuse),
+        "updatedAt": doc.get("updatedAt"),
+    }
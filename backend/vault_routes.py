@@ -1,41 +1,104 @@
 # backend/vault_routes.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel, Field
+"""
+🔐 Vault routes (/api/vault)
+- Entries are encrypted client-side; the server stores salt / iv / ciphertext only,
+  as BSON Binary (utils.blobs, enc_v 2); the API speaks base64.
+- GET / lists metadata only (no secret fields), newest first, keyset-paginated on
+  (createdAt, _id): pass the returned next_cursor back as ?cursor= for the next page.
+- GET /{id} returns one full entry (with ciphertext) when it is opened / copied.
+- Every entry stores rdomain (reversed labels, e.g. com.google.accounts) and site
+  (eTLD+1 from the Public Suffix List, e.g. example.co.uk) next to domain.
+  /suggest matches on (userId, site), so login.example.co.uk and example.co.uk
+  find each other; hosts without a site (IPs, localhost) fall back to the
+  indexed rdomain range (exact domain + subdomains).
+- Every write bumps users.vault_version ($inc). GET routes answer from a per-user
+  cache keyed by that version (vault_cache) and send ETag "<user>-<version>";
+  a matching If-None-Match gets 304 without touching Mongo. The version comes
+  from the cached principal: writes here advance it in place, other workers
+  drop theirs through the invalidation channel (auth_guard), or after
+  PRINCIPAL_CACHE_TTL_SECONDS without one. VAULT_FRESH_VERSION=1 reads it per
+  GET instead (get_vault_user: one _id projection read) for multi-worker
+  deploys without a channel.
+- GET /search?q=: type-ahead over label / login / domain (word prefixes, all
+  terms must match), from a per-user in-memory index (vault_search) rebuilt
+  when vault_version changes; very large vaults are searched in Mongo.
+- GET /report: the user's materialized vault report (vault_report), one _id read;
+  every write above applies its $inc delta to it. A missing report (older
+  vaults), or one a write could not update (marked stale, the write still
+  succeeds), is rebuilt from the entries on the next read.
+- GET /manifest: sorted, truncated SHA-256 hashes of the user's domains and
+  sites (no secrets). The extension caches it, hashes the page host and each
+  parent suffix, and only calls /suggest on a local hit.
+- Writes are reserve, write, finish. users.vault_count is the entry counter:
+  POST takes a slot and the entry's change sequence in a single conditional
+  update (vault_count < 5 on the free plan, so concurrent adds cannot overshoot),
+  then inserts; duplicates are left to uniq_user_domain_login (409, slot given
+  back in the finish step). PUT reserves a seq and runs one find_one_and_update;
+  DELETE writes the tombstone, deletes, and gives the slot back when finishing.
+  Accounts older than the counter get it seeded from count_documents on their
+  first write.
+- Change feed: each write reserves a per-user sequence (seq) from vault_version
+  before it runs and stores it on the entry; deletes leave a tombstone with
+  that seq (TTL VAULT_TOMBSTONE_TTL_DAYS), written before the entry goes.
+  Reservations stay in users.vault_pending until the write finishes, and
+  GET /changes?since=<seq> only returns seqs below the oldest one still in
+  flight, so a write committing out of seq order is never skipped. Upserts and
+  deletes come back in seq order, paginated. A client that has not synced for
+  longer than the tombstone TTL must do a full resync.
+- POST /import streams NDJSON (one VaultIn per line, already client-encrypted)
+  into unordered bulk inserts of VAULT_IMPORT_CHUNK; duplicates are whatever
+  uniq_user_domain_login rejects (no pre-queries). A Content-Length above
+  VAULT_IMPORT_MAX_BYTES is refused up front; a limit broken mid-stream ends
+  the import with the lines before it imported and "aborted" in the report. GET /export streams the
+  same format back.
+"""
+import base64, hashlib, json, os, re
+import idna
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
-from jose import JWTError, jwt
+from pymongo.errors import DuplicateKeyError
 from utils.favicon import favicon_url_for
-import os
 
-from database import db
-from utils.domain import normalize_domain
+import metrics
+import vault_cache
+import vault_search
+import vault_report
+from repositories import users, vault_entries, vault_reports, vault_tombstones
+from auth_guard import get_current_user, note_vault_version, set_vault_version
+from utils.blobs import ENC_V, to_b64, to_stored
+from utils.domain import normalize_domain, reverse_domain, site_for
 from premium_guard import require_premium_user   # ✅ premium lock
 
 router = APIRouter()
 
-# ---------- Auth dependency (local fallback) ----------
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
-JWT_ALG = os.getenv("JWT_ALG", "HS256")
+VAULT_TOMBSTONE_TTL_DAYS = int(os.getenv("VAULT_TOMBSTONE_TTL_DAYS", "30"))
+VAULT_IMPORT_CHUNK = int(os.getenv("VAULT_IMPORT_CHUNK", "500"))
+VAULT_IMPORT_MAX_LINES = int(os.getenv("VAULT_IMPORT_MAX_LINES", "50000"))
+VAULT_IMPORT_MAX_LINE_BYTES = 64 * 1024
+VAULT_IMPORT_MAX_BYTES = int(os.getenv("VAULT_IMPORT_MAX_BYTES", str(64 * 1024 * 1024)))
+FREE_PLAN_MAX_ENTRIES = 5
+VAULT_FRESH_VERSION = os.getenv("VAULT_FRESH_VERSION", "0") == "1"
 
 def _oid(v) -> ObjectId:
     return v if isinstance(v, ObjectId) else ObjectId(str(v))
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
-        user_id = payload.get("sub") or payload.get("_id") or payload.get("user_id")
-        if not user_id:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing sub")
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    u = db["users"].find_one({"_id": _oid(user_id)})
-    if not u:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return {"_id": str(u["_id"]), "email": u.get("email"), "status": u.get("status", "normal")}
-# -----------------------------------------------------
+async def fresh_vault_version(user: dict) -> dict:
+    """With VAULT_FRESH_VERSION=1: the principal with vault_version as stored now (other workers' writes included)."""
+    if not VAULT_FRESH_VERSION:
+        return user
+    doc = await users.by_id(_oid(user["id"]), {"vault_version": 1})
+    version = int((doc or {}).get("vault_version", 0))
+    note_vault_version(user["id"], version)
+    return {**user, "vault_version": version}
+
+async def get_vault_user(user=Depends(get_current_user)) -> dict:
+    """get_current_user for versioned GETs (ETag / vault_cache / search index)."""
+    return await fresh_vault_version(user)
 
 # ---------- Models ----------
 class VaultIn(BaseModel):
@@ -45,6 +108,10 @@ class VaultIn(BaseModel):
     salt: str
     iv: str
     ciphertext: str
+    # computed by the client before encryption, for the vault report
+    strength: Optional[int] = Field(None, ge=0, le=4, description="zxcvbn-style score")
+    fingerprint: Optional[str] = Field(None, max_length=64, description="keyed hash of the secret")
+    breached: Optional[bool] = None
 
 class VaultUpdate(BaseModel):
     label: Optional[str] = None
@@ -53,6 +120,9 @@ class VaultUpdate(BaseModel):
     salt: Optional[str] = None
     iv: Optional[str] = None
     ciphertext: Optional[str] = None
+    strength: Optional[int] = Field(None, ge=0, le=4)
+    fingerprint: Optional[str] = Field(None, max_length=64)
+    breached: Optional[bool] = None
 
 class VaultOut(BaseModel):
     id: str
@@ -66,21 +136,33 @@ class VaultOut(BaseModel):
     ciphertext: Optional[str] = None
     createdAt: Optional[datetime] = None
     updatedAt: Optional[datetime] = None
+    seq: Optional[int] = None
+    strength: Optional[int] = None
+    fingerprint: Optional[str] = None
+    breached: Optional[bool] = None
+
+class DeletedOut(BaseModel):
+    id: str
+    seq: int
+    deletedAt: Optional[datetime] = None
+
+class ChangesOut(BaseModel):
+    upserts: List[VaultOut]
+    deletes: List[DeletedOut]
+    next_since: int
+    has_more: bool
+    tombstone_ttl_days: int
+
+class ManifestOut(BaseModel):
+    version: int
+    hash: str
+    domains: List[str]
 
 class SuggestOut(BaseModel):
     domain: str
     exact: List[VaultOut]
     near: List[VaultOut]
 
-# ---------- Collection & Index ----------
-if db is None:
-    raise RuntimeError("DB not initialized")
-COLL = db["vault_entries"]
-try:
-    COLL.create_index([("userId", 1), ("createdAt", -1)])
-except Exception:
-    pass
-
 # ---------- Helpers ----------
 def _serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
     domain = doc.get("domain")
@@ -91,117 +173,368 @@ def _serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
         "url": doc.get("url"),
         "domain": domain,
         "faviconUrl": favicon_url_for(domain),
-        "salt": doc.get("salt"),
-        "iv": doc.get("iv"),
-        "ciphertext": doc.get("ciphertext"),
+        "salt": to_b64(doc.get("salt")),
+        "iv": to_b64(doc.get("iv")),
+        "ciphertext": to_b64(doc.get("ciphertext")),
         "createdAt": doc.get("createdAt"),
         "updatedAt": doc.get("updatedAt"),
+        "seq": doc.get("seq"),
+        "strength": doc.get("strength"),
+        "fingerprint": doc.get("fingerprint"),
+        "breached": doc.get("breached"),
     }
 
+# list views never need the secret fields
+_META_FIELDS = {"label": 1, "login": 1, "url": 1, "domain": 1, "createdAt": 1, "updatedAt": 1}
+
+def _serialize_meta(doc: Dict[str, Any]) -> Dict[str, Any]:
+    domain = doc.get("domain")
+    return {
+        "id": str(doc["_id"]),
+        "label": doc.get("label"),
+        "login": doc.get("login"),
+        "url": doc.get("url"),
+        "domain": domain,
+        "faviconUrl": favicon_url_for(domain),
+        "createdAt": doc.get("createdAt"),
+        "updatedAt": doc.get("updatedAt"),
+    }
+
+def _encode_cursor(doc: Dict[str, Any]) -> str:
+    ts = doc["createdAt"]
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    raw = f"{int(ts.timestamp() * 1000)}:{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ms, oid = raw.split(":", 1)
+        return datetime.fromtimestamp(int(ms) / 1000, timezone.utc), ObjectId(oid)
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
-def _preflight_dupe_check(user_id: ObjectId, domain: Optional[str], login: Optional[str], exclude_id: Optional[ObjectId] = None):
-    if not domain or not login:
-        return
-    q: Dict[str, Any] = {"userId": user_id, "domain": domain, "login": login.strip().lower()}
-    if exclude_id is not None:
-        q["_id"] = {"$ne": exclude_id}
-    exists = COLL.find_one(q, {"_id": 1})
-    if exists:
-        raise HTTPException(
-            status_code=409,
-            detail={
-                "code": "DUPLICATE_ACCOUNT",
-                "message": f"An entry for login '{login}' already exists for {domain}.",
-                "existing_id": str(exists["_id"])
-            }
-        )
-
-# ---------- ROUTES (Normal: 5 entries max / Premium: unlimited) ----------
+# ---------- versioned reads ----------
+_CACHE_CONTROL = "private, no-cache"   # browsers keep the body but revalidate every time
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(t.strip().removeprefix("W/") == etag for t in header.split(","))
+
+async def _versioned(request: Request, response: Response, user: dict, key: tuple, compute, cache: bool = True):
+    """304 if the client already has this version; else the cached or freshly computed result."""
+    version = int(user.get("vault_version", 0))
+    etag = f'"{user["id"]}-{version}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        metrics.inc("vault_not_modified_total")
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _CACHE_CONTROL
+    if not cache:
+        return await compute()
+    return await read_cached(user, key, compute)
+
+async def read_cached(user: dict, key: tuple, compute):
+    """vault_cache read-through at the principal's vault_version (also used by /api/bootstrap)."""
+    version = int(user.get("vault_version", 0))
+    result = vault_cache.get(user["id"], version, key)
+    if result is None:
+        result = await compute()
+        vault_cache.put(user["id"], version, key, result)
+    return result
+
+MANIFEST_HASH_HEX = 16   # 64-bit prefixes: collisions only cost one extra /suggest call
+
+def manifest_hash(domain: str) -> str:
+    """Hash of the ASCII (punycode) host, the form browsers report in location.hostname."""
+    try:
+        host = idna.encode(domain).decode("ascii")
+    except Exception:
+        host = domain
+    return hashlib.sha256(host.encode("utf-8")).hexdigest()[:MANIFEST_HASH_HEX]
 
-@router.post("/", response_model=dict, summary="Store an encrypted password entry (Normal: 5 entries max)")
-def store_secret(
-    payload: VaultIn,
-    user=Depends(get_current_user),   # ✅ allow both normal & premium
-    force: bool = Query(False, description="Allow duplicate (override unique check)")
-):
-    if db is None:
-        raise HTTPException(500, "DB not available")
-
-    user_id = _oid(user["_id"])
-    user_plan = user.get("status", "normal")
-
-    # 🛡️ Limit normal users to 5 entries
-    if user_plan != "premium":
-        entry_count = COLL.count_documents({"userId": user_id})
-        if entry_count >= 5:
-            raise HTTPException(
-                status_code=403,
-                detail="Free plan limit reached. Upgrade to Premium for unlimited Vault storage."
-            )
-
-    # Normalize and insert
-    label = payload.label.strip()
+def _build_doc(user_id: ObjectId, payload: VaultIn, seq: int) -> Dict[str, Any]:
+    """New entry document: normalized login / url / domain keys + the client's ciphertext."""
     login_norm = (payload.login or "").strip().lower() or None
     url_norm = (payload.url or "").strip() or None
     domain = normalize_domain(url_norm) if url_norm else None
-
-    if not force:
-        _preflight_dupe_check(user_id, domain, login_norm)
-
-    doc = {
+    now = _now_utc()
+    return {
         "userId": user_id,
-        "label": label,
+        "label": payload.label.strip(),
         "login": login_norm,
         "url": url_norm,
         "domain": domain,
-        "salt": payload.salt,
-        "iv": payload.iv,
-        "ciphertext": payload.ciphertext,
-        "createdAt": _now_utc(),
-        "updatedAt": _now_utc(),
+        "rdomain": reverse_domain(domain) or None,
+        "site": site_for(domain) if domain else None,
+        "salt": to_stored(payload.salt),
+        "iv": to_stored(payload.iv),
+        "ciphertext": to_stored(payload.ciphertext),
+        "enc_v": ENC_V,
+        "strength": payload.strength,
+        "fingerprint": payload.fingerprint,
+        "breached": payload.breached,
+        "createdAt": now,
+        "updatedAt": now,
+        "seq": seq,
     }
-    res = COLL.insert_one(doc)
-    return {"id": str(res.inserted_id)}
+
+def _free_cap(user: dict) -> Optional[int]:
+    return None if user.get("status", "normal") == "premium" else FREE_PLAN_MAX_ENTRIES
+
+async def _reserve_slots(user: dict, n: int = 1) -> Optional[int]:
+    """n entry slots + change sequences; returns the last seq, None when the plan is full."""
+    user_id, cap = _oid(user["id"]), _free_cap(user)
+    version = await users.reserve_vault_seqs(user_id, n, slots=n, max_entries=cap)
+    if version is None:
+        # account created before vault_count: seed it from the collection, retry once
+        await users.init_vault_count(user_id, await vault_entries.count_for_user(user_id))
+        version = await users.reserve_vault_seqs(user_id, n, slots=n, max_entries=cap)
+    return version
+
+async def _rebuild_report(user_id: ObjectId, token: ObjectId) -> dict:
+    """Build a stale or missing report from the user's entries; stored if no write marked it again."""
+    entries = vault_entries.iter_for_user(user_id, vault_report.REPORT_FIELDS)
+    doc = vault_report.build([e async for e in entries])
+    if not await vault_reports.replace_stale(user_id, token, doc):
+        print(f"⚠️ vault report for {user_id} changed during rebuild; left stale")
+    return doc
+
+async def _apply_report(user_id: ObjectId, inc: Dict[str, int]) -> None:
+    """
+    Apply a write's delta after the entry write landed. Never fails the request:
+    a missing report, or a delta that cannot be applied, marks it stale and the
+    next read rebuilds it from the entries.
+    """
+    try:
+        if await vault_reports.apply(user_id, inc):
+            return
+    except Exception as e:
+        print(f"⚠️ vault report update failed for {user_id}:", e)
+        metrics.inc("vault_report_failed_total")
+    try:
+        await vault_reports.mark_stale(user_id)
+    except Exception as e:
+        print(f"⚠️ could not mark vault report stale for {user_id}:", e)
+        metrics.inc("vault_report_failed_total")
+
+def _duplicate(login: Optional[str], domain: Optional[str], existing: Optional[dict]) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={
+            "code": "DUPLICATE_ACCOUNT",
+            "message": f"An entry for login '{login}' already exists for {domain}.",
+            "existing_id": str(existing["_id"]) if existing else None,
+        }
+    )
+
+_PLAN_FULL = "Free plan limit reached. Upgrade to Premium for unlimited Vault storage."
+
+# ---------- ROUTES (Normal: 5 entries max / Premium: unlimited) ----------
+
+@router.post("/", response_model=dict, summary="Store an encrypted password entry (Normal: 5 entries max)")
+async def store_secret(
+    payload: VaultIn,
+    user=Depends(get_current_user),   # ✅ allow both normal & premium
+    force: bool = Query(False, description="Deprecated: uniq_user_domain_login always applies")
+):
+    user_id = _oid(user["id"])
+
+    # 🛡️ slot + seq in one $inc; normal users are capped at 5 entries
+    seq = await _reserve_slots(user)
+    if seq is None:
+        raise HTTPException(status_code=403, detail=_PLAN_FULL)
+
+    doc = _build_doc(user_id, payload, seq)
+    release = 1   # slot goes back unless the insert lands
+    try:
+        inserted_id = await vault_entries.insert(doc)
+        release = 0
+        await _apply_report(user_id, vault_report.delta(doc))
+    except DuplicateKeyError:
+        existing = await vault_entries.find_duplicate(user_id, doc["domain"], doc["login"])
+        raise _duplicate(doc["login"], doc["domain"], existing)
+    finally:
+        await users.finish_vault_seqs(user_id, [seq], release=release)
+        set_vault_version(user_id, seq)
+    return {"id": str(inserted_id)}
+
+
+class _ImportAborted(Exception):
+    """The body broke a size limit part-way; what came before it is kept."""
+
+async def _ndjson_lines(request: Request):
+    """Yield raw lines of a streamed request body without buffering the whole body."""
+    buf, total = b"", 0
+    async for chunk in request.stream():
+        total += len(chunk)
+        if total > VAULT_IMPORT_MAX_BYTES:
+            raise _ImportAborted(f"Import is limited to {VAULT_IMPORT_MAX_BYTES} bytes")
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buf) > VAULT_IMPORT_MAX_LINE_BYTES:
+            raise _ImportAborted("Import line too long")
+    if buf:
+        yield buf
+
+def _note_error(report: dict, line_no: int, message: str):
+    if len(report["errors"]) < 20:
+        report["errors"].append({"line": line_no, "error": message})
+
+@router.post("/import", response_model=dict, summary="Bulk import NDJSON of client-encrypted entries")
+async def import_ndjson(request: Request, user=Depends(get_current_user)):
+    user_id = _oid(user["id"])
+    capped = _free_cap(user) is not None
+    plan_full = False
+    version = 0
+
+    # a size limit hit mid-stream stops the import: earlier chunks are already in,
+    # so the report comes back with "aborted" set instead of a bare 413
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > VAULT_IMPORT_MAX_BYTES:
+        raise HTTPException(413, f"Import is limited to {VAULT_IMPORT_MAX_BYTES} bytes")
+
+    report = {"inserted": 0, "duplicates": 0, "invalid": 0, "over_limit": 0, "errors": [],
+              "aborted": None}
+    batch: List[VaultIn] = []
+    line_nos: List[int] = []
+    seqs: List[int] = []
+    marks: List[int] = []   # first seq of each reservation behind this batch
+
+    async def flush():
+        nonlocal version
+        if not capped:
+            # one update reserves the chunk's slots and a contiguous block of change sequences
+            last = await _reserve_slots(user, len(batch))
+            if last is None:
+                raise HTTPException(404, "User not found")
+            seqs[:] = range(last - len(batch) + 1, last + 1)
+            marks[:] = seqs[:1]
+        docs = [_build_doc(user_id, p, seqs[i]) for i, p in enumerate(batch)]
+        res = await vault_entries.insert_many_unordered(docs)
+        version = max(version, seqs[-1])
+        await users.finish_vault_seqs(user_id, marks, release=len(batch) - res["inserted"])
+        seqs.clear()
+        marks.clear()
+        failed = {idx for idx, _ in res["duplicates"] + res["errors"]}
+        await _apply_report(user_id, vault_report.combine(
+            vault_report.delta(d) for i, d in enumerate(docs) if i not in failed))
+        report["inserted"] += res["inserted"]
+        report["duplicates"] += len(res["duplicates"])
+        for idx, msg in res["errors"]:
+            _note_error(report, line_nos[idx], msg)
+        batch.clear()
+        line_nos.clear()
+
+    line_no = 0
+    try:
+        try:
+            async for raw in _ndjson_lines(request):
+                line_no += 1
+                if not raw.strip():
+                    continue
+                if line_no > VAULT_IMPORT_MAX_LINES:
+                    report["aborted"] = {"line": line_no, "error": f"Import is limited to {VAULT_IMPORT_MAX_LINES} lines"}
+                    break
+                try:
+                    payload = VaultIn.model_validate_json(raw)
+                except ValidationError as e:
+                    report["invalid"] += 1
+                    err = e.errors()[0]
+                    _note_error(report, line_no, f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}")
+                    continue
+                if capped:
+                    # free plan: at most 5 slots, taken one by one against the cap
+                    seq = None if plan_full else await _reserve_slots(user)
+                    if seq is None:
+                        plan_full = True
+                        report["over_limit"] += 1
+                        continue
+                    seqs.append(seq)
+                    marks.append(seq)
+                batch.append(payload)
+                line_nos.append(line_no)
+                if len(batch) >= VAULT_IMPORT_CHUNK:
+                    await flush()
+        except _ImportAborted as e:
+            report["aborted"] = {"line": line_no + 1, "error": str(e)}
+        if batch:
+            await flush()
+    finally:
+        if marks:
+            # reserved but never inserted (error / disconnect before the flush): give the slots back
+            version = max(version, seqs[-1])
+            await users.finish_vault_seqs(user_id, marks, release=len(seqs))
+        # whatever landed before an error is still published
+        if version:
+            set_vault_version(user_id, version)
+    return report
 
 
 @router.get("/", response_model=dict, summary="List your stored entries")
-def list_secrets(user=Depends(get_current_user)):   # ✅ everyone can list
-    if db is None:
-        raise HTTPException(500, "DB not available")
-    items: List[Dict[str, Any]] = []
-    for d in COLL.find({"userId": _oid(user["_id"])}).sort("createdAt", -1):
-        items.append(_serialize(d))
-    return {"entries": items}
+async def list_secrets(
+    request: Request,
+    response: Response,
+    user=Depends(get_vault_user),   # ✅ everyone can list
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    return await _versioned(request, response, user, ("list", limit, cursor),
+                            lambda: list_page(user, limit, cursor))
+
+async def list_page(user: dict, limit: int, cursor: Optional[str] = None) -> dict:
+    q: Dict[str, Any] = {"userId": _oid(user["id"])}
+    if cursor:
+        ts, last_id = _decode_cursor(cursor)
+        q["$or"] = [{"createdAt": {"$lt": ts}}, {"createdAt": ts, "_id": {"$lt": last_id}}]
+    docs = await vault_entries.find(q, sort=[("createdAt", -1), ("_id", -1)],
+                                    projection=_META_FIELDS, limit=limit + 1)
+    page = docs[:limit]
+    next_cursor = _encode_cursor(page[-1]) if len(docs) > limit else None
+    return {"entries": [_serialize_meta(d) for d in page], "next_cursor": next_cursor}
 
 
 @router.delete("/{entry_id}", response_model=dict, summary="Delete an entry")
-def delete_secret(entry_id: str, user=Depends(get_current_user)):
-    if db is None:
-        raise HTTPException(500, "DB not available")
+async def delete_secret(entry_id: str, user=Depends(get_current_user)):
     try:
-        q = {"_id": _oid(entry_id), "userId": _oid(user["_id"])}
+        oid = _oid(entry_id)
     except Exception:
         raise HTTPException(400, "Invalid id")
-    res = COLL.delete_one(q)
-    if res.deleted_count == 0:
-        raise HTTPException(404, "Not found")
+    user_id = _oid(user["id"])
+    seq = await users.reserve_vault_seqs(user_id)
+    release = 0
+    try:
+        # tombstone first: if the delete lands, the change feed already has it
+        await vault_tombstones.insert(user_id, oid, seq, timedelta(days=VAULT_TOMBSTONE_TTL_DAYS))
+        deleted = await vault_entries.delete_owned(oid, user_id, vault_report.REPORT_FIELDS)
+        if deleted is None:
+            await vault_tombstones.discard(user_id, oid, seq)
+            raise HTTPException(404, "Not found")
+        release = 1
+        await _apply_report(user_id, vault_report.delta(deleted, -1))
+    finally:
+        await users.finish_vault_seqs(user_id, [seq], release=release)
+        set_vault_version(user_id, seq)
     return {"ok": True}
 
 
 @router.put("/{entry_id}", response_model=dict, summary="Update an entry")
-def update_secret(entry_id: str, payload: VaultUpdate, user=Depends(get_current_user), force: bool = Query(False)):
-    if db is None:
-        raise HTTPException(500, "DB not available")
+async def update_secret(entry_id: str, payload: VaultUpdate, user=Depends(get_current_user),
+                        force: bool = Query(False, description="Deprecated: uniq_user_domain_login always applies")):
     try:
         oid = _oid(entry_id)
     except Exception:
         raise HTTPException(400, "Invalid id")
-
-    cur = COLL.find_one({"_id": oid, "userId": _oid(user["_id"])})
-    if not cur:
-        raise HTTPException(404, "Not found")
+    user_id = _oid(user["id"])
 
     updates: Dict[str, Any] = {}
     if payload.label is not None:
@@ -211,49 +544,221 @@ def update_secret(entry_id: str, payload: VaultUpdate, user=Depends(get_current_
     if payload.url is not None:
         updates["url"] = payload.url.strip() if payload.url else None
         updates["domain"] = normalize_domain(updates["url"]) if updates["url"] else None
+        updates["rdomain"] = reverse_domain(updates["domain"]) or None
+        updates["site"] = site_for(updates["domain"]) if updates["domain"] else None
 
     for k in ["salt", "iv", "ciphertext"]:
+        v = getattr(payload, k)
+        if v is not None:
+            updates[k] = to_stored(v)
+    for k in ["strength", "fingerprint", "breached"]:
         v = getattr(payload, k)
         if v is not None:
             updates[k] = v
+    # a new secret invalidates what the client said about the old one
+    unset = [k for k in ("strength", "fingerprint", "breached")
+             if "ciphertext" in updates and k not in updates]
+    if all(k in updates for k in ("salt", "iv", "ciphertext")):
+        updates["enc_v"] = ENC_V   # fully rewritten; partial updates wait for the migration
 
     if not updates:
         return {"ok": True}
 
-    eff_login = updates.get("login", cur.get("login"))
-    eff_domain = updates.get("domain", cur.get("domain"))
-    if not force:
-        _preflight_dupe_check(_oid(user["_id"]), eff_domain, eff_login, exclude_id=oid)
-
     updates["updatedAt"] = _now_utc()
-    COLL.update_one({"_id": oid, "userId": _oid(user["_id"])}, {"$set": updates})
+    updates["seq"] = seq = await users.reserve_vault_seqs(user_id)
+    try:
+        before = await vault_entries.update_owned(oid, user_id, updates, vault_report.REPORT_FIELDS, unset)
+        if before is not None:
+            await _apply_report(user_id, vault_report.diff(before, {**updates, **dict.fromkeys(unset)}))
+    except DuplicateKeyError as e:
+        key = (e.details or {}).get("keyValue")
+        if not key:   # servers before 4.2 do not report the key; read it (error path only)
+            cur = await vault_entries.get_owned(oid, user_id, {"login": 1, "domain": 1}) or {}
+            key = {"login": updates.get("login", cur.get("login")), "domain": updates.get("domain", cur.get("domain"))}
+        login, domain = key.get("login"), key.get("domain")
+        existing = await vault_entries.find_duplicate(user_id, domain, login, exclude_id=oid)
+        raise _duplicate(login, domain, existing)
+    finally:
+        await users.finish_vault_seqs(user_id, [seq])
+        set_vault_version(user_id, seq)
+    if before is None:
+        raise HTTPException(404, "Not found")
     return {"ok": True}
 
 
 @router.get("/by-domain/{domain}", response_model=List[VaultOut], summary="List entries for a domain")
-def list_by_domain(domain: str, user=Depends(get_current_user)):
+async def list_by_domain(domain: str, request: Request, response: Response, user=Depends(get_vault_user)):
     d = normalize_domain(domain)
-    cur = COLL.find({"userId": _oid(user["_id"]), "domain": d}).sort("label", 1)
-    return [VaultOut(**_serialize(x)) for x in cur]
+    async def compute():
+        docs = await vault_entries.find({"userId": _oid(user["id"]), "domain": d}, sort=[("label", 1)])
+        return [_serialize(x) for x in docs]
+    return await _versioned(request, response, user, ("by-domain", d), compute)
 
 
 @router.get("/suggest", response_model=SuggestOut, summary="Suggest matching/near-matching entries for a URL")
-def suggest_for_url(url: str = Query(..., description="Full URL or hostname"), user=Depends(get_current_user)):
-    user_id = _oid(user["_id"])
+async def suggest_for_url(request: Request, response: Response,
+                          url: str = Query(..., description="Full URL or hostname"), user=Depends(get_vault_user)):
     d = normalize_domain(url)
-    exact = list(COLL.find({"userId": user_id, "domain": d}))
-    near = []
+    return await _versioned(request, response, user, ("suggest", d), lambda: _suggest(_oid(user["id"]), d))
+
+async def _suggest(user_id: ObjectId, d: str) -> dict:
+    exact, near = [], []
     if d:
-        near = list(COLL.find({
-            "userId": user_id,
-            "domain": {"$exists": True, "$type": "string"},
-            "domain": {"$regex": f"{d}$"}
-        }))
-        exact_ids = {str(x["_id"]) for x in exact}
-        near = [n for n in near if str(n["_id"]) not in exact_ids]
+        rd = reverse_domain(d)
+        site = site_for(d)
+        # exact key, or anything under "<rd>." ('/' is the byte after '.');
+        # plus the whole registrable site when there is one
+        branches = [{"rdomain": rd}, {"rdomain": {"$gte": rd + ".", "$lt": rd + "/"}}]
+        if site:
+            branches.append({"site": site})
+        docs = await vault_entries.find({"userId": user_id, "$or": branches})
+        for x in docs:
+            (exact if x.get("rdomain") == rd else near).append(x)
 
     return {
         "domain": d,
-        "exact": [VaultOut(**_serialize(x)) for x in exact],
-        "near": [VaultOut(**_serialize(x)) for x in near],
+        "exact": [_serialize(x) for x in exact],
+        "near": [_serialize(x) for x in near],
     }
+
+
+@router.get("/search", response_model=List[VaultOut], summary="Type-ahead search over label / login / domain")
+async def search_entries(request: Request, response: Response, user=Depends(get_vault_user),
+                         q: str = Query(..., min_length=1, max_length=100),
+                         limit: int = Query(20, ge=1, le=100)):
+    # results are not put in vault_cache: every keystroke would evict list / suggest pages
+    return await _versioned(request, response, user, ("search", q, limit),
+                            lambda: _search(user, q, limit), cache=False)
+
+async def _search(user: dict, q: str, limit: int) -> list:
+    user_id, version = _oid(user["id"]), int(user.get("vault_version", 0))
+    index = vault_search.get(user["id"], version)
+    if index is None:
+        docs = await vault_entries.find({"userId": user_id}, sort=[("label", 1)], projection=_META_FIELDS,
+                                        limit=vault_search.VAULT_SEARCH_MAX_ENTRIES + 1)
+        if len(docs) > vault_search.VAULT_SEARCH_MAX_ENTRIES:
+            index = vault_search.TOO_LARGE
+        else:
+            index = await run_in_threadpool(vault_search.SearchIndex, [_serialize_meta(d) for d in docs])
+        vault_search.put(user["id"], version, index)
+    if index is not vault_search.TOO_LARGE:
+        return index.search(q, limit)
+
+    # Mongo fallback: word-start regexes, evaluated inside the user's userId index range
+    clauses = []
+    for t in vault_search.terms(q):
+        word = "(^|[^a-z0-9])" + re.escape(t)
+        clauses.append({"$or": [{"label": {"$regex": word, "$options": "i"}},
+                                {"login": {"$regex": word}}, {"domain": {"$regex": word}}]})
+    if not clauses:
+        return []
+    docs = await vault_entries.find({"userId": user_id, "$and": clauses}, sort=[("label", 1)],
+                                    projection=_META_FIELDS, limit=limit)
+    return [_serialize_meta(d) for d in docs]
+
+
+@router.get("/report", response_model=dict, summary="Totals, reuse, weak / breached counts and per-domain coverage")
+async def vault_report_view(request: Request, response: Response, user=Depends(get_vault_user)):
+    return await _versioned(request, response, user, ("report",), lambda: report_for(user))
+
+async def report_for(user: dict) -> dict:
+    user_id = _oid(user["id"])
+    doc = await vault_reports.get(user_id)
+    if doc is None or doc.get("stale"):
+        token = doc["staleToken"] if doc else await vault_reports.mark_stale(user_id)
+        doc = await _rebuild_report(user_id, token)
+    return vault_report.render(doc)
+
+
+@router.get("/manifest", response_model=ManifestOut, summary="Hashed domains of your entries, for local matching")
+async def domain_manifest(request: Request, response: Response, user=Depends(get_vault_user)):
+    async def compute():
+        user_id = _oid(user["id"])
+        # sites too: /suggest also matches a host's parent site and the entries under it
+        names = await vault_entries.distinct_domains(user_id) + await vault_entries.distinct_sites(user_id)
+        return {
+            "version": int(user.get("vault_version", 0)),
+            "hash": f"sha256/{MANIFEST_HASH_HEX * 4}",
+            "domains": sorted({manifest_hash(d) for d in names}),
+        }
+    return await _versioned(request, response, user, ("manifest",), compute)
+
+
+@router.get("/changes", response_model=ChangesOut, summary="Upserts and deletes after a change sequence")
+async def vault_changes(
+    request: Request,
+    response: Response,
+    since: int = Query(0, ge=0, description="next_since from the previous call (0 = from the start)"),
+    limit: int = Query(100, ge=1, le=500),
+    user=Depends(get_vault_user),
+):
+    user_id = _oid(user["id"])
+    # only seqs every earlier reservation has committed below: a write still in
+    # flight under a lower seq must not be skipped by the next_since handed out
+    version, committed = await users.committed_vault_seq(user_id)
+
+    async def compute():
+        # limit + 1 from each side, then the globally smallest `limit` seqs:
+        # nothing at or below next_since can be left behind in either collection
+        ups = await vault_entries.find({"userId": user_id, "seq": {"$gt": since, "$lte": committed}},
+                                       sort=[("seq", 1)], limit=limit + 1)
+        dels = await vault_tombstones.since(user_id, since, limit + 1, upto=committed)
+        merged = sorted([(d["seq"], "u", d) for d in ups] + [(t["seq"], "d", t) for t in dels],
+                        key=lambda x: x[0])
+        page = merged[:limit]
+        return {
+            "upserts": [_serialize(d) for _, kind, d in page if kind == "u"],
+            "deletes": [{"id": str(t["entryId"]), "seq": t["seq"], "deletedAt": t.get("deletedAt")}
+                        for _, kind, t in page if kind == "d"],
+            "next_since": page[-1][0] if page else since,
+            "has_more": len(merged) > limit,
+            "tombstone_ttl_days": VAULT_TOMBSTONE_TTL_DAYS,
+        }
+    if committed < version:
+        # partial view: no ETag / cache, the same version will read further once the write lands
+        response.headers["Cache-Control"] = "no-store"
+        return await compute()
+    return await _versioned(request, response, {**user, "vault_version": version},
+                            ("changes", since, limit), compute)
+
+
+_EXPORT_FIELDS = {"label": 1, "login": 1, "url": 1, "salt": 1, "iv": 1, "ciphertext": 1,
+                  "strength": 1, "fingerprint": 1, "breached": 1, "createdAt": 1}
+
+@router.get("/export", summary="Download every entry as NDJSON (still client-encrypted)")
+async def export_ndjson(user=Depends(get_current_user)):
+    cursor = vault_entries.iter_for_user(_oid(user["id"]), _EXPORT_FIELDS)
+
+    async def lines():
+        async for d in cursor:
+            created = d.get("createdAt")
+            yield json.dumps({
+                "label": d.get("label"),
+                "login": d.get("login"),
+                "url": d.get("url"),
+                "salt": to_b64(d.get("salt")),
+                "iv": to_b64(d.get("iv")),
+                "ciphertext": to_b64(d.get("ciphertext")),
+                "strength": d.get("strength"),
+                "fingerprint": d.get("fingerprint"),
+                "breached": d.get("breached"),
+                "createdAt": created.isoformat() if created else None,
+            }) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": 'attachment; filename="vault.ndjson"'})
+
+
+# declared last so "/suggest", "/search", "/report", "/manifest", "/changes", "/export" and "/by-domain/..." are matched first
+@router.get("/{entry_id}", response_model=VaultOut, summary="Get one entry, including its ciphertext")
+async def get_secret(entry_id: str, request: Request, response: Response, user=Depends(get_vault_user)):
+    try:
+        oid = _oid(entry_id)
+    except Exception:
+        raise HTTPException(400, "Invalid id")
+    async def compute():
+        doc = await vault_entries.get_owned(oid, _oid(user["id"]))
+        if not doc:
+            raise HTTPException(404, "Not found")
+        return _serialize(doc)
+    return await _versioned(request, response, user, ("entry", entry_id), compute)
@@ -0,0 +1,111 @@
+# backend/vault_search.py
+"""
+🔎 Per-user type-ahead index over vault metadata (label / login / domain; never secrets).
+- Built lazily on a user's first search from one projected read of their entries,
+  keyed by vault_version like vault_cache: a write makes the next search rebuild.
+- Tokens are the lowercase words of each field (split on anything that is not a
+  letter or digit: "john.doe@mail.com" -> john, doe, mail, com) in a sorted list
+  with a postings list per token; queries are split the same way. A term
+  is a prefix range of tokens found with bisect; the most selective term drives the walk
+  and the others filter, stopping at K results. Exact tokens sort before longer
+  completions, so they rank first.
+- LRU over users, bounded by the total number of postings held (VAULT_SEARCH_TOKENS).
+  Vaults above VAULT_SEARCH_MAX_ENTRIES are not indexed here; the route falls
+  back to an anchored regex query on the user's index range.
+ENV:
+  VAULT_SEARCH_TOKENS       = tokens kept across users (default 2000000)
+  VAULT_SEARCH_MAX_ENTRIES  = largest vault indexed in memory (default 100000)
+"""
+
+import os, re, threading
+from bisect import bisect_left
+from typing import Dict, Hashable, List, Optional
+
+from cachetools import LRUCache
+
+import metrics
+
+VAULT_SEARCH_TOKENS = int(os.getenv("VAULT_SEARCH_TOKENS", "2000000"))
+VAULT_SEARCH_MAX_ENTRIES = int(os.getenv("VAULT_SEARCH_MAX_ENTRIES", "100000"))
+
+_SPLIT = re.compile(r"[\W_]+")
+_END = "\U0010ffff"   # sorts after every token that starts with the prefix
+
+
+def terms(text: str) -> List[str]:
+    return [t for t in _SPLIT.split((text or "").lower()) if t]
+
+
+class SearchIndex:
+    def __init__(self, docs: List[dict]):
+        self.docs = docs
+        postings: Dict[str, List[int]] = {}
+        for i, d in enumerate(docs):
+            for t in set(terms(_text(d))):
+                postings.setdefault(t, []).append(i)
+        self.keys = sorted(postings)
+        self.postings = [postings[t] for t in self.keys]
+        self.size = sum(len(p) for p in self.postings) or 1
+        self._tokens: List[Optional[List[str]]] = [None] * len(docs)
+
+    def _range(self, term: str):
+        return bisect_left(self.keys, term), bisect_left(self.keys, term + _END)
+
+    def _doc_tokens(self, i: int) -> List[str]:
+        toks = self._tokens[i]
+        if toks is None:
+            toks = self._tokens[i] = terms(_text(self.docs[i]))
+        return toks
+
+    def search(self, query: str, k: int) -> List[dict]:
+        qs = terms(query)
+        if not qs:
+            return []
+        ranges = sorted(((self._range(t), t) for t in qs),
+                        key=lambda r: sum(len(p) for p in self.postings[r[0][0]:r[0][1]]))
+        (lo, hi), _ = ranges[0]
+        others = [t for _, t in ranges[1:]]
+        out, seen = [], set()
+        for ids in self.postings[lo:hi]:
+            for i in ids:
+                if i in seen:
+                    continue
+                seen.add(i)
+                if others:
+                    toks = self._doc_tokens(i)
+                    if not all(any(tok.startswith(t) for tok in toks) for t in others):
+                        continue
+                out.append(self.docs[i])
+                if len(out) >= k:
+                    return out
+        return out
+
+
+def _text(doc: dict) -> str:
+    return " ".join(doc.get(f) or "" for f in ("label", "login", "domain"))
+
+
+TOO_LARGE = SearchIndex([])   # cached marker: this vault is searched in Mongo
+
+_lock = threading.Lock()
+_users: LRUCache = LRUCache(maxsize=VAULT_SEARCH_TOKENS, getsizeof=lambda hit: hit[1].size)   # user id -> (version, SearchIndex)
+
+
+def get(user_id: Hashable, version: int) -> Optional[SearchIndex]:
+    with _lock:
+        hit = _users.get(user_id)
+    if hit is None or hit[0] != version:
+        metrics.inc("vault_search_builds_total")
+        return None
+    return hit[1]
+
+
+def put(user_id: Hashable, version: int, index: SearchIndex) -> None:
+    with _lock:
+        hit = _users.get(user_id)
+        if hit is not None and hit[0] > version:
+            return
+        try:
+            _users[user_id] = (version, index)
+        except ValueError:   # larger than the whole budget: not kept
+            pass
@@ -1,11 +1,110 @@
+// Random id of this install, sent with every refresh (the server's reuse grace is per device)
+async function deviceId() {
+  let { deviceId } = await chrome.storage.local.get(["deviceId"]);
+  if (!deviceId) {
+    deviceId = crypto.randomUUID();
+    await chrome.storage.local.set({ deviceId });
+  }
+  return deviceId;
+}
+
+// Access tokens are short-lived: rotate the stored refresh token for a new one
+async function refreshToken(apiBase) {
+  const { refreshToken } = await chrome.storage.sync.get(["refreshToken"]);
+  if (!refreshToken) return null;
+  const res = await fetch(`${apiBase}/auth/refresh`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refresh_token: refreshToken, device_id: await deviceId() })
+  });
+  if (!res.ok) return null;
+  const data = await res.json();
+  await chrome.storage.sync.set({ token: data.access_token, refreshToken: data.refresh_token });
+  return data.access_token;
+}
+
+// GET with the stored access token; rotates it once on 401
+async function authedFetch(apiBase, path, extraHeaders = {}) {
+  const { token } = await chrome.storage.sync.get(["token"]);
+  if (!token) return null;
+  let res = await fetch(`${apiBase}${path}`, { headers: { ...extraHeaders, Authorization: `Bearer ${token}` } });
+  if (res.status === 401) {
+    const fresh = await refreshToken(apiBase);
+    if (!fresh) return null;
+    res = await fetch(`${apiBase}${path}`, { headers: { ...extraHeaders, Authorization: `Bearer ${fresh}` } });
+  }
+  return res;
+}
+
+// ---- Domain manifest: hashed vault domains, matched locally before any /suggest ----
+const MANIFEST_TTL_MS = 60 * 1000;   // revalidate (If-None-Match) at most once a minute
+const MANIFEST_FORMAT = 2;           // 2: domains + sites; older stored copies are refetched
+let manifest = null;                 // { format, etag, checkedAt, domains: Set<string> }
+
+async function sha256Prefix(text, hexChars) {
+  const buf = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(buf), b => b.toString(16).padStart(2, "0")).join("").slice(0, hexChars);
+}
+
+async function loadManifest(apiBase) {
+  if (!manifest) {
+    const { psaiManifest } = await chrome.storage.local.get(["psaiManifest"]);
+    if (psaiManifest?.format === MANIFEST_FORMAT) manifest = { ...psaiManifest, domains: new Set(psaiManifest.domains) };
+  }
+  if (manifest && Date.now() - manifest.checkedAt < MANIFEST_TTL_MS) return manifest;
+
+  const headers = manifest?.etag ? { "If-None-Match": manifest.etag } : {};
+  const res = await authedFetch(apiBase, "/api/vault/manifest", headers);
+  if (res && res.status === 304 && manifest) {
+    manifest.checkedAt = Date.now();
+  } else if (res && res.ok) {
+    const data = await res.json();
+    manifest = { format: MANIFEST_FORMAT, etag: res.headers.get("ETag"), checkedAt: Date.now(), domains: new Set(data.domains) };
+  } else {
+    return null;   // offline / signed out: fall back to asking the server
+  }
+  await chrome.storage.local.set({ psaiManifest: { ...manifest, domains: [...manifest.domains] } });
+  return manifest;
+}
+
+// same normalization as the server: lowercase host, no "www."
+function hostOf(url) {
+  try {
+    const host = new URL(url).hostname.toLowerCase();
+    return host.startsWith("www.") ? host.slice(4) : host;
+  } catch {
+    return "";
+  }
+}
+
+// host and its parents down to two labels: login.example.co.uk -> [login.example.co.uk, example.co.uk, co.uk]
+// (the manifest holds entry domains and their eTLD+1 sites, so a public suffix never hits)
+function hostSuffixes(host) {
+  const labels = host.split(".");
+  if (labels.length < 2) return [host];
+  const out = [];
+  for (let i = 0; i <= labels.length - 2; i++) out.push(labels.slice(i).join("."));
+  return out;
+}
+
+async function mayHaveCreds(apiBase, url) {
+  const host = hostOf(url);
+  if (!host) return false;
+  const m = await loadManifest(apiBase);
+  if (!m) return true;
+  for (const name of hostSuffixes(host)) {
+    if (m.domains.has(await sha256Prefix(name, 16))) return true;
+  }
+  return false;
+}
+
 async function getCreds(url) {
   const { apiBase, token } = await chrome.storage.sync.get(["apiBase", "token"]);
   if (!apiBase || !token) return null;
   try {
-    const res = await fetch(`${apiBase}/api/vault/suggest?url=${encodeURIComponent(url)}`, {
-      headers: { Authorization: `Bearer ${token}` }
-    });
-    if (!res.ok) return null;
+    if (!(await mayHaveCreds(apiBase, url))) return null;
+    const res = await authedFetch(apiBase, `/api/vault/suggest?url=${encodeURIComponent(url)}`);
+    if (!res || !res.ok) return null;
     return res.json();
   } catch (e) {
     console.warn("[PSAI bg] API fetch failed", e);
@@ -39,3 +138,8 @@ chrome.tabs.onUpdated.addListener((tabId, changeInfo, tab) => {
 chrome.webNavigation.onHistoryStateUpdated.addListener(({ tabId, url }) => {
   if (url) handleTab(tabId, url);
 });
+
+// the popup drops the stored manifest when settings change (other account / API base)
+chrome.storage.onChanged.addListener((changes, area) => {
+  if (area === "local" && changes.psaiManifest && !changes.psaiManifest.newValue) manifest = null;
+});
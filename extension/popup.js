@@ -1,12 +1,14 @@
 const apiBaseEl = document.getElementById("apiBase");
 const tokenEl = document.getElementById("token");
+const refreshEl = document.getElementById("refreshToken");
 const passEl = document.getElementById("passphrase");
 const msg = document.getElementById("msg");
 
 // Load stored settings
-chrome.storage.sync.get(["apiBase", "token", "passphrase"], (r) => {
+chrome.storage.sync.get(["apiBase", "token", "refreshToken", "passphrase"], (r) => {
   apiBaseEl.value = r.apiBase || "";
   tokenEl.value = r.token || "";
+  refreshEl.value = r.refreshToken || "";
   passEl.value = r.passphrase || "";
 });
 
@@ -15,8 +17,10 @@ document.getElementById("save").onclick = async () => {
   await chrome.storage.sync.set({
     apiBase: apiBaseEl.value.trim(),
     token: tokenEl.value.trim(),
+    refreshToken: refreshEl.value.trim(),
     passphrase: passEl.value
   });
+  await chrome.storage.local.remove("psaiManifest");   // re-fetch for the (possibly new) account
   msg.textContent = "✅ Saved!";
   setTimeout(() => (msg.textContent = ""), 1500);
 };
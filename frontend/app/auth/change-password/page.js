@@ -79,7 +79,7 @@ export default function ChangePasswordPage() {
     try {
       const res = await fetch(`${BURL}/advisor/coach`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", ...(token ? { Authorization: `Bearer ${token}` } : {}) },
         body: JSON.stringify({ password: passwordValue }),
         signal: controller.signal,
       });
@@ -129,6 +129,13 @@ export default function ChangePasswordPage() {
       const data = await res.json();
       if (!res.ok) throw new Error(data.detail || data.message || "Change failed");
 
+      // 🆕 old tokens are revoked on password change; keep going with the fresh pair
+      if (data.access_token) {
+        localStorage.setItem("psai_token", data.access_token);
+        localStorage.setItem("psai_refresh", data.refresh_token || "");
+        setToken(data.access_token);
+      }
+
       setMessage("✅ Password updated successfully! Redirecting to your profile...");
       setCurrent("");
       setNewPassword("");
@@ -42,6 +42,7 @@ export default function DeleteAccountPage() {
       // Clear local session
       try {
         localStorage.removeItem("psai_token");
+        localStorage.removeItem("psai_refresh");
         localStorage.removeItem("psai_status");
         localStorage.removeItem("psai_username");
         window.dispatchEvent(new Event("storage"));
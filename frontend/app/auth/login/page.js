@@ -37,6 +37,7 @@ export default function LoginPage() {
       // 🔑 Store under the keys your guard expects
       try {
         localStorage.setItem("psai_token", data.access_token);             // ✅ REQUIRED by RequireAuth
+        localStorage.setItem("psai_refresh", data.refresh_token || "");    // 🆕 access tokens are short-lived
         localStorage.setItem("psai_status", data.status || "normal");      // optional, used by dashboard
         localStorage.setItem("psai_username", data.username || "");        // optional
 
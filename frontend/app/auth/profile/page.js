@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { API_URL } from "@/utils/api";
+import { fetchBootstrap } from "@/lib/api";
 import { useRouter } from "next/navigation";
 
 export default function ProfilePage() {
@@ -9,6 +10,7 @@ export default function ProfilePage() {
   const [profile, setProfile] = useState(null);
   const [err, setErr] = useState("");
   const [msg, setMsg] = useState("");
+  const [device, setDevice] = useState(null); // 🆕 tokens for the browser extension
 
   async function loadProfile() {
     setErr("");
@@ -18,18 +20,12 @@ export default function ProfilePage() {
         router.push("/auth/login");
         return;
       }
-      const res = await fetch(`${API_URL}/auth/me`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      const data = await res.json();
-      if (!res.ok) {
-        setErr(data.detail || "Failed to load profile");
-        if (res.status === 401) router.push("/auth/login");
-        return;
-      }
-      setProfile(data.user);
+      const data = await fetchBootstrap(["me", "plan"]);
+      setProfile(data.me);
+      if (data.plan) localStorage.setItem("psai_status", data.plan.premium ? "premium" : "normal");
     } catch (e) {
-      setErr("Backend not reachable");
+      if (e.status === 401) router.push("/auth/login");
+      setErr(e.status ? e.message || "Failed to load profile" : "Backend not reachable");
     }
   }
 
@@ -42,6 +38,7 @@ export default function ProfilePage() {
   function logout() {
     try {
       localStorage.removeItem("psai_token");
+      localStorage.removeItem("psai_refresh");
       localStorage.removeItem("psai_status");
       localStorage.removeItem("psai_username");
       // Broadcast to all tabs & listeners so RequireAuth/Sidebar react
@@ -70,6 +67,7 @@ export default function ProfilePage() {
       setMsg("✅ Upgraded to Premium");
       // refresh UI + localStorage
       localStorage.setItem("psai_status", "premium");
+      if (data.access_token) localStorage.setItem("psai_token", data.access_token); // 🆕 new plan claim
       window.dispatchEvent(new CustomEvent("psai:plan-changed", { detail: "premium" })); // 🔔 notify others
       await loadProfile();
     } catch (e) {
@@ -77,6 +75,25 @@ export default function ProfilePage() {
     }
   }
 
+  // 🆕 the extension gets its own refresh family, so it never races this tab's tokens
+  async function connectExtension() {
+    setErr("");
+    try {
+      const res = await fetch(`${API_URL}/auth/device`, {
+        method: "POST",
+        headers: { Authorization: `Bearer ${localStorage.getItem("psai_token")}` },
+      });
+      const data = await res.json();
+      if (!res.ok) {
+        setErr(data.detail || "Could not create extension tokens");
+        return;
+      }
+      setDevice(data);
+    } catch (e) {
+      setErr("Backend not reachable");
+    }
+  }
+
   return (
     <div className="max-w-2xl mx-auto p-6 bg-gray-800/70 rounded-2xl shadow-lg mt-10 text-white">
       <h1 className="text-3xl font-bold text-green-400 mb-4">My Profile</h1>
@@ -113,6 +130,12 @@ export default function ProfilePage() {
             >
               Delete account
             </button>
+            <button
+              onClick={connectExtension}
+              className="bg-purple-700 hover:bg-purple-800 px-4 py-2 rounded"
+            >
+              Connect extension
+            </button>
             <button
               onClick={logout}
               className="ml-auto bg-gray-700 hover:bg-gray-600 px-4 py-2 rounded"
@@ -120,6 +143,16 @@ export default function ProfilePage() {
               Logout
             </button>
           </div>
+
+          {device && (
+            <div className="mt-6 space-y-2 text-sm">
+              <p className="opacity-80">Paste these into the extension popup (shown once):</p>
+              <p><b>Bearer Token:</b></p>
+              <input readOnly value={device.access_token} className="w-full bg-gray-900 p-2 rounded" />
+              <p><b>Refresh Token:</b></p>
+              <input readOnly value={device.refresh_token} className="w-full bg-gray-900 p-2 rounded" />
+            </div>
+          )}
         </div>
       )}
     </div>
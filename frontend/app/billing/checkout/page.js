@@ -53,9 +53,11 @@ export default function CheckoutPage() {
       });
 
       if (!res.ok) throw new Error("Upgrade failed.");
+      const data = await res.json();
 
-      // Update local status
+      // Update local status (+ token carrying the new plan claim)
       localStorage.setItem("psai_status", "premium");
+      if (data.access_token) localStorage.setItem("psai_token", data.access_token);
 
       setSuccess("✅ Payment successful! You are now Premium.");
       setTimeout(() => {
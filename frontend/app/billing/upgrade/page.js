@@ -36,6 +36,7 @@ export default function UpgradeBillingPage() {
 
       // update local plan + notify app (Sidebar listens to this)
       localStorage.setItem("psai_status", "premium");
+      if (data.access_token) localStorage.setItem("psai_token", data.access_token); // 🆕 new plan claim
       window.dispatchEvent(new CustomEvent("psai:plan-changed", { detail: "premium" }));
       setMsg("✅ Payment successful — you’re now Premium!");
 
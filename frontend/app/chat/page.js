@@ -10,6 +10,7 @@ export default function ChatOrchestratorPage() {
   const [input, setInput] = useState("")
   const [messages, setMessages] = useState([])
   const [loading, setLoading] = useState(false)
+  const [sessionId, setSessionId] = useState(null) // 🆕 lets the orchestrator reuse earlier analysis
 
   // 🛡️ CHANGED: track the *actual* saved user plan from localStorage (cannot be overridden by dropdown)
   const [userPlan, setUserPlan] = useState("normal") // the real plan we will send to backend
@@ -57,9 +58,10 @@ export default function ChatOrchestratorPage() {
     const res = await fetch(`${API_BASE}/orchestrator/chat`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ message: userMsg.text, plan: planForRequest, mode }),
+      body: JSON.stringify({ message: userMsg.text, plan: planForRequest, mode, session_id: sessionId }),
     })
     const data = await res.json()
+    if (data.session_id) setSessionId(data.session_id)
     const botMsg = { role: "bot", text: data.chat, ui: data.ui, warnings: data.warnings }
 
     setMessages((m) => [...m.filter((msg) => !msg.typing), botMsg])
@@ -4,12 +4,14 @@ import RequireAuth from "@/components/RequireAuth";
 import { useEffect, useState } from "react";
 import Link from "next/link";
 import { API_URL } from "@/utils/api"; // 🟡 API base
+import { authHeaders, fetchBootstrap } from "@/lib/api";
 
 export default function DashboardPage() {
   // -------------------------------
   // User plan detection
   // -------------------------------
   const [plan, setPlan] = useState("normal");
+  const [vaultReport, setVaultReport] = useState(null);
   useEffect(() => {
     try {
       const stored = localStorage.getItem("psai_status");
@@ -17,6 +19,17 @@ export default function DashboardPage() {
     } catch {
       setPlan("normal");
     }
+    // one request for the server-side plan + vault summary
+    fetchBootstrap(["plan", "report"])
+      .then(d => {
+        if (d.plan) {
+          const p = d.plan.premium ? "premium" : "normal";
+          setPlan(p);
+          localStorage.setItem("psai_status", p);
+        }
+        setVaultReport(d.report);
+      })
+      .catch(() => {});
   }, []);
 
   // -------------------------------
@@ -110,7 +123,7 @@ export default function DashboardPage() {
     try {
       const res = await fetch(`${API_URL}/advisor/coach`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", ...authHeaders() }, // habits are tracked per signed-in user
         body: JSON.stringify({ password }),
       });
       const data = await res.json();
@@ -157,6 +170,15 @@ export default function DashboardPage() {
           </div>
         )}
 
+        {vaultReport && (
+          <Link href="/reports" className="mt-4 block max-w-3xl p-4 rounded-xl bg-gray-800/70 hover:bg-gray-800">
+            <span className="font-semibold">Vault:</span> {vaultReport.total} entries ·{" "}
+            <span className="text-yellow-300">{vaultReport.weak} weak</span> ·{" "}
+            <span className="text-orange-400">{vaultReport.reused_entries} reused</span> ·{" "}
+            <span className="text-red-400">{vaultReport.breached} breached</span>
+          </Link>
+        )}
+
         {/* ================= Password Quick Check ================= */}
         <section className="mt-8">
           <div className="w-full max-w-3xl p-6 bg-gray-800/70 rounded-2xl shadow-lg backdrop-blur-sm">
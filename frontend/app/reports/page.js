@@ -1,8 +1,56 @@
-export default function ReportsPage() {
+"use client";
+
+import { useEffect, useState } from "react";
+import RequireAuth from "@/components/RequireAuth";
+import { API_BASE, authHeaders } from "@/lib/api";
+
+function Stat({ label, value, tone = "text-white" }) {
   return (
-    <div className="text-center p-10">
-      <h1 className="text-3xl font-bold text-green-400">Reports</h1>
-      <p className="text-gray-400 mt-2">This page will show password analysis history and charts.</p>
+    <div className="p-4 bg-gray-900 rounded-lg shadow text-center">
+      <div className={`text-2xl font-bold ${tone}`}>{value}</div>
+      <div className="text-sm text-gray-400">{label}</div>
     </div>
   );
 }
+
+export default function ReportsPage() {
+  const [report, setReport] = useState(null);
+
+  useEffect(() => {
+    // one document read on the server, whatever the vault size
+    fetch(`${API_BASE}/api/vault/report`, { headers: { ...authHeaders() } })
+      .then(r => (r.ok ? r.json() : null))
+      .then(setReport)
+      .catch(() => setReport(null));
+  }, []);
+
+  return (
+    <RequireAuth>
+      <div className="p-10 max-w-4xl mx-auto">
+        <h1 className="text-3xl font-bold text-green-400 mb-6">Reports</h1>
+        {!report && <p className="text-gray-400">Loading…</p>}
+        {report && (
+          <>
+            <div className="grid grid-cols-2 md:grid-cols-4 gap-4">
+              <Stat label="Entries" value={report.total} />
+              <Stat label="Weak" value={report.weak} tone="text-yellow-300" />
+              <Stat label="Reused" value={report.reused_entries} tone="text-orange-400" />
+              <Stat label="Breached" value={report.breached} tone="text-red-400" />
+            </div>
+
+            <h2 className="text-xl font-medium mt-8 mb-3">Sites</h2>
+            {report.domains.length === 0 && <p className="text-gray-400">No sites yet.</p>}
+            <div className="space-y-2">
+              {report.domains.map(d => (
+                <div key={d.domain} className="flex justify-between p-3 bg-gray-900 rounded-lg">
+                  <span>{d.domain}</span>
+                  <span className="text-gray-400">{d.count} {d.count === 1 ? "account" : "accounts"}</span>
+                </div>
+              ))}
+            </div>
+          </>
+        )}
+      </div>
+    </RequireAuth>
+  );
+}
@@ -2,13 +2,18 @@
 
 import { useEffect, useState } from "react";
 import RequireAuth from "@/components/RequireAuth";
-import { API_BASE, authHeaders } from "@/lib/api";
-import { encryptSecret, decryptSecret } from "@/lib/vaultCrypto";
+import { API_BASE, authHeaders, currentUserId } from "@/lib/api";
+import { encryptSecret, decryptSecret, secretFingerprint, strengthScore } from "@/lib/vaultCrypto";
 
 export default function VaultPage() {
   const [entries, setEntries] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
 
+  // Search (server-side, over label / login / domain)
+  const [query, setQuery] = useState("");
+  const [results, setResults] = useState(null);
+
   // Add form
   const [label, setLabel] = useState("");
   const [login, setLogin] = useState("");
@@ -25,15 +30,45 @@ export default function VaultPage() {
   const [editUrl, setEditUrl] = useState("");
   const [editPassword, setEditPassword] = useState("");
 
-  // --- Load vault entries ---
+  // --- Load vault entries (metadata only, one page at a time) ---
+  async function fetchPage(cursor) {
+    const qs = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const r = await fetch(`${API_BASE}/api/vault/${qs}`, { headers: { ...authHeaders() } });
+    return r.json();
+  }
+
   async function load() {
     setLoading(true);
-    const r = await fetch(`${API_BASE}/api/vault/`, { headers: { ...authHeaders() } });
-    const d = await r.json();
+    const d = await fetchPage(null);
     setEntries(d.entries || []);
+    setNextCursor(d.next_cursor || null);
     setLoading(false);
   }
 
+  async function loadMore() {
+    if (!nextCursor) return;
+    const d = await fetchPage(nextCursor);
+    setEntries(prev => [...prev, ...(d.entries || [])]);
+    setNextCursor(d.next_cursor || null);
+  }
+
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) { setResults(null); return; }
+    const ctl = new AbortController();
+    const t = setTimeout(async () => {
+      try {
+        const r = await fetch(`${API_BASE}/api/vault/search?q=${encodeURIComponent(q)}&limit=50`, {
+          headers: { ...authHeaders() }, signal: ctl.signal,
+        });
+        if (r.ok) setResults(await r.json());
+      } catch {}
+    }, 150);
+    return () => { clearTimeout(t); ctl.abort(); };
+  }, [query, entries]);
+
+  const shown = results ?? entries;
+
   useEffect(() => {
     // Detect plan from localStorage
     try {
@@ -67,11 +102,13 @@ export default function VaultPage() {
     }
 
     const { salt, iv, ciphertext } = await encryptSecret(password, passphrase);
+    const strength = strengthScore(password);
+    const fingerprint = await secretFingerprint(password, passphrase, currentUserId());
 
     const res = await fetch(`${API_BASE}/api/vault/`, {
       method: "POST",
       headers: { "Content-Type": "application/json", ...authHeaders() },
-      body: JSON.stringify({ label, login, url, salt, iv, ciphertext }),
+      body: JSON.stringify({ label, login, url, salt, iv, ciphertext, strength, fingerprint }),
     });
 
     if (!res.ok) {
@@ -88,7 +125,11 @@ export default function VaultPage() {
     let passphrase = sessionStorage.getItem("vault_passphrase") || prompt("Vault passphrase:") || "";
     if (!passphrase) return;
     try {
-      const pwd = await decryptSecret(e.ciphertext, passphrase, e.salt, e.iv);
+      // the list carries no secrets; fetch this entry's ciphertext on demand
+      const r = await fetch(`${API_BASE}/api/vault/${e.id}`, { headers: { ...authHeaders() } });
+      if (!r.ok) return alert("Could not load entry");
+      const full = await r.json();
+      const pwd = await decryptSecret(full.ciphertext, passphrase, full.salt, full.iv);
       await navigator.clipboard.writeText(pwd);
       alert("Copied ✅");
     } catch {
@@ -121,6 +162,8 @@ export default function VaultPage() {
       body.salt = salt;
       body.iv = iv;
       body.ciphertext = ciphertext;
+      body.strength = strengthScore(editPassword);
+      body.fingerprint = await secretFingerprint(editPassword, passphrase, currentUserId());
     }
 
     const res = await fetch(`${API_BASE}/api/vault/${editingId}`, {
@@ -203,13 +246,19 @@ export default function VaultPage() {
         {/* Entries */}
         <div className="mt-8">
           <h2 className="text-xl font-medium mb-3">My Entries</h2>
+          <input
+            className="w-full mb-4 px-3 py-2 rounded-lg bg-gray-900 text-white border border-gray-700"
+            placeholder="Search label, login or site…"
+            value={query}
+            onChange={e => setQuery(e.target.value)}
+          />
           {loading && <div className="text-gray-400">Loading…</div>}
-          {!loading && entries.length === 0 && (
-            <div className="text-gray-400">No entries yet.</div>
+          {!loading && shown.length === 0 && (
+            <div className="text-gray-400">{results ? "No matches." : "No entries yet."}</div>
           )}
 
           <div className="space-y-3">
-            {entries.map(e => (
+            {shown.map(e => (
               <div key={e.id} className="p-4 bg-gray-900 rounded-lg shadow">
                 {editingId === e.id ? (
                   // Edit mode
@@ -259,6 +308,15 @@ export default function VaultPage() {
               </div>
             ))}
           </div>
+
+          {nextCursor && !results && (
+            <button
+              className="mt-4 px-4 py-2 rounded bg-gray-700 hover:bg-gray-600 text-white text-sm"
+              onClick={loadMore}
+            >
+              Load more
+            </button>
+          )}
         </div>
 
         {userPlan !== "premium" && (
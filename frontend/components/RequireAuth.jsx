@@ -2,7 +2,10 @@
 
 import { useEffect, useRef, useState } from "react";
 import { useRouter, usePathname } from "next/navigation";
-import { validateSession, clearSession } from "@/utils/session";
+import { validateSession, clearSession, refreshSession } from "@/utils/session";
+
+// 🆕 access tokens live ~5 minutes; rotate a bit before they expire
+const REFRESH_EVERY_MS = 4 * 60 * 1000;
 
 export default function RequireAuth({ children }) {
   const router = useRouter();
@@ -11,6 +14,7 @@ export default function RequireAuth({ children }) {
   // 🆕 Render optimistically as soon as a token exists.
   const [ready, setReady] = useState(false);
   const redirected = useRef(false); // prevent double redirects in fast nav
+  const checkRef = useRef(null);
 
   useEffect(() => {
     let mounted = true;
@@ -46,7 +50,7 @@ export default function RequireAuth({ children }) {
       } catch {}
     }
 
-    check();
+    checkRef.current = check;
 
     // Re-validate on tab auth changes & route changes,
     // but do NOT block rendering anymore.
@@ -68,14 +72,22 @@ export default function RequireAuth({ children }) {
 
     window.addEventListener("storage", onStorage);
     window.addEventListener("psai:auth-changed", onAuthChanged);
+    const refreshTimer = setInterval(() => { refreshSession(); }, REFRESH_EVERY_MS);
 
     return () => {
       mounted = false;
+      clearInterval(refreshTimer);
       window.removeEventListener("storage", onStorage);
       window.removeEventListener("psai:auth-changed", onAuthChanged);
     };
   }, [router, pathname]);
 
+  // 🆕 first check once the children are mounted: their effects run before this one,
+  // so the page's own fetchBootstrap and this "me" check go out as one request
+  useEffect(() => {
+    if (ready) checkRef.current?.();
+  }, [ready, pathname]);
+
   if (!ready && redirected.current) return null; // avoid flash after redirect
   if (!ready) return null; // initial tokenless case
 
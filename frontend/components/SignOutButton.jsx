@@ -1,12 +1,12 @@
 "use client";
 
-import { clearSession } from "@/utils/session";
+import { logoutSession } from "@/utils/session";
 
 export default function SignOutButton({ className = "" }) {
-  const handleLogout = () => {
+  const handleLogout = async () => {
     try {
-      // 🔒 nuke local auth first (token, status, username) + broadcast to all tabs
-      clearSession();
+      // 🔒 revoke server-side, nuke local auth (token, status, username) + broadcast to all tabs
+      await logoutSession();
     } catch {}
 
     // 🚪 hard redirect so no component keeps running effects that hit /auth/me
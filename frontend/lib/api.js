@@ -1,4 +1,5 @@
 // frontend/lib/api.js
+import { refreshSession } from "@/utils/session";
 
 // 🆕 keep naming stable with your codebase
 export const API_BASE = process.env.NEXT_PUBLIC_API_BASE ?? "http://127.0.0.1:8000";
@@ -11,4 +12,51 @@ export function authHeaders() {
   return token ? { Authorization: `Bearer ${token}` } : {};
 }
 
+/**
+ * The signed-in user's id (the access token's "sub"), or "" if there is none.
+ * Read without verification: only used to scope client-side data, never trusted by the API.
+ */
+export function currentUserId() {
+  const token = typeof window !== "undefined" ? localStorage.getItem("psai_token") : "";
+  try {
+    const part = token.split(".")[1].replace(/-/g, "+").replace(/_/g, "/");
+    return String(JSON.parse(atob(part.padEnd(part.length + (4 - part.length % 4) % 4, "="))).sub || "");
+  } catch {
+    return "";
+  }
+}
+
+/**
+ * One round trip for page-load data: sections from me, plan, vault, story, report.
+ * Resolves to { ...sections, errors: [...] }; rejects with the HTTP status on 401/400.
+ * Calls made in the same tick share one request for the union of their fields
+ * (RequireAuth's "me" check rides along with the page's own sections), and an
+ * expired access token is refreshed once before giving up with a 401.
+ */
+let pendingBootstrap = null;
+
+export function fetchBootstrap(fields = ["me", "plan"]) {
+  if (!pendingBootstrap) {
+    const batch = { fields: new Set() };
+    batch.promise = new Promise(resolve => setTimeout(resolve, 0)).then(() => {
+      pendingBootstrap = null;
+      return loadBootstrap([...batch.fields]);
+    });
+    pendingBootstrap = batch;
+  }
+  fields.forEach(f => pendingBootstrap.fields.add(f));
+  return pendingBootstrap.promise;
+}
+
+async function loadBootstrap(fields) {
+  const get = () => fetch(`${API_BASE}/api/bootstrap?fields=${fields.join(",")}`, {
+    headers: { ...authHeaders() },
+  });
+  let r = await get();
+  if (r.status === 401 && (await refreshSession())) r = await get();
+  const data = await r.json().catch(() => ({}));
+  if (!r.ok) throw Object.assign(new Error(data.detail || "bootstrap failed"), { status: r.status });
+  return data;
+}
+
 // (no breaking change here; kept minimal)
@@ -22,3 +22,30 @@ export async function decryptSecret(ciphertextB64, passphrase, salt, iv){
   return new TextDecoder().decode(pt);
 }
 
+
+// Report metadata, computed before encryption; the secret itself never leaves the browser.
+const fpKeys = new Map();
+async function fingerprintKey(passphrase, userId){
+  // salted per user: the same passphrase must not give two accounts comparable fingerprints
+  const id = `${userId}\n${passphrase}`;
+  if (!fpKeys.has(id)) {
+    const km = await crypto.subtle.importKey("raw", new TextEncoder().encode(passphrase), "PBKDF2", false, ["deriveKey"]);
+    fpKeys.set(id, crypto.subtle.deriveKey(
+      { name:"PBKDF2", salt:new TextEncoder().encode(`psai-fingerprint:${userId}`), iterations:600000, hash:"SHA-256" },
+      km, { name:"HMAC", hash:"SHA-256", length:256 }, false, ["sign"]
+    ));
+  }
+  return fpKeys.get(id);
+}
+// equal secrets of one user -> equal fingerprint (reuse detection); meaningless without the passphrase
+export async function secretFingerprint(plain, passphrase, userId){
+  if (!userId) throw new Error("secretFingerprint needs the user id");
+  const mac = await crypto.subtle.sign("HMAC", await fingerprintKey(passphrase, userId), new TextEncoder().encode(plain));
+  return bytesToB64(new Uint8Array(mac).slice(0, 16));
+}
+// rough 0-4 score (zxcvbn scale) from length and character classes
+export function strengthScore(plain){
+  const classes = [/[a-z]/, /[A-Z]/, /\d/, /[^A-Za-z0-9]/].filter(r => r.test(plain)).length;
+  const bits = plain.length * Math.log2([1, 26, 52, 62, 94][classes]);
+  return bits < 28 ? 0 : bits < 36 ? 1 : bits < 60 ? 2 : bits < 80 ? 3 : 4;
+}
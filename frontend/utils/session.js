@@ -1,47 +1,105 @@
 // 🔒 utils/session.js
 import { API_URL } from "@/utils/api";
+import { fetchBootstrap } from "@/lib/api";
 
 /**
- * Ping backend to validate token.
- * Returns { ok: true, user, status } if valid, else { ok: false }.
- * Backend endpoint is /auth/me (returns { ok: True, user: {...} } in your API).
+ * 🆕 Rotate the refresh token and store the new short-lived access token.
+ * Returns true on success; the old refresh token is single-use.
+ * Single-flight: one call per tab at a time, and one tab at a time (Web Locks);
+ * a tab that waited on the lock and finds a token rotated by another tab just uses it.
  */
-export async function validateSession() {
+let refreshInFlight = null;
+
+export function refreshSession() {
+  if (!refreshInFlight) {
+    const seen = localStorage.getItem("psai_refresh");
+    const run = () => rotateRefresh(seen);
+    const locked = typeof navigator !== "undefined" && navigator.locks?.request
+      ? navigator.locks.request("psai-refresh", run)
+      : run();
+    refreshInFlight = locked.finally(() => { refreshInFlight = null; });
+  }
+  return refreshInFlight;
+}
+
+// 🆕 random id of this browser, sent with every refresh: the server only replays a
+// just-rotated token's successor (lost response / tab race) to the same device
+function deviceId() {
+  let id = localStorage.getItem("psai_device");
+  if (!id) {
+    id = crypto.randomUUID();
+    localStorage.setItem("psai_device", id);
+  }
+  return id;
+}
+
+async function rotateRefresh(seen) {
   try {
-    const token = localStorage.getItem("psai_token");
-    if (!token) return { ok: false };
+    const refresh = localStorage.getItem("psai_refresh");
+    if (!refresh) return false;
+    if (seen && refresh !== seen) return true; // another tab already rotated it
 
-    const res = await fetch(`${API_URL}/auth/me`, {
-      method: "GET",
-      headers: { Authorization: `Bearer ${token}` },
+    const res = await fetch(`${API_URL}/auth/refresh`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ refresh_token: refresh, device_id: deviceId() }),
     });
-
-    if (!res.ok) {
-      return { ok: false };
-    }
+    if (!res.ok) return false;
 
     const data = await res.json();
-    // 🆕 map your backend shape -> friendly return
-    // your /auth/me returns: { ok: True, user: { ..., status } }
-    const user = data.user || data; // fallback just in case
-    const statusFromApi =
-      (user && (user.status || user?.user?.status)) ||
-      data.status ||
-      null;
-
-    const status = statusFromApi || localStorage.getItem("psai_status") || "normal";
-    return { ok: true, user, status };
+    localStorage.setItem("psai_token", data.access_token);
+    localStorage.setItem("psai_refresh", data.refresh_token);
+    if (data.status) localStorage.setItem("psai_status", data.status);
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+/**
+ * Validate the token through the bootstrap "me" section (shared with the page's
+ * own bootstrap call when both land in the same tick; refreshes once on 401).
+ * Returns { ok: true, user, status } if valid, else { ok: false }.
+ */
+export async function validateSession() {
+  try {
+    if (!localStorage.getItem("psai_token")) return { ok: false };
+
+    const { me } = await fetchBootstrap(["me"]);
+    if (!me) return { ok: false };
+
+    const status = me.status || localStorage.getItem("psai_status") || "normal";
+    return { ok: true, user: me, status };
   } catch {
     return { ok: false };
   }
 }
 
+/**
+ * 🆕 Revoke the token + refresh family on the server (best effort), then clear locally.
+ */
+export async function logoutSession() {
+  try {
+    const token = localStorage.getItem("psai_token");
+    const refresh = localStorage.getItem("psai_refresh");
+    if (token) {
+      await fetch(`${API_URL}/auth/logout`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", Authorization: `Bearer ${token}` },
+        body: JSON.stringify({ refresh_token: refresh || null }),
+      });
+    }
+  } catch {}
+  clearSession();
+}
+
 /**
  * Force logout locally (no network).
  */
 export function clearSession() {
   try {
     localStorage.removeItem("psai_token");
+    localStorage.removeItem("psai_refresh");
     localStorage.removeItem("psai_status");
     localStorage.removeItem("psai_username");
     // Broadcast so Sidebar / other tabs react immediately